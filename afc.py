@@ -1,6 +1,6 @@
 # afc.py — AFC с дополнительной статистикой для Web UI
 
-import time
+from hal import time
 
 class AFC:
     def __init__(self, radio, track, step_hz=400, min_streak=3,
@@ -0,0 +1,186 @@
+# bit_sync.py — восстановление битовой синхронизации для потока GDO0
+#
+# Чистый Python без machine: тот же код работает в прерывании таймера
+# на ESP32 и на хосте против синтетических потоков (tools/bench_clock_recovery.py).
+
+# Фаза одного бита в условных единицах (целые, small int на MicroPython)
+PHASE_ONE = 1 << 16
+PHASE_HALF = PHASE_ONE >> 1
+
+
+class ClockRecovery:
+    """Цифровая ФАПЧ по переходам + мажоритарное решение по отсчётам.
+
+    Каждый отсчёт двигает фазу на step (= доля бита на один отсчёт при
+    фактической частоте таймера). На каждом переходе уровня фаза
+    подтягивается к границе бита на 1/2^gain_shift ошибки. Бит решается
+    голосованием отсчётов из центральной половины битового интервала.
+    Готовые байты (MSB first) уходят в cb.
+    """
+
+    def __init__(self, cb, bitrate_hz, sample_rate_hz, gain_shift=3):
+        self.cb = cb
+        self.gain_shift = gain_shift
+        self.set_rates(bitrate_hz, sample_rate_hz)
+
+        self.phase = 0
+        self.last = 0
+        self.ones = 0
+        self.votes = 0
+
+        self.bit_acc = 0
+        self.bit_count = 0
+
+        # статистика
+        self.transitions = 0
+        self.last_err = 0       # последняя фазовая ошибка, единицы PHASE_ONE
+
+    def set_rates(self, bitrate_hz, sample_rate_hz):
+        # округление до целого шага; остаток доберёт ФАПЧ
+        self.step = int(PHASE_ONE * bitrate_hz / sample_rate_hz + 0.5)
+        # отсчёт фиксирует переход в среднем на полшага позже самого фронта
+        self.edge_ofs = self.step >> 1
+
+    def reset(self):
+        self.phase = 0
+        self.ones = 0
+        self.votes = 0
+        self.bit_acc = 0
+        self.bit_count = 0
+
+    def feed(self, v):
+        """Один отсчёт GDO0 (0/1). Без аллокаций — можно звать из ISR."""
+        ph = self.phase + self.step
+
+        if v != self.last:
+            self.last = v
+            self.transitions += 1
+            e = ph - self.edge_ofs
+            if e >= PHASE_HALF:
+                e -= PHASE_ONE
+            self.last_err = e
+            ph -= e >> self.gain_shift
+
+        if ph >= PHASE_ONE:
+            ph -= PHASE_ONE
+            if self.votes:
+                bit = 1 if (self.ones << 1) > self.votes else 0
+            else:
+                bit = v
+            self.ones = 0
+            self.votes = 0
+
+            self.bit_acc = ((self.bit_acc << 1) | bit) & 0xFF
+            self.bit_count += 1
+            if self.bit_count >= 8:
+                self.bit_count = 0
+                self.cb(self.bit_acc)
+
+        # голосуют отсчёты из центральной половины бита
+        if (PHASE_HALF >> 1) <= ph < PHASE_HALF + (PHASE_HALF >> 1):
+            self.votes += 1
+            self.ones += v
+
+        self.phase = ph
+
+
+# Период счётчика time.ticks_us() на ESP32 (ticks_diff по маске)
+TICKS_MASK = (1 << 30) - 1
+
+
+class EdgeBitSlicer:
+    """Восстановление бит по длительностям участков между фронтами.
+
+    На вход — отметки времени фронтов (мкс, как time.ticks_us()) и уровень
+    GDO0 после фронта. Участок даёт round(длительность / бит) бит своего
+    уровня. Половина ошибки округления переносится на следующий участок
+    (гасит джиттер фронтов), а оценка длительности бита медленно
+    подстраивается под фактическую скорость.
+    Готовые байты (MSB first) уходят в cb.
+    """
+
+    # длительности — в 1/256 мкс (целые, без float)
+    FRAC = 8
+
+    def __init__(self, cb, bitrate_hz, max_run_bits=512, gain_shift=4):
+        self.cb = cb
+        self.max_run_bits = max_run_bits
+        self.gain_shift = gain_shift
+        self.set_bitrate(bitrate_hz)
+
+        self.prev_t = None
+        self.prev_level = 0
+        self.resid = 0
+
+        self.bit_acc = 0
+        self.bit_count = 0
+
+        # статистика
+        self.edges = 0
+        self.glitches = 0
+        self.long_runs = 0
+
+    def set_bitrate(self, bitrate_hz):
+        self.bit_len = int((1_000_000 << self.FRAC) / bitrate_hz + 0.5)
+        self.nominal = self.bit_len
+
+    def reset(self):
+        self.prev_t = None
+        self.resid = 0
+        self.bit_len = self.nominal
+        self.bit_acc = 0
+        self.bit_count = 0
+
+    def push_edge(self, t_us, level):
+        """Фронт в момент t_us, после которого на линии уровень level."""
+        self.edges += 1
+        if self.prev_t is None:
+            self.prev_t = t_us
+            self.prev_level = level
+            return
+
+        d = (((t_us - self.prev_t) & TICKS_MASK) << self.FRAC) + self.resid
+        bl = self.bit_len
+        n = (d + (bl >> 1)) // bl
+
+        if n == 0:
+            # иголка короче полбита: её время отходит следующему участку
+            # с уровнем после иголки
+            self.glitches += 1
+            self.prev_level = level
+            return
+
+        self.prev_t = t_us
+        run_level = self.prev_level
+        self.prev_level = level
+
+        if n > self.max_run_bits:
+            # долгая тишина/обрыв — отдаём не больше max_run_bits
+            self.long_runs += 1
+            n = self.max_run_bits
+            self.resid = 0
+        else:
+            # подстройка длительности бита по ошибке на бит
+            err = d - n * bl
+            self.resid = err >> 1
+            self.bit_len = bl + ((err // n) >> self.gain_shift)
+
+        acc = self.bit_acc
+        cnt = self.bit_count
+        while n:
+            n -= 1
+            acc = ((acc << 1) | run_level) & 0xFF
+            cnt += 1
+            if cnt >= 8:
+                cnt = 0
+                self.cb(acc)
+        self.bit_acc = acc
+        self.bit_count = cnt
+
+    def push_edges(self, times, levels, count=None):
+        """Пакетная обработка: списки/array отметок и уровней."""
+        if count is None:
+            count = len(times)
+        push = self.push_edge
+        for i in range(count):
+            push(times[i], levels[i])
@@ -2,7 +2,6 @@
 
 import network
 import time
-import _thread
 import main
 import web_ui
 
@@ -29,8 +28,9 @@ def main_boot():
 
     tracker = main.Tracker()
 
-    # Web UI в отдельном потоке
-    _thread.start_new_thread(web_ui.start_server, (tracker,))
+    # Web UI на uasyncio: без отдельного потока, запросы обслуживаются
+    # в паузах главного цикла трекера
+    web_ui.start_server(tracker)
     print("Web UI запущен.")
 
     print("Запуск трекера…")
@@ -1,10 +1,10 @@
 # cc1101.py — CC1101 в RAW 2-FSK режиме для M20
 
-from machine import Pin, SPI
-import time
+from hal import Pin, SPI, time, mcu_temperature
 from config import (
     CC1101_SCK, CC1101_MOSI, CC1101_MISO, CC1101_CS, CC1101_GDO0,
-    M20_BITRATE, M20_BW_KHZ, M20_DEVIATION_KHZ
+    M20_BITRATE, M20_BW_KHZ, M20_DEVIATION_KHZ,
+    CAL_MAX_AGE_S, CAL_TEMP_DELTA_C,
 )
 
 # Регистры CC1101 (по даташиту)
@@ -47,6 +47,10 @@ RSSI     = 0x34
 MARCSTATE= 0x35
 FREQEST  = 0x32
 
+# MARCSTATE
+MARC_IDLE = 0x01
+MARC_RX   = 0x0D
+
 # Строб-команды
 SRES   = 0x30
 SFSTXON= 0x31
@@ -64,6 +68,61 @@ WRITE_BURST  = 0x40
 
 F_XOSC = 26_000_000.0
 
+# Значения регистров 0x00..0x2E после SRES (datasheet, таблица 43)
+REG_RESET = bytes((
+    0x29, 0x2E, 0x3F, 0x07, 0xD3, 0x91, 0xFF, 0x04,   # IOCFG2 .. PKTCTRL1
+    0x45, 0x00, 0x00, 0x0F, 0x00, 0x1E, 0xC4, 0xEC,   # PKTCTRL0 .. FREQ0
+    0x8C, 0x22, 0x02, 0x22, 0xF8, 0x47, 0x07, 0x30,   # MDMCFG4 .. MCSM1
+    0x04, 0x36, 0x6C, 0x03, 0x40, 0x91, 0x87, 0x6B,   # MCSM0 .. WOREVT0
+    0xF8, 0x56, 0x10, 0xA9, 0x0A, 0x20, 0x0D, 0x41,   # WORCTRL .. RCCTRL1
+    0x00, 0x59, 0x7F, 0x3F, 0x88, 0x31, 0x0B,         # RCCTRL0 .. TEST0
+))
+
+# Конфигурация под M20 поверх значений сброса: (регистр, значение).
+# Пишется в чип двумя burst-ами: 0x00..FSCAL0 и TEST2..TEST0
+# (0x27..0x2B — RC-генератор и тестовые, их не трогаем).
+M20_REGS = (
+    # GDO0 = асинхронные серийные данные (RAW data)
+    (IOCFG2,   0x2E),
+    (IOCFG1,   0x2E),
+    (IOCFG0,   0x0D),   # GDO0_CFG=0x0D: async serial data out
+    (FIFOTHR,  0x47),
+    # Пакетный движок: асинхронный serial, CRC/addr off
+    (PKTCTRL1, 0x00),
+    # PKT_FORMAT=3 (async serial), LENGTH_CONFIG=2 (infinite), CRC off
+    # 0b0011_0010 = 0x32
+    (PKTCTRL0, 0x32),
+    # 2-FSK, SYNC_MODE=000 (off), Manchester off
+    (MDMCFG2,  0x00),
+    # MCSM: после RX остаёмся в RX; автокалибровка выключена
+    # (FS_AUTOCAL=0) — калибровки берутся из кэша по каналам
+    (MCSM2,    0x07),
+    (MCSM1,    0x0C),
+    (MCSM0,    0x08),
+    # AGC / bit sync / FOC — типовые, как в многих примерах TI
+    (FOCCFG,   0x16),
+    (BSCFG,    0x6C),
+    (AGCCTRL2, 0x43),
+    (AGCCTRL1, 0x40),
+    (AGCCTRL0, 0x91),
+    # Калибровка, тестовые регистры — типовые значения TI
+    (FREND1,   0x56),
+    (FREND0,   0x10),
+    (FSCAL3,   0xE9),
+    (FSCAL2,   0x2A),
+    (FSCAL1,   0x00),
+    (FSCAL0,   0x1F),
+    (TEST2,    0x81),
+    (TEST1,    0x35),
+    (TEST0,    0x09),
+)
+
+# сброс FIFO — три строба одной транзакцией
+_FLUSH = bytes((SIDLE, SFRX, SFTX))
+
+# калибровка синтезатора по SCAL: ~720 мкс при 26 МГц, с запасом
+CAL_WAIT_US = 800
+
 
 class CC1101Radio:
     def __init__(self):
@@ -79,32 +138,101 @@ class CC1101Radio:
         self.cs = Pin(CC1101_CS, Pin.OUT, value=1)
         self.gdo0 = Pin(CC1101_GDO0, Pin.IN)
 
+        # буферы SPI: обмен с регистрами без выделений памяти
+        self._b1 = bytearray(1)         # заголовок / строб
+        self._tx2 = bytearray(2)        # заголовок + байт данных
+        self._rx2 = bytearray(2)
+        self._b3 = bytearray(3)         # FREQ2/1/0 или FSCAL3/2/1
+        # статус одной транзакцией: одиночные чтения FREQEST, RSSI,
+        # MARCSTATE подряд без подъёма CS (burst статусным запрещён)
+        self._st_tx = bytes((FREQEST | READ_BURST, 0, RSSI | READ_BURST, 0,
+                             MARCSTATE | READ_BURST, 0))
+        self._st_rx = bytearray(6)
+        self.freqest = 0
+        self.marcstate = 0
+
+        # теневая копия конфигурации 0x00..0x2E (таблица M20_REGS
+        # поверх значений сброса), в чип уходит burst-ами
+        self.regs = bytearray(REG_RESET)
+        for a, v in M20_REGS:
+            self.regs[a] = v
+
+        # кэш калибровки синтезатора по каналам плана скана:
+        # на канал 6 байт — FREQ2/1/0 и FSCAL3/2/1 после SCAL
+        self.cal = None
+        self.cal_gen = None     # поколение, в котором канал калиброван
+        self.gen = 1            # текущее поколение (растёт при инвалидации)
+        self.cal_start = 0
+        self.cal_step = 0
+        self.cal_n = 0
+        self.cal_time = 0       # ticks_ms последней инвалидации/сборки
+        self.cal_temp = None    # температура, при которой собран кэш
+
+        # статистика перестроек
+        self.hops_cached = 0
+        self.hops_scal = 0
+        self.recals = 0
+
         self.reset()
         self._basic_init()
 
     # -------- низкоуровневый SPI --------
     def _xfer(self, b):
-        self.spi.write(bytearray([b]))
+        self._b1[0] = b
+        self.spi.write(self._b1)
 
     def _w_reg(self, addr, val):
+        tx = self._tx2
+        tx[0] = addr & 0x3F
+        tx[1] = val & 0xFF
         self.cs.off()
-        self._xfer(addr & 0x3F)
-        self._xfer(val & 0xFF)
+        self.spi.write(tx)
         self.cs.on()
 
     def _r_reg(self, addr):
+        tx = self._tx2
+        tx[0] = (addr & 0x3F) | READ_SINGLE
+        tx[1] = 0
         self.cs.off()
-        self._xfer((addr & 0x3F) | READ_SINGLE)
-        buf = bytearray(1)
+        self.spi.write_readinto(tx, self._rx2)
+        self.cs.on()
+        return self._rx2[1]
+
+    def _r_status(self, addr):
+        # статусные регистры 0x30..0x3D читаются только с READ_BURST,
+        # иначе тот же заголовок — строб-команда
+        tx = self._tx2
+        tx[0] = (addr & 0x3F) | READ_BURST
+        tx[1] = 0
+        self.cs.off()
+        self.spi.write_readinto(tx, self._rx2)
+        self.cs.on()
+        return self._rx2[1]
+
+    def _w_burst(self, addr, data):
+        self.cs.off()
+        self._xfer((addr & 0x3F) | WRITE_BURST)
+        self.spi.write(data)
+        self.cs.on()
+
+    def _r_burst(self, addr, buf):
+        self.cs.off()
+        self._xfer((addr & 0x3F) | READ_BURST)
         self.spi.readinto(buf)
         self.cs.on()
-        return buf[0]
+        return buf
 
     def _strobe(self, cmd):
         self.cs.off()
         self._xfer(cmd)
         self.cs.on()
 
+    def _strobes(self, cmds):
+        """Несколько строб-команд одной транзакцией."""
+        self.cs.off()
+        self.spi.write(cmds)
+        self.cs.on()
+
     # --------- базовая инициализация ---------
     def reset(self):
         self.cs.on()
@@ -118,47 +246,11 @@ class CC1101Radio:
 
     def _basic_init(self):
         # Flush FIFO
-        self._strobe(SIDLE)
-        self._strobe(SFRX)
-        self._strobe(SFTX)
-
-        # GDO0 = асинхронные серийные данные (RAW data)
-        self._w_reg(IOCFG0, 0x0D)   # GDO0_CFG=0x0D: async serial data out
-        self._w_reg(IOCFG1, 0x2E)
-        self._w_reg(IOCFG2, 0x2E)
-
-        # Пакетный движок: асинхронный serial, CRC/addr off
-        self._w_reg(PKTCTRL1, 0x00)
-        # PKT_FORMAT=3 (async serial), LENGTH_CONFIG=2 (infinite), CRC off
-        # 0b0011_0010 = 0x32
-        self._w_reg(PKTCTRL0, 0x32)
-        self._w_reg(FIFOTHR,  0x47)
-
-        # 2-FSK, SYNC_MODE=000 (off), Manchester off
-        self._w_reg(MDMCFG2, 0x00)
-
-        # AGC / bit sync / FOC — типовые, как в многих примерах TI
-        self._w_reg(FOCCFG,   0x16)
-        self._w_reg(BSCFG,    0x6C)
-        self._w_reg(AGCCTRL2, 0x43)
-        self._w_reg(AGCCTRL1, 0x40)
-        self._w_reg(AGCCTRL0, 0x91)
-
-        # MCSM: после RX остаёмся в RX, автокалибровка
-        self._w_reg(MCSM0, 0x18)
-        self._w_reg(MCSM1, 0x0C)
-        self._w_reg(MCSM2, 0x07)
-
-        # Калибровка, тестовые регистры — типовые значения TI
-        self._w_reg(FREND1, 0x56)
-        self._w_reg(FREND0, 0x10)
-        self._w_reg(FSCAL3, 0xE9)
-        self._w_reg(FSCAL2, 0x2A)
-        self._w_reg(FSCAL1, 0x00)
-        self._w_reg(FSCAL0, 0x1F)
-        self._w_reg(TEST2,  0x81)
-        self._w_reg(TEST1,  0x35)
-        self._w_reg(TEST0,  0x09)
+        self._strobes(_FLUSH)
+        # вся конфигурация — две burst-записи из теневой копии
+        mv = memoryview(self.regs)
+        self._w_burst(IOCFG2, mv[IOCFG2:FSCAL0 + 1])
+        self._w_burst(TEST2, mv[TEST2:TEST0 + 1])
 
     # ---------- расчёт частоты / скорости / девиации ----------
     def _calc_freq_regs(self, freq_hz):
@@ -222,25 +314,145 @@ class CC1101Radio:
         # Девиация
         dev_e, dev_m = self._calc_deviation_regs(M20_DEVIATION_KHZ * 1000)
 
-        mdmcfg4 = ((bw_e & 0x3) << 6) | ((bw_m & 0x3) << 4) | (e & 0x0F)
-        self._w_reg(MDMCFG4, mdmcfg4)
-        self._w_reg(MDMCFG3, m & 0xFF)
-        self._w_reg(DEVIATN, ((dev_e & 0x7) << 4) | (dev_m & 0x7))
+        r = self.regs
+        r[MDMCFG4] = ((bw_e & 0x3) << 6) | ((bw_m & 0x3) << 4) | (e & 0x0F)
+        r[MDMCFG3] = m & 0xFF
+        r[DEVIATN] = ((dev_e & 0x7) << 4) | (dev_m & 0x7)
+        # MDMCFG4..DEVIATN подряд — одна транзакция
+        self._w_burst(MDMCFG4, memoryview(r)[MDMCFG4:DEVIATN + 1])
 
     def set_frequency(self, freq_hz):
-        f2, f1, f0 = self._calc_freq_regs(freq_hz)
-        self._w_reg(FREQ2, f2)
-        self._w_reg(FREQ1, f1)
-        self._w_reg(FREQ0, f0)
-        # пересинтез
-        self._strobe(SCAL)
-        time.sleep_ms(1)
+        i = self._cal_index(freq_hz)
+        b = self._b3
+        self._strobe(SIDLE)
+        if i >= 0 and self.cal_start + i * self.cal_step == freq_hz:
+            # центр канала: FREQ2/1/0 тоже из кэша
+            self._cal_get(i * 6)
+        else:
+            f = int(freq_hz * (1 << 16) / F_XOSC)
+            b[0] = (f >> 16) & 0xFF
+            b[1] = (f >> 8) & 0xFF
+            b[2] = f & 0xFF
+        self._w_burst(FREQ2, b)
+        if i >= 0 and self.cal_gen[i] == self.gen:
+            # канал откалиброван: готовые FSCAL3/2/1, без SCAL
+            self._cal_get(i * 6 + 3)
+            self._w_burst(FSCAL3, b)
+            self.hops_cached += 1
+        else:
+            # нет в кэше или кэш устарел: калибруем (и запоминаем)
+            self._strobe(SCAL)
+            time.sleep_us(CAL_WAIT_US)
+            self.hops_scal += 1
+            if i >= 0:
+                self._cal_store(i)
+        self._strobe(SRX)
+
+    # ---------------- кэш калибровки синтезатора ----------------
+    def build_cal_cache(self, start_hz, end_hz, step_hz):
+        """Калибровка всех каналов плана start..end с шагом step (один проход)."""
+        n = (end_hz - start_hz) // step_hz + 1
+        self.cal = bytearray(6 * n)
+        self.cal_gen = bytearray(n)
+        self.cal_start = start_hz
+        self.cal_step = step_hz
+        self.cal_n = n
+        for i in range(n):
+            self.cal[i * 6:i * 6 + 3] = bytes(self._calc_freq_regs(start_hz + i * step_hz))
+        self._invalidate()
+        self.recal_step(n)
+
+    def _cal_index(self, freq_hz):
+        """Канал плана для частоты (ближайший в пределах полшага) или -1."""
+        if self.cal is None:
+            return -1
+        i = (freq_hz - self.cal_start + self.cal_step // 2) // self.cal_step
+        if 0 <= i < self.cal_n:
+            return int(i)
+        return -1
+
+    def _cal_get(self, o):
+        # три байта кэша в буфер SPI (срез bytearray — это копия в куче)
+        b = self._b3
+        c = self.cal
+        b[0] = c[o]
+        b[1] = c[o + 1]
+        b[2] = c[o + 2]
+
+    def _cal_store(self, i):
+        b = self._r_burst(FSCAL3, self._b3)
+        o = i * 6 + 3
+        c = self.cal
+        c[o] = b[0]
+        c[o + 1] = b[1]
+        c[o + 2] = b[2]
+        self.cal_gen[i] = self.gen
+
+    def _invalidate(self):
+        self.gen = (self.gen + 1) & 0xFF or 1
+        self.cal_time = time.ticks_ms()
+        self.cal_temp = mcu_temperature()
+
+    def check_cal_drift(self):
+        """Инвалидировать кэш по возрасту или сдвигу температуры.
+
+        Каналы перекалибруются лениво (при перестройке на них) или фоном
+        через recal_step(). Возвращает True, если кэш сброшен.
+        """
+        if self.cal is None:
+            return False
+        t = mcu_temperature()
+        age = time.ticks_diff(time.ticks_ms(), self.cal_time)
+        if age > CAL_MAX_AGE_S * 1000 or (
+                t is not None and self.cal_temp is not None and
+                abs(t - self.cal_temp) >= CAL_TEMP_DELTA_C):
+            self._invalidate()
+            return True
+        return False
+
+    def cal_stale(self):
+        """Сколько каналов кэша ждут перекалибровки."""
+        if self.cal is None:
+            return 0
+        g = self.gen
+        return sum(1 for v in self.cal_gen if v != g)
+
+    def recal_step(self, max_channels):
+        """Фоновая перекалибровка до max_channels устаревших каналов.
+
+        Частота приёмника после вызова не определена — звать между
+        проходами скана, не во время приёма.
+        """
+        done = 0
+        g = self.gen
+        for i in range(self.cal_n):
+            if done >= max_channels:
+                break
+            if self.cal_gen[i] == g:
+                continue
+            self._strobe(SIDLE)
+            self._cal_get(i * 6)
+            self._w_burst(FREQ2, self._b3)
+            self._strobe(SCAL)
+            time.sleep_us(CAL_WAIT_US)
+            self._cal_store(i)
+            self.recals += 1
+            done += 1
+        return done
 
     def enter_rx(self):
         self._strobe(SRX)
 
     def read_rssi_dbm(self):
-        raw = self._r_reg(RSSI)
+        """RSSI в dBm; заодно обновляет self.freqest и self.marcstate."""
+        rx = self._st_rx
+        self.cs.off()
+        self.spi.write_readinto(self._st_tx, rx)
+        self.cs.on()
+        fe = rx[1]
+        self.freqest = fe - 256 if fe >= 128 else fe
+        self.marcstate = rx[5] & 0x1F
+        raw = rx[3]
         if raw >= 128:
             raw -= 256
         # RSSI_dBm ~= (RSSI_REG/2) - 74
@@ -248,7 +460,7 @@ class CC1101Radio:
 
     def read_freqest(self):
         """Считать FREQEST (signed int8)."""
-        fe = self._r_reg(FREQEST)
+        fe = self._r_status(FREQEST)
         if fe >= 128:
             fe -= 256
         return fe
@@ -0,0 +1,71 @@
+# commands.py — очередь команд Web UI → трекер
+#
+# Обработчики Web UI работают в паузах главного цикла (_wait_ms), то есть
+# посреди прохода скана, остановки на кандидате или окна приёма. Трогать
+# оттуда радио (перестройка, калибровка) нельзя: цикл продолжит работу
+# с чужой частотой. Поэтому Web UI только кладёт команду в ограниченную
+# очередь, а трекер выполняет её в начале шага (Tracker.step), когда ни
+# скан, ни AFC, ни приём ничего не делают с CC1101. Длинные остановки
+# (шаг линейного скана, кандидат, проход RSSI) видят непустую очередь и
+# заканчиваются досрочно, поэтому ожидание команды не зависит от задержек,
+# заданных той же /dwell. Окна приёма зондов по расписанию не прерываются:
+# они короче SCHED_PERIOD_MS.
+#
+# Результат — в самом объекте Command (done / ok / result): HTTP-обработчик
+# ждёт done и сообщает исход в ответе.
+
+
+class Command:
+    """Команда и её результат (заполняет трекер)."""
+    __slots__ = ("name", "args", "done", "ok", "result")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.done = False
+        self.ok = False
+        self.result = None
+
+
+class CommandQueue:
+    def __init__(self, size=8):
+        self.size = size
+        self.q = []
+
+        # статистика
+        self.posted = 0
+        self.executed = 0
+        self.failed = 0
+        self.rejected = 0     # очередь была полна
+
+    def __len__(self):
+        return len(self.q)
+
+    def post(self, name, *args):
+        """Поставить команду в очередь. None — очередь полна."""
+        if len(self.q) >= self.size:
+            self.rejected += 1
+            return None
+        c = Command(name, args)
+        self.q.append(c)
+        self.posted += 1
+        return c
+
+    def drain(self, handler):
+        """Выполнить все команды по порядку: handler(name, args) → результат.
+
+        Исключение обработчика — отказ этой команды (ok=False, result —
+        текст ошибки), главный цикл продолжает работу.
+        """
+        q = self.q
+        while q:
+            c = q.pop(0)
+            try:
+                c.result = handler(c.name, c.args)
+                c.ok = True
+            except Exception as e:
+                print("[CMD]", c.name, c.args, "failed:", e)
+                c.result = str(e)
+                self.failed += 1
+            c.done = True
+            self.executed += 1
@@ -9,6 +9,29 @@ CC1101_GDO0 = 3
 
 # ---- Web server ----
 HTTP_PORT = 80
+WEB_MAX_CONN    = 4             # соединений; сверх — вытесняем простаивающее, иначе 503
+WEB_TIMEOUT_S   = 5             # на чтение запроса
+WEB_KEEPALIVE_S = 5             # простой keep-alive соединения между запросами
+WEB_ASSET_DIR   = "/www"        # gzip-статика (tools/build_www.py) + assets.json
+WEB_CHUNK       = 512           # буфер отдачи статики с флеша
+SSE_POLL_MS         = 100     # /events: как часто сверять состояние трекера
+SSE_MIN_INTERVAL_MS = 250     # ...и не чаще одного события на клиента
+SSE_RSSI_DB         = 3.0     # изменение RSSI, о котором стоит сообщить
+SSE_KEEPALIVE_S     = 15      # комментарий в тихий поток — заметить ушедшего клиента
+SSE_MAX_CONN        = 2       # потоков /events, свой лимит вне WEB_MAX_CONN; лишним — 503
+
+# ---- Команды Web UI → трекер ----
+CMD_QUEUE_SIZE = 8              # команд в очереди, лишним — 503
+CMD_TIMEOUT_S  = 5              # ждать выполнения не дольше
+FREQ_MIN_HZ    = 400000000      # допустимые частоты команд (диапазон зондов)
+FREQ_MAX_HZ    = 406000000
+DWELL_MAX_MS   = 10000          # предел задержек скана из команд
+
+# ---- Снимок /status ----
+STATUS_MIN_MS      = 250        # пересобирать не чаще
+STATUS_MAX_AGE_MS  = 2000       # ...и не реже (возрасты, счётчики)
+STATUS_RSSI_DB     = 1.0        # изменение RSSI, ради которого стоит пересобрать
+STATUS_LONGPOLL_S  = 10         # /status?since=: ждать новую версию не дольше
 
 # ---- Радионастройки для M20 ----
 M20_BITRATE        = 9600          # бод
@@ -18,13 +41,62 @@ M20_DEVIATION_KHZ  = 40            # девиация FSK
 # Sync для RAW-битового потока
 M20_SYNC_BYTES = b"\x99\x99\x4C\x99"
 
+# ---- Семплирование GDO0 ----
+GDO0_CAPTURE   = "timer"       # "timer" — таймер + ФАПЧ, "edge" — по фронтам
+GDO0_OS_FACTOR = 4             # отсчётов на бит (ФАПЧ + голосование)
+
+# ---- Буфер байт GDO0 между ISR и главным циклом ----
+RX_RING_SIZE = 2048            # байт, степень двойки (~1.7 с потока 9600 бод)
+
+# ---- Запись сырого потока (raw_log) ----
+RAW_LOG_DIR       = "/rawlog"
+RAW_LOG_ENABLED   = False      # включается и из Web UI: /rawlog?on=1
+RAW_LOG_RING      = 8192       # байт ОЗУ под кольцо
+RAW_LOG_SEG_BYTES = 256 * 1024 # размер сегмента
+RAW_LOG_MAX_SEGS  = 8          # предел по флешу: RAW_LOG_MAX_SEGS × сегмент
+
 # ---- Параметры сканирования ----
 SCAN_START_HZ = 404000000
 SCAN_END_HZ   = 406000000
 SCAN_STEP_HZ  = 50000
 
-SCAN_DWELL_MS    = 120          # задержка на частоте при SCAN
+SCAN_DWELL_MS    = 120          # задержка на частоте при SCAN (linear)
+SCAN_MAX_CHANNELS = 241         # каналов в плане скана (кэш калибровки, RSSI)
 TRACK_TIMEOUT_MS = 4000        # потеря сигнала = возврат в SCAN
 
+# "spectrum" — быстрый проход RSSI + остановки только на пиках,
+# "linear"   — старый проход по всем шагам с SCAN_DWELL_MS на каждом
+SCAN_MODE            = "spectrum"
+SCAN_SWEEP_SETTLE_MS = 2        # пауза после перестройки в быстром проходе
+SCAN_PEAK_DB         = 6.0      # пик выше шума своего канала на столько dB
+SCAN_MAX_CAND        = 4        # остановок на один проход
+SCAN_CAND_DWELL_MS   = 1200     # остановка на пике: кадр M20 раз в секунду
+SCAN_SYNC_DWELL_MS   = 2500     # ...продлевается, если увидели sync
+
+# ---- Кэш калибровки синтезатора CC1101 ----
+CAL_MAX_AGE_S    = 900          # перекалибровка не реже, чем раз в 15 мин
+CAL_TEMP_DELTA_C = 8            # ...или при сдвиге температуры на столько °C
+CAL_CHECK_MS     = 5000         # как часто проверять возраст/температуру
+CAL_BG_CHANNELS  = 8            # каналов за один фоновый шаг (между проходами)
+
+# ---- История трека ----
+TRACK_HISTORY_SIZE = 1024       # точек (26 байт на точку); полный буфер прореживается
+TRACK_DELTA_MAX    = 200        # точек в одном ответе /track?since=
+
+# ---- Реестр зондов по серийному номеру ----
+SONDE_REGISTRY_SIZE = 16        # записей; при переполнении вытесняется самый старый
+
+# ---- Несколько зондов на одном приёмнике (scheduler) ----
+MULTI_SONDE       = False       # True — окна по расписанию + фоновый скан
+SCHED_MAX_SONDES  = 4           # зондов в таблице расписания
+SCHED_PERIOD_MS   = 1000        # период кадров M20
+SCHED_FRAME_MS    = 65          # sync + кадр 70 байт на 9600 бод
+SCHED_GUARD_MS    = 60          # запас окна до/после ожидаемого кадра
+SCHED_DROP_MISSES = 10          # окон без кадра подряд — зонд потерян
+SCHED_MIN_GAP_MS  = 30          # промежуток короче — не сканируем, ждём окно
+# раз в SCHED_PROBE_S секунд остановка на кандидате полная, даже ценой окон
+# (кадры нового зонда могут приходиться на окна уже известных)
+SCHED_PROBE_S     = 15
+
 # ---- Детектор сигнала ----
 RSSI_THRESHOLD = -110
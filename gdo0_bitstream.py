@@ -1,24 +1,30 @@
-# gdo0_bitstream.py — oversampling ×4 GDO0 → байты (ESP32C3 совместимо)
+# gdo0_bitstream.py — GDO0 → байты (ESP32C3 совместимо)
+#
+# Два сборщика с одним интерфейсом: start(bitrate), stop(), poll().
+#   BitstreamCollector — таймер, oversampling + ФАПЧ, байты прямо из ISR
+#   EdgeCollector      — прерывание по фронтам, отметки времени в массив,
+#                        биты восстанавливаются пачками в poll()
 
-from machine import Pin, Timer
+from array import array
+
+from hal import Pin, Timer, time
+from bit_sync import ClockRecovery, EdgeBitSlicer
 
 class BitstreamCollector:
     OS_FACTOR = 4
-    MIDPOINT = 2
 
-    def __init__(self, cb, gdo0_pin=3, debug=False):
+    def __init__(self, cb, gdo0_pin=3, os_factor=OS_FACTOR, debug=False):
         self.cb = cb
         self.debug = debug
         self.gdo0 = Pin(gdo0_pin, Pin.IN)
+        self.os_factor = os_factor
 
         # НА ESP32C3 НУЖНО УКАЗАТЬ ID ТАЙМЕРА, например 0
         self.timer = Timer(0)
 
-        self.samples = [0, 0, 0, 0]
-        self.sample_pos = 0
-
-        self.bit_acc = 0
-        self.bit_count = 0
+        # восстановление тактов; реальные частоты задаются в start()
+        self.cdr = ClockRecovery(self._on_byte, 1, os_factor)
+        self.sample_rate = 0
         self.running = False
 
     def start(self, bitrate_hz):
@@ -26,14 +32,19 @@ class BitstreamCollector:
             return
         self.running = True
 
-        sample_rate = bitrate_hz * self.OS_FACTOR
-        period_us = int(1_000_000 / sample_rate)
+        period_us = int(1_000_000 / (bitrate_hz * self.os_factor))
+        # период таймера целый в мкс — ФАПЧ получает фактическую частоту
+        # отсчётов, а не номинальную (26 мкс вместо 26.04 = +0.16%)
+        self.sample_rate = 1_000_000 / period_us
+        self.cdr.set_rates(bitrate_hz, self.sample_rate)
+        self.cdr.reset()
 
         if self.debug:
-            print("[GDO0] start, rate", sample_rate, "Hz, period", period_us, "us")
+            print("[GDO0] start, rate", self.sample_rate, "Hz, period", period_us, "us")
 
+        # Timer.init(period=...) в MicroPython — миллисекунды, поэтому freq
         self.timer.init(
-            period=period_us,
+            freq=self.sample_rate,
             mode=Timer.PERIODIC,
             callback=self._sample
         )
@@ -44,26 +55,104 @@ class BitstreamCollector:
         self.running = False
         self.timer.deinit()
 
+    def poll(self):
+        # байты уходят в cb прямо из прерывания таймера
+        return 0
+
     def _sample(self, t):
-        v = self.gdo0() & 1
-        self.samples[self.sample_pos] = v
-        self.sample_pos += 1
+        self.cdr.feed(self.gdo0() & 1)
+
+    def _on_byte(self, b):
+        if self.cb:
+            try:
+                self.cb(b)
+            except Exception as e:
+                if self.debug:
+                    print("[GDO0] cb err", e)
+
+
+class EdgeCollector:
+    """Захват фронтов GDO0 по Pin.irq: нагрузка ∝ числу переходов.
+
+    Обработчик фронта только пишет ticks_us() и уровень в предвыделенные
+    кольцевые массивы. poll() из главного цикла прогоняет накопленные
+    фронты через EdgeBitSlicer и отдаёт байты в cb.
+    """
 
-        if self.sample_pos < self.OS_FACTOR:
+    EDGE_BUF = 1024     # фронтов в кольце, степень двойки
+
+    def __init__(self, cb, gdo0_pin=3, edge_buf=EDGE_BUF, debug=False):
+        if edge_buf & (edge_buf - 1):
+            raise ValueError("edge_buf must be a power of two")
+        self.cb = cb
+        self.debug = debug
+        self.gdo0 = Pin(gdo0_pin, Pin.IN)
+
+        self.times = array("L", [0] * edge_buf)
+        self.levels = bytearray(edge_buf)
+        self.mask = edge_buf - 1
+        self.head = 0
+        self.tail = 0
+        self.overruns = 0
+
+        self.slicer = EdgeBitSlicer(self._on_byte, 1)
+        self.running = False
+
+    def start(self, bitrate_hz):
+        if self.running:
             return
+        self.running = True
+        self.slicer.set_bitrate(bitrate_hz)
+        self.slicer.reset()
+        self.head = 0
+        self.tail = 0
 
-        self.sample_pos = 0
-        bit = self.samples[self.MIDPOINT]
-
-        self.bit_acc = ((self.bit_acc << 1) | bit) & 0xFF
-        self.bit_count += 1
-
-        if self.bit_count >= 8:
-            if self.cb:
-                try:
-                    self.cb(self.bit_acc)
-                except Exception as e:
-                    if self.debug:
-                        print("[GDO0] cb err", e)
-            self.bit_acc = 0
-            self.bit_count = 0
+        if self.debug:
+            print("[GDO0] edge capture start, bitrate", bitrate_hz)
+
+        self.gdo0.irq(
+            handler=self._edge,
+            trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING,
+            hard=True,
+        )
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.gdo0.irq(handler=None)
+
+    def _edge(self, pin):
+        # hard IRQ: только запись в предвыделенные массивы
+        h = self.head
+        nh = (h + 1) & self.mask
+        if nh == self.tail:
+            self.overruns += 1
+            return
+        self.times[h] = time.ticks_us()
+        self.levels[h] = pin.value()
+        self.head = nh
+
+    def poll(self):
+        """Восстановить биты по накопленным фронтам. Вызывать из главного цикла."""
+        h = self.head
+        t = self.tail
+        n = 0
+        push = self.slicer.push_edge
+        times = self.times
+        levels = self.levels
+        mask = self.mask
+        while t != h:
+            push(times[t], levels[t])
+            t = (t + 1) & mask
+            n += 1
+        self.tail = t
+        return n
+
+    def _on_byte(self, b):
+        if self.cb:
+            try:
+                self.cb(b)
+            except Exception as e:
+                if self.debug:
+                    print("[GDO0] cb err", e)
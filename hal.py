@@ -0,0 +1,90 @@
+# hal.py — аппаратная прослойка: MicroPython на ESP32 или симулятор на CPython
+#
+# Модули проекта берут железо и время только отсюда:
+#   from hal import Pin, SPI, Timer, time, json, mcu_temperature
+#   from hal import asyncio, aio_run, aio_pump, aio_write
+# На устройстве это machine / time / ujson / uasyncio, на хосте — пакет sim
+# (виртуальные часы, симулятор CC1101 и эфира) и asyncio CPython.
+
+try:
+    from machine import Pin, SPI, Timer
+    import time
+    SIMULATED = False
+except ImportError:
+    from sim.machine import Pin, SPI, Timer  # noqa: F401
+    from sim import utime as time
+    SIMULATED = True
+
+try:
+    import ujson as json
+except ImportError:
+    import json  # noqa: F401
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+try:
+    import esp32
+except ImportError:
+    esp32 = None
+    if SIMULATED:
+        from sim import esp32
+
+
+def mcu_temperature():
+    """Температура кристалла, °C, или None, если датчика нет."""
+    if esp32 is None:
+        return None
+    try:
+        return esp32.mcu_temperature()
+    except AttributeError:
+        pass
+    try:
+        # старые прошивки ESP32: только raw_temperature() в °F
+        return (esp32.raw_temperature() - 32) / 1.8
+    except AttributeError:
+        return None
+
+
+# ------------------------------------------------------------
+# Цикл asyncio внутри ожиданий главного цикла
+# ------------------------------------------------------------
+# Трекер не уступает управление event loop-у целиком: задачи asyncio
+# (Web UI) выполняются в его паузах — aio_pump(ms) вместо sleep_ms(ms).
+if SIMULATED:
+    _loop = asyncio.new_event_loop()
+
+    def aio_run(coro):
+        """Выполнить корутину до конца на общем цикле."""
+        return _loop.run_until_complete(coro)
+
+    def aio_pump(ms):
+        """Пауза ms с обслуживанием задач asyncio.
+
+        Время симулятора виртуальное: пауза — сдвиг часов, а цикл
+        прокручивается коротким реальным опросом сокетов.
+        """
+        time.sleep_ms(ms)
+        _loop.run_until_complete(asyncio.sleep(0.0005))
+
+    def aio_write(w, mv):
+        """Записать кусок переиспользуемого буфера в поток.
+
+        Транспорт CPython может держать ссылку на переданный memoryview
+        до отправки — копируем.
+        """
+        w.write(bytes(mv))
+else:
+    def aio_run(coro):
+        """Выполнить корутину до конца на общем цикле."""
+        return asyncio.run_until_complete(asyncio.create_task(coro))
+
+    def aio_pump(ms):
+        """Пауза ms с обслуживанием задач asyncio."""
+        asyncio.run_until_complete(asyncio.create_task(asyncio.sleep_ms(ms)))
+
+    def aio_write(w, mv):
+        """Записать кусок переиспользуемого буфера в поток (uasyncio копирует сам)."""
+        w.write(mv)
@@ -2,7 +2,7 @@
 # Работает с M20_SYNC_BYTES = b"\x99\x99\x4C\x99"
 
 from config import M20_SYNC_BYTES
-import time
+from hal import time
 
 SYNC = M20_SYNC_BYTES
 SYNC_LEN = len(SYNC)
@@ -25,12 +25,14 @@ def hamming_bytes(a, b):
     return d
 
 
-def update_checkM10(c, b):
-    """Алгоритм CHECKM10 (как в m20mod)."""
-    b &= 0xFF
+def _cm10_pre(b):
+    """Предобработка байта CHECKM10: rotate right 1 + xor со сдвигом на 2."""
     b = ((b >> 1) | ((b & 1) << 7)) & 0xFF
-    b ^= (b >> 2) & 0xFF
-    c ^= b
+    return (b ^ (b >> 2)) & 0xFF
+
+
+def _cm10_fb(c):
+    """8 шагов сдвига с обратной связью 0x98 (бит-серийная часть CHECKM10)."""
     for _ in range(8):
         fb = c & 1
         c >>= 1
@@ -39,14 +41,137 @@ def update_checkM10(c, b):
     return c & 0xFF
 
 
+# Таблицы CHECKM10 (по 256 байт): обе стадии линейны по байту,
+# поэтому update = FB[c ^ PRE[b]] — два обращения к таблице вместо цикла.
+_CM10_PRE = bytes(_cm10_pre(i) for i in range(256))
+_CM10_FB = bytes(_cm10_fb(i) for i in range(256))
+
+
+def update_checkM10(c, b):
+    """Алгоритм CHECKM10 (как в m20mod), табличная версия."""
+    return _CM10_FB[(c ^ _CM10_PRE[b & 0xFF]) & 0xFF]
+
+
 def checkM10(frame):
     """Полный CHECKM10 для кадра."""
-    if len(frame) < 2:
+    n = len(frame)
+    if n < 2:
         return False
+    pre = _CM10_PRE
+    fb = _CM10_FB
     cs = 0
-    for b in frame[:-1]:
-        cs = update_checkM10(cs, b)
-    return cs == frame[-1]
+    for i in range(n - 1):
+        cs = fb[cs ^ pre[frame[i]]]
+    return cs == frame[n - 1]
+
+
+def checkM10_all_shifts(frame):
+    """CHECKM10 сразу для всех 8 битовых сдвигов кадра за один проход.
+
+    Сдвиг s соответствует M20Decoder._shift_frame_bits(frame, s), но
+    сдвинутые копии не строятся: байт каждого сдвига берётся из 16-битного
+    окна (предыдущий байт, текущий байт).
+    Возвращает битовую маску: бит s = 1, если CRC сходится для сдвига s.
+    """
+    n = len(frame)
+    if n < 2:
+        return 0
+    pre = _CM10_PRE
+    fb = _CM10_FB
+    c0 = c1 = c2 = c3 = c4 = c5 = c6 = c7 = 0
+    w = 0
+    for i in range(n - 1):
+        w = ((w << 8) | frame[i]) & 0xFFFF
+        c0 = fb[c0 ^ pre[w & 0xFF]]
+        c1 = fb[c1 ^ pre[(w >> 1) & 0xFF]]
+        c2 = fb[c2 ^ pre[(w >> 2) & 0xFF]]
+        c3 = fb[c3 ^ pre[(w >> 3) & 0xFF]]
+        c4 = fb[c4 ^ pre[(w >> 4) & 0xFF]]
+        c5 = fb[c5 ^ pre[(w >> 5) & 0xFF]]
+        c6 = fb[c6 ^ pre[(w >> 6) & 0xFF]]
+        c7 = fb[c7 ^ pre[(w >> 7) & 0xFF]]
+
+    # последний байт каждого сдвига — это его CRC
+    w = ((w << 8) | frame[n - 1]) & 0xFFFF
+    mask = 0
+    if c0 == w & 0xFF:
+        mask |= 0x01
+    if c1 == (w >> 1) & 0xFF:
+        mask |= 0x02
+    if c2 == (w >> 2) & 0xFF:
+        mask |= 0x04
+    if c3 == (w >> 3) & 0xFF:
+        mask |= 0x08
+    if c4 == (w >> 4) & 0xFF:
+        mask |= 0x10
+    if c5 == (w >> 5) & 0xFF:
+        mask |= 0x20
+    if c6 == (w >> 6) & 0xFF:
+        mask |= 0x40
+    if c7 == (w >> 7) & 0xFF:
+        mask |= 0x80
+    return mask
+
+
+# Число единиц в байте — для расстояния Хэмминга через XOR
+_POP8 = bytes(bin(i).count("1") for i in range(256))
+
+
+class SyncCorrelator:
+    """Побитовый скользящий коррелятор 32-битного sync-слова.
+
+    Регистр сдвига обновляется на каждом бите (MSB first, как собирает
+    BitstreamCollector), расстояние Хэмминга = popcount(reg ^ sync) по
+    таблице _POP8. 32-битный регистр хранится двумя 16-битными половинами,
+    чтобы на MicroPython все значения оставались small int (без аллокаций).
+    """
+
+    def __init__(self, sync=SYNC, thresh=SYNC_HAMMING_THRESH):
+        if len(sync) != 4:
+            raise ValueError("sync must be 4 bytes")
+        self.sync_hi = (sync[0] << 8) | sync[1]
+        self.sync_lo = (sync[2] << 8) | sync[3]
+        self.thresh = thresh
+        self.hi = 0
+        self.lo = 0
+        self.dist = 32      # расстояние Хэмминга на последнем совпадении
+
+    def reset(self):
+        self.hi = 0
+        self.lo = 0
+
+    def push_byte(self, b):
+        """Вдвинуть 8 бит байта b.
+
+        Возвращает -1, если sync не найден, иначе число бит этого байта,
+        оставшихся ПОСЛЕ конца sync (0..7) — точное битовое смещение начала
+        кадра. Биты после совпадения в регистр не вдвигаются.
+        """
+        hi = self.hi
+        lo = self.lo
+        sh = self.sync_hi
+        sl = self.sync_lo
+        pop = _POP8
+        th = self.thresh
+        k = 8
+        while k:
+            k -= 1
+            hi = ((hi << 1) | (lo >> 15)) & 0xFFFF
+            lo = ((lo << 1) | ((b >> k) & 1)) & 0xFFFF
+            x = hi ^ sh
+            d = pop[x >> 8] + pop[x & 0xFF]
+            if d > th:
+                continue
+            x = lo ^ sl
+            d += pop[x >> 8] + pop[x & 0xFF]
+            if d <= th:
+                self.hi = hi
+                self.lo = lo
+                self.dist = d
+                return k
+        self.hi = hi
+        self.lo = lo
+        return -1
 
 
 class M20Decoder:
@@ -55,23 +180,32 @@ class M20Decoder:
         self.cb = callback
         self.debug = debug
 
-        # sliding window для поиска sync
-        self.win = bytearray(SYNC_LEN)
-        self.wpos = 0
+        # побитовый коррелятор для поиска sync
+        self.sync = SyncCorrelator()
 
-        # состояние захвата кадра
+        # состояние захвата кадра; буфер выделен один раз на MAX_FRAME_LEN
         self.capturing = False
-        self.buf = bytearray()
+        self.buf = bytearray(MAX_FRAME_LEN)
+        self.n = 0
         self.expected = None
 
+        # фаза кадра относительно границ байт, найденная на sync:
+        # acc — младшие acc_bits бит последнего сырого байта (начало
+        # следующего выровненного байта)
+        self.acc = 0
+        self.acc_bits = 0
+
         # статистика
         self.sync_hits = 0
         self.frames_total = 0
         self.frames_valid = 0
         self.frames_crc_fail = 0
+        self.frames_bad_len = 0
         self.last_valid_shift = None
         self.last_frame_ok = False
         self.last_sync_time = None
+        # бит байта, на котором закончился последний sync (0..7 бит после него)
+        self.last_sync_bitofs = None
 
     # ============================================================
     # Основной вход: по одному байту из GDO0-декодера
@@ -79,59 +213,68 @@ class M20Decoder:
     def feed_byte(self, b):
         b &= 0xFF
 
-        # обновляем окно sync
-        self.win[self.wpos] = b
-        self.wpos = (self.wpos + 1) % SYNC_LEN
-
         # если НЕ в захвате → ищем sync
         if not self.capturing:
-            if self._sync_match(bytes(self.win)):
+            k = self._sync_match(b)
+            if k >= 0:
                 if self.debug:
-                    print("[M20] SYNC detected")
+                    print("[M20] SYNC detected, bit ofs", k)
+                self.last_sync_bitofs = k
                 self._on_sync_hit()
+                # оставшиеся k бит этого байта — уже начало кадра
+                self.acc = b & ((1 << k) - 1)
+                self.acc_bits = k
                 self.capturing = True
-                self.buf = bytearray()
+                self.n = 0
                 self.expected = None
             return
 
-        # ---- мы в режиме захвата кадра ----
-        self.buf.append(b)
+        # ---- мы в режиме захвата кадра: байты выходят уже выровненными ----
+        k = self.acc_bits
+        if k:
+            v = ((self.acc << (8 - k)) | (b >> k)) & 0xFF
+            self.acc = b & ((1 << k) - 1)
+        else:
+            v = b
+        n = self.n
+        self.buf[n] = v
+        n += 1
+        self.n = n
 
         # первый байт после sync — длина
         if self.expected is None:
-            if len(self.buf) >= 1:
-                L = self.buf[0]
-                total = L + 1
-                if not (MIN_FRAME_LEN <= total <= MAX_FRAME_LEN):
-                    if self.debug:
-                        print("[M20] bad length L=", L)
-                    self._reset_state()
-                    return
-                self.expected = total
+            total = v + 1
+            if not (MIN_FRAME_LEN <= total <= MAX_FRAME_LEN):
+                if self.debug:
+                    print("[M20] bad length L=", v)
+                self.frames_bad_len += 1
+                self._reset_state()
+                return
+            self.expected = total
             return
 
         # если набрали нужную длину кадра
-        if len(self.buf) >= self.expected:
-            frame = bytes(self.buf)
-            self._handle_frame(frame)
+        if n >= self.expected:
+            self._handle_frame(bytes(memoryview(self.buf)[:n]))
             self._reset_state()
 
-    # ============================================================
-    # Поиск sync: 8 фазовых сдвигов + расстояние Хэмминга
-    # ============================================================
-    def _sync_match(self, window):
-        if len(window) != SYNC_LEN:
-            return False
+    def restart(self):
+        """Бросить начатый кадр и искать sync заново (после перестройки)."""
+        self._reset_state()
 
-        best = 999
-        for shift in range(8):
-            shifted = self._shift_frame_bits(window, shift)
-            d = hamming_bytes(shifted, SYNC)
-            if d < best:
-                best = d
+    def feed_bytes(self, data):
+        """Пакетный вход: байты из кольца ISR (memoryview/bytes)."""
+        feed = self.feed_byte
+        for b in data:
+            feed(b)
+        return len(data)
 
+    # ============================================================
+    # Поиск sync: побитовый коррелятор + расстояние Хэмминга
+    # ============================================================
+    def _sync_match(self, b):
         # Чем меньше порог, тем жёстче — 4 бита на 32-битный sync это довольно строго
-        return best <= SYNC_HAMMING_THRESH
+        return self.sync.push_byte(b)
 
     def _on_sync_hit(self):
         self.sync_hits += 1
@@ -145,25 +288,16 @@ class M20Decoder:
             print("[M20] frame raw:", frame.hex())
 
         self.frames_total += 1
-        ok = False
-        last_shift = None
-
-        # пробуем 8 фазовых сдвигов
-        for shift in range(8):
-            shifted = self._shift_frame_bits(frame, shift)
-            if checkM10(shifted):
-                ok = True
-                last_shift = shift
-                if self.debug:
-                    print("[M20] VALID frame (shift=", shift, ")")
-                # вызываем callback для валидного кадра
-                self.cb(shifted)
-                break
 
-        if ok:
+        # кадр уже выровнен по фазе sync — один проход CHECKM10
+        if checkM10(frame):
+            if self.debug:
+                print("[M20] VALID frame (bit ofs=", self.last_sync_bitofs, ")")
             self.frames_valid += 1
-            self.last_valid_shift = last_shift
+            self.last_valid_shift = self.last_sync_bitofs
             self.last_frame_ok = True
+            # вызываем callback для валидного кадра
+            self.cb(frame)
         else:
             if self.debug:
                 print("[M20] INVALID frame (CRC mismatch)")
@@ -189,6 +323,10 @@ class M20Decoder:
     # Сброс состояния захвата
     # ============================================================
     def _reset_state(self):
+        # после кадра sync ищется заново по 32 новым битам
+        self.sync.reset()
         self.capturing = False
-        self.buf = bytearray()
+        self.n = 0
         self.expected = None
+        self.acc = 0
+        self.acc_bits = 0
@@ -1,21 +1,65 @@
 # main.py — SCAN/TRACK логика + FIXED режим "сидим на частоте и слушаем"
 
-import time
+from hal import time
 
-from cc1101 import CC1101Radio
-from gdo0_bitstream import BitstreamCollector
+from cc1101 import CC1101Radio, MARC_IDLE
+from gdo0_bitstream import BitstreamCollector, EdgeCollector
 from m20_decoder import M20Decoder
+from rx_ring import ByteRing
 from sonde_data import parse_m20
 from track_store import TrackStore
+from sonde_registry import SondeRegistry
 from afc import AFC
+from spectrum_scan import SpectrumScanner
+from scheduler import Scheduler
+from status_snapshot import StatusPublisher
+from commands import CommandQueue
+import raw_log
 from config import (
     SCAN_START_HZ,
     SCAN_END_HZ,
     SCAN_STEP_HZ,
     SCAN_DWELL_MS,
+    SCAN_MAX_CHANNELS,
+    SCAN_MODE,
+    SCAN_SWEEP_SETTLE_MS,
+    SCAN_PEAK_DB,
+    SCAN_MAX_CAND,
+    SCAN_CAND_DWELL_MS,
+    SCAN_SYNC_DWELL_MS,
+    CAL_CHECK_MS,
+    CAL_BG_CHANNELS,
+    MULTI_SONDE,
+    SCHED_MAX_SONDES,
+    SCHED_PERIOD_MS,
+    SCHED_FRAME_MS,
+    SCHED_GUARD_MS,
+    SCHED_DROP_MISSES,
+    SCHED_MIN_GAP_MS,
+    SCHED_PROBE_S,
+    M20_BW_KHZ,
+    SONDE_REGISTRY_SIZE,
     M20_BITRATE,
+    GDO0_CAPTURE,
+    GDO0_OS_FACTOR,
+    RX_RING_SIZE,
+    RAW_LOG_DIR,
+    RAW_LOG_ENABLED,
+    RAW_LOG_RING,
+    RAW_LOG_SEG_BYTES,
+    RAW_LOG_MAX_SEGS,
+    CMD_QUEUE_SIZE,
+    FREQ_MIN_HZ,
+    FREQ_MAX_HZ,
+    DWELL_MAX_MS,
 )
 
+# как часто главный цикл разбирает кольцо байт во время пауз
+RX_POLL_MS = 20
+
+# поправка частоты на единицу FREQEST (как в AFC)
+FREQEST_STEP_HZ = 400
+
 
 class Tracker:
     def __init__(self):
@@ -27,12 +71,31 @@ class Tracker:
         # Радио и состояние
         self.radio = CC1101Radio()
         self.track = TrackStore()
+        # все зонды, от которых были кадры, — по серийному номеру
+        self.sondes = SondeRegistry(SONDE_REGISTRY_SIZE)
 
         # Декодер M20
         self.decoder = M20Decoder(self._on_m20_frame, debug=False)
 
-        # Сборщик бит с GDO0 (oversampling ×4)
-        self.bitcol = BitstreamCollector(self.decoder.feed_byte, debug=False)
+        # Кольцо байт: ISR сборщика только кладёт байт, весь разбор
+        # (sync, CRC, parse, AFC) идёт в главном цикле
+        self.rx = ByteRing(RX_RING_SIZE)
+
+        # Запись сырого потока во флеш (по умолчанию выключена)
+        self.rawlog = raw_log.init(
+            path=RAW_LOG_DIR,
+            ring_size=RAW_LOG_RING,
+            seg_bytes=RAW_LOG_SEG_BYTES,
+            max_segs=RAW_LOG_MAX_SEGS,
+            bitrate=M20_BITRATE,
+            enabled=RAW_LOG_ENABLED,
+        )
+
+        # Сборщик бит с GDO0: по таймеру (oversampling + ФАПЧ) или по фронтам
+        if GDO0_CAPTURE == "edge":
+            self.bitcol = EdgeCollector(self.rx.put, debug=False)
+        else:
+            self.bitcol = BitstreamCollector(self.rx.put, os_factor=GDO0_OS_FACTOR, debug=False)
 
         # AFC
         self.afc = AFC(
@@ -45,14 +108,54 @@ class Tracker:
             debug=False,
         )
 
+        # план скана и задержки (меняются командами Web UI)
+        self.scan_start = SCAN_START_HZ
+        self.scan_end = SCAN_END_HZ
+        self.scan_step = SCAN_STEP_HZ
+        self.scan_dwell_ms = SCAN_DWELL_MS
+        self.cand_dwell_ms = SCAN_CAND_DWELL_MS
+
         # текущее положение сканера
         self.scan_freq = SCAN_START_HZ
 
+        # двухфазный скан (SCAN_MODE = "spectrum"), иначе — линейный проход;
+        # в режиме нескольких зондов фоновый скан всегда двухфазный
+        self.scanner = None
+        if SCAN_MODE == "spectrum" or MULTI_SONDE:
+            self.scanner = self._make_scanner()
+        # канал, с которого продолжится прерванный быстрый проход
+        self.sweep_i = 0
+        # когда последний раз слушали кандидата полный период
+        self.probe_ms = 0
+
+        # несколько зондов: окна приёма по расписанию (MULTI_SONDE)
+        self.sched = None
+        if MULTI_SONDE:
+            self.sched = Scheduler(max_sondes=SCHED_MAX_SONDES,
+                                   period_ms=SCHED_PERIOD_MS,
+                                   frame_ms=SCHED_FRAME_MS,
+                                   guard_ms=SCHED_GUARD_MS,
+                                   drop_misses=SCHED_DROP_MISSES,
+                                   near_hz=M20_BW_KHZ * 500)
+
+        # когда последний раз проверяли возраст/температуру калибровок
+        self.cal_check_ms = 0
+
+        # чем заполнять паузы: None — просто sleep_ms, иначе fn(ms)
+        # (Web UI ставит aio_pump — его задачи идут, пока трекер ждёт)
+        self.idle = None
+
         # FIXED режим:
         # True  — сидим на заданной частоте ВСЕГДА
         # False — обычная логика SCAN/TRACK
         self.fixed_mode = False
 
+        # снимок для /status: публикуется перед тем, как отдать паузу Web UI
+        self.status = StatusPublisher(self)
+
+        # команды Web UI: выполняются в начале шага главного цикла
+        self.cmds = CommandQueue(CMD_QUEUE_SIZE)
+
     # ------------------------------------------------------
     # Вызывается при ВАЛИДНОМ кадре (CHECKM10 + parse OK)
     # ------------------------------------------------------
@@ -61,8 +164,13 @@ class Tracker:
         if frame is None:
             return
 
-        # обновляем трек
+        # обновляем трек и запись зонда в реестре
         self.track.update_from_frame(frame)
+        self.sondes.update(frame, self.track.freq, self.track.rssi, self.track.snr)
+
+        if self.sched is not None and not self.fixed_mode:
+            self._on_multi_frame(frame)
+            return
 
         # сообщаем AFC
         self.afc.on_valid_frame(frame)
@@ -70,26 +178,211 @@ class Tracker:
         # при сканировании — переходим в TRACK
         if self.state == "SCAN" and not self.fixed_mode:
             self.state = "TRACK"
+            raw_log.log_event("TRACK serial=%s" % frame.serial)
 
     # ------------------------------------------------------
     # Режим SCAN — ходим по диапазону
     # ------------------------------------------------------
     def _run_scan(self):
+        if self.scanner is not None:
+            self._run_scan_spectrum()
+        else:
+            self._run_scan_linear()
+
+    def _scanning(self):
+        if self.fixed_mode:
+            return False
+        return self.sched is not None or self.state == "SCAN"
+
+    def _run_scan_spectrum(self):
+        sc = self.scanner
+        f = sc.next_candidate()
+        if f is None:
+            # между проходами — фоновая перекалибровка устаревших каналов
+            # (проход, прерванный командой, просто продолжается)
+            if self.sweep_i == 0:
+                self.radio.recal_step(CAL_BG_CHANNELS)
+            self._sweep()
+            return
+
+        # фаза 2: слушаем кандидата, пока не придёт кадр или не выйдет время;
+        # биты прохода и недобранный кадр с прошлого канала — не в счёт
+        self._service_rx()
+        self.radio.set_frequency(f)
+        self.track.freq = f
+        self.scan_freq = f
+        self.decoder.restart()
+        self._wait_ms(SCAN_SWEEP_SETTLE_MS)
+        self.track.update_rssi(self.radio)
+        hits = self.decoder.sync_hits
+        limit = self.cand_dwell_ms
+        t0 = time.ticks_ms()
+        # команда Web UI прерывает остановку: step() выполнит её сразу
+        while self._scanning() and not self.cmds.q:
+            self._wait_ms(RX_POLL_MS)
+            if self.decoder.sync_hits != hits:
+                limit = SCAN_SYNC_DWELL_MS
+            if time.ticks_diff(time.ticks_ms(), t0) >= limit:
+                break
+        if self.decoder.sync_hits == hits and not self.cmds.q:
+            sc.miss()
+
+    def _sweep(self, deadline=None):
+        """Фаза 1: один отсчёт RSSI на канал с минимальной паузой.
+
+        С deadline (ticks_ms) проход прерывается и продолжится с того же
+        канала при следующем вызове; так же — при команде в очереди.
+        """
+        sc = self.scanner
+        radio = self.radio
+        rssi = sc.rssi
+        i = self.sweep_i
+        while i < sc.n:
+            if self.cmds.q or (deadline is not None and
+                               time.ticks_diff(deadline, time.ticks_ms()) <= 0):
+                self.sweep_i = i
+                return
+            f = sc.freq(i)
+            radio.set_frequency(f)
+            self.scan_freq = f
+            self._wait_ms(SCAN_SWEEP_SETTLE_MS)
+            if not self._scanning():
+                self.sweep_i = 0
+                return
+            rssi[i] = radio.read_rssi_dbm()
+            i += 1
+        self.sweep_i = 0
+        sc.rank()
+
+    def _run_scan_linear(self):
         self.radio.set_frequency(self.scan_freq)
         self.track.freq = self.scan_freq
 
         # даём радиочипу устаканиться
-        time.sleep_ms(30)
+        self._wait_ms(30)
 
         # обновляем RSSI/шум
         self.track.update_rssi(self.radio)
 
         # следующий шаг по частоте
-        self.scan_freq += SCAN_STEP_HZ
-        if self.scan_freq > SCAN_END_HZ:
-            self.scan_freq = SCAN_START_HZ
+        self.scan_freq += self.scan_step
+        if self.scan_freq > self.scan_end:
+            self.scan_freq = self.scan_start
+
+        t0 = time.ticks_ms()
+        while not self.cmds.q:
+            left = self.scan_dwell_ms - time.ticks_diff(time.ticks_ms(), t0)
+            if left <= 0:
+                break
+            self._wait_ms(left if left < RX_POLL_MS else RX_POLL_MS)
+
+    # ------------------------------------------------------
+    # Несколько зондов (MULTI_SONDE): окна по расписанию + фоновый скан
+    # ------------------------------------------------------
+    def _run_multi(self):
+        sch = self.sched
+        now = time.ticks_ms()
+        e = sch.next(now)
+        if e is None:
+            self._scan_gap(None)
+            return
+        wait = time.ticks_diff(sch.open_at(e), now)
+        if wait <= SCHED_MIN_GAP_MS:
+            self._listen(e)
+        else:
+            self._scan_gap(time.ticks_add(now, wait - SCHED_MIN_GAP_MS))
 
-        time.sleep_ms(SCAN_DWELL_MS)
+    def _listen(self, e):
+        """Окно приёма зонда e: до кадра или до конца окна."""
+        sch = self.sched
+        self._service_rx()
+        self.radio.set_frequency(e.freq)
+        self.track.freq = e.freq
+        self.decoder.restart()
+        sch.begin(e)
+        close = sch.close_at(e)
+        rssi_done = False
+        while not e.hit:
+            left = time.ticks_diff(close, time.ticks_ms())
+            if left <= 0:
+                break
+            self._wait_ms(left if left < RX_POLL_MS else RX_POLL_MS)
+            if not rssi_done:
+                self.track.update_rssi(self.radio)
+                rssi_done = True
+        lost = sch.end()
+        if lost is not None:
+            self.track.history.release(lost.serial)
+            raw_log.log_event("LOST serial=%s" % lost.serial)
+        if not sch.sondes:
+            self.state = "SCAN"
+
+    def _scan_gap(self, deadline):
+        """Фоновый скан до deadline (ticks_ms; None — без ограничения)."""
+        sc = self.scanner
+        if self.sweep_i == 0:
+            f = sc.next_candidate()
+            # кандидаты на частотах зондов из таблицы не нужны
+            while f is not None and self.sched.covers(f):
+                f = sc.next_candidate()
+            if f is not None:
+                now = time.ticks_ms()
+                if time.ticks_diff(now, self.probe_ms) >= SCHED_PROBE_S * 1000:
+                    self.probe_ms = now
+                    deadline = None
+                self._dwell_gap(f, deadline)
+                return
+            self.radio.recal_step(CAL_BG_CHANNELS)
+        self._sweep(deadline)
+
+    def _dwell_gap(self, f, deadline):
+        """Остановка на кандидате, не дольше deadline."""
+        sch = self.sched
+        self._service_rx()
+        self.radio.set_frequency(f)
+        self.track.freq = f
+        self.scan_freq = f
+        self.decoder.restart()
+        self._wait_ms(SCAN_SWEEP_SETTLE_MS)
+        self.track.update_rssi(self.radio)
+        hits = self.decoder.sync_hits
+        n = sch.added
+        limit = self.cand_dwell_ms
+        t0 = time.ticks_ms()
+        # окно ближайшего зонда ограничивает остановку — тогда по ней
+        # нельзя судить, что sync на кандидате нет
+        full = True
+        while sch.added == n:
+            if self.cmds.q:
+                full = False
+                break
+            if self.decoder.sync_hits != hits:
+                limit = SCAN_SYNC_DWELL_MS
+            left = limit - time.ticks_diff(time.ticks_ms(), t0)
+            if deadline is not None:
+                d = time.ticks_diff(deadline, time.ticks_ms())
+                if d < left:
+                    left = d
+                    full = False
+            if left <= 0:
+                break
+            self._wait_ms(left if left < RX_POLL_MS else RX_POLL_MS)
+        if full and sch.added == n and self.decoder.sync_hits == hits:
+            self.scanner.miss()
+
+    def _on_multi_frame(self, frame):
+        """Кадр в режиме нескольких зондов: в таблицу расписания."""
+        f = self.track.freq
+        # поправка частоты зонда по FREQEST — вместо AFC, который
+        # перестраивал бы приёмник посреди расписания
+        fe = self.radio.read_freqest()
+        if abs(fe) >= 2:
+            f += fe * FREQEST_STEP_HZ
+        n = self.sched.added
+        e = self.sched.on_frame(frame.serial, f, time.ticks_ms())
+        if e is not None and self.sched.added != n:
+            raw_log.log_event("SONDE serial=%s freq=%d" % (frame.serial, f))
+        self.state = "TRACK"
 
     # ------------------------------------------------------
     # Режим TRACK — сидим на частоте и ждём кадры
@@ -98,10 +391,16 @@ class Tracker:
         # всегда обновляем RSSI/шум
         self.track.update_rssi(self.radio)
 
+        # MARCSTATE приходит тем же чтением статуса, что и RSSI:
+        # чип выпал из RX (сбой по питанию/SPI) — возвращаем
+        if self.radio.marcstate == MARC_IDLE:
+            raw_log.log_event("RX restart")
+            self.radio.enter_rx()
+
         # Если мы в FIXED-режиме — НИКОГДА не выходим в SCAN.
         # Просто постоянно слушаем поток на этой частоте, даже без сигналов.
         if self.fixed_mode:
-            time.sleep_ms(50)
+            self._wait_ms(50)
             return
 
         # Нормальный TRACK-режим с AFC и возвратом в SCAN по потере кадров
@@ -109,9 +408,57 @@ class Tracker:
             # потеряли — возвращаемся в SCAN
             self.state = "SCAN"
             self.track.lost()
+            raw_log.log_event("LOST")
+            return
+
+        self._wait_ms(50)
+
+    # ------------------------------------------------------
+    # Разбор потока GDO0 из кольца (вне контекста прерывания)
+    # ------------------------------------------------------
+    def _service_rx(self):
+        self.bitcol.poll()
+        self.rx.drain(self._on_rx_chunk)
+
+        # запись во флеш — здесь, в главном цикле, целыми блоками
+        lg = self.rawlog
+        if lg.enabled:
+            lg.note(self.track.freq, self.track.rssi)
+            lg.flush()
+
+    def _check_cal(self):
+        """Раз в CAL_CHECK_MS: не устарел ли кэш калибровки синтезатора."""
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.cal_check_ms) < CAL_CHECK_MS:
             return
+        self.cal_check_ms = now
+        if self.radio.check_cal_drift():
+            raw_log.log_event("CAL invalidated")
+            # с расписанием калибровка догонит на следующей перестройке
+            if self.sched is None and self.state != "SCAN" or self.fixed_mode:
+                # на приёме: перекалибровать текущую частоту на месте
+                self.radio.set_frequency(self.track.freq)
+
+    def _on_rx_chunk(self, mv):
+        self.rawlog.write(mv)
+        self.decoder.feed_bytes(mv)
 
-        time.sleep_ms(50)
+    def _wait_ms(self, ms):
+        """Пауза, во время которой продолжаем разбирать поток из кольца."""
+        t0 = time.ticks_ms()
+        while True:
+            self._service_rx()
+            left = ms - time.ticks_diff(time.ticks_ms(), t0)
+            if left <= 0:
+                return
+            # отложенное прореживание истории — по шагу на опрос кольца
+            self.track.history.step()
+            d = left if left < RX_POLL_MS else RX_POLL_MS
+            if self.idle is not None:
+                self.status.publish()
+                self.idle(d)
+            else:
+                time.sleep_ms(d)
 
     # ------------------------------------------------------
     # Фиксированная частота (задаётся извне, например WebUI)
@@ -124,6 +471,7 @@ class Tracker:
 
         self.radio.set_frequency(freq_hz)
         self.track.freq = freq_hz
+        raw_log.log_event("FIXED %d" % freq_hz)
 
         # Сброс AFC, чтобы он не тащил нас куда-то ещё
         self.afc.reset()
@@ -134,22 +482,102 @@ class Tracker:
         self.state = "SCAN"
         self.afc.reset()
 
+    # ------------------------------------------------------
+    # План скана и задержки (команды Web UI)
+    # ------------------------------------------------------
+    def _make_scanner(self):
+        return SpectrumScanner(self.scan_start, self.scan_end, self.scan_step,
+                               margin_db=SCAN_PEAK_DB, max_cand=SCAN_MAX_CAND)
+
+    def set_scan_range(self, start_hz, end_hz, step_hz):
+        """Новый план скана: сканер и кэш калибровки строятся заново."""
+        if not FREQ_MIN_HZ <= start_hz < end_hz <= FREQ_MAX_HZ or step_hz <= 0:
+            raise ValueError("bad scan range")
+        n = (end_hz - start_hz) // step_hz + 1
+        if n > SCAN_MAX_CHANNELS:
+            raise ValueError("too many channels: %d > %d" % (n, SCAN_MAX_CHANNELS))
+        self.scan_start = start_hz
+        self.scan_end = end_hz
+        self.scan_step = step_hz
+        self.scan_freq = start_hz
+        if self.scanner is not None:
+            self.scanner = self._make_scanner()
+            self.sweep_i = 0
+        self.radio.build_cal_cache(start_hz, end_hz, step_hz)
+        # калибровка оставила синтезатор на последнем канале плана
+        self.radio.set_frequency(self.track.freq if self._tuned() else start_hz)
+        raw_log.log_event("SCAN %d-%d/%d" % (start_hz, end_hz, step_hz))
+        return n
+
+    def _tuned(self):
+        """Приёмник сидит на частоте зонда (а не идёт по плану скана)."""
+        return self.fixed_mode or (self.state != "SCAN" and self.track.freq != 0)
+
+    def set_dwell(self, step_ms=None, cand_ms=None):
+        """Задержки скана: на шаге линейного прохода и на кандидате."""
+        for ms in (step_ms, cand_ms):
+            if ms is not None and not 0 < ms <= DWELL_MAX_MS:
+                raise ValueError("bad dwell: %s" % ms)
+        if step_ms is not None:
+            self.scan_dwell_ms = step_ms
+        if cand_ms is not None:
+            self.cand_dwell_ms = cand_ms
+        return self.scan_dwell_ms, self.cand_dwell_ms
+
+    def _command(self, name, args):
+        """Выполнить команду из очереди (только из step)."""
+        if name == "fixed":
+            f = args[0]
+            if not FREQ_MIN_HZ <= f <= FREQ_MAX_HZ:
+                raise ValueError("frequency out of range: %d" % f)
+            self.set_fixed_frequency(f)
+            return f
+        if name == "clear":
+            self.clear_fixed_mode()
+            return None
+        if name == "rawlog":
+            self.rawlog.enable(args[0])
+            return args[0]
+        if name == "scan":
+            return self.set_scan_range(*args)
+        if name == "dwell":
+            return self.set_dwell(*args)
+        raise ValueError("unknown command: %s" % name)
+
     # ------------------------------------------------------
     # Главный цикл
     # ------------------------------------------------------
-    def run(self):
+    def start(self):
         print("Tracker starting…")
 
         # настраиваем CC1101 под M20 и уходим в RX
         self.radio.configure_m20()
+        # один проход калибровки по всему плану скана — дальше
+        # перестройка без SCAL
+        self.radio.build_cal_cache(self.scan_start, self.scan_end, self.scan_step)
+        self.cal_check_ms = time.ticks_ms()
         self.radio.enter_rx()
 
         # запускаем сборщик потока GDO0
         self.bitcol.start(M20_BITRATE)
 
+    def step(self):
+        """Одна итерация главного цикла (симулятор зовёт её сам)."""
+        # команды Web UI — здесь, пока ни скан, ни приём не трогают радио
+        if self.cmds.q:
+            self.cmds.drain(self._command)
+        self._service_rx()
+        self._check_cal()
+        if self.sched is not None and not self.fixed_mode:
+            self._run_multi()
+        elif self.state == "SCAN" and not self.fixed_mode:
+            self._run_scan()
+        else:
+            self._run_track()
+
+    def run(self):
+        self.start()
+
         # основной цикл
         while True:
-            if self.state == "SCAN" and not self.fixed_mode:
-                self._run_scan()
-            else:
-                self._run_track()
+            self.step()
@@ -1,15 +1,317 @@
-# raw_log.py — минимальная версия.
-# Ничего не пишет, не создаёт больших массивов, не грузит память.
-# Используется как заглушка, чтобы сохранить совместимость проекта.
+# raw_log.py — запись сырого потока GDO0 во флеш для последующего разбора
+#
+# Путь записи (log_raw_bits) — только копирование в заранее выделенное
+# кольцо, без аллокаций. Во флеш пишет flush() из главного цикла (не из
+# ISR!) блоками по BLOCK байт, выровненными по границе блока файла.
+#
+# Формат сегмента (файл rawNNNN.bin, не больше seg_bytes):
+#   заголовок сегмента SEG_HDR байт: magic "M20L", версия, битрейт,
+#     номер сегмента, time(), ticks_ms(), частота, RSSI×10
+#   блоки: заголовок блока BLK_HDR байт (magic, длина данных, частота,
+#     time(), ticks_ms(), RSSI×10) + данные. Первый блок сегмента короче
+#     на SEG_HDR, остальные — ровно BLOCK, поэтому каждая запись во флеш
+#     кончается на границе BLOCK.
+# Сегментов не больше max_segs: самый старый удаляется.
+# События (log_event) — текстом в events.txt рядом, не больше EVENTS_MAX байт.
+
+import os
+import struct
+
+from hal import time
+
+SEG_MAGIC = b"M20L"
+SEG_VERSION = 1
+SEG_FMT = "<4sBBHIIIIh"
+SEG_HDR = 32
+BLK_MAGIC = 0xB10C
+BLK_FMT = "<HHIIIh"
+BLK_HDR = 20
+BLOCK = 4096
+EVENTS_MAX = 16 * 1024
+
+
+def _seg_name(n):
+    return "raw%04d.bin" % n
+
+
+def _rssi10(rssi):
+    if rssi is None:
+        return -32768
+    v = int(rssi * 10)
+    return -32767 if v < -32767 else (32767 if v > 32767 else v)
+
+
+class RawLogger:
+    def __init__(self, path="/rawlog", ring_size=8192, seg_bytes=256 * 1024,
+                 max_segs=8, bitrate=9600, enabled=False):
+        if ring_size & (ring_size - 1):
+            raise ValueError("ring_size must be a power of two")
+        self.path = path
+        self.seg_bytes = seg_bytes - seg_bytes % BLOCK
+        self.max_segs = max_segs
+        self.bitrate = bitrate
+
+        # кольцо сырых байт и буфер одного блока — выделяются один раз
+        self.ring = bytearray(ring_size)
+        self.mask = ring_size - 1
+        self.head = 0
+        self.tail = 0
+        self.block = bytearray(BLOCK)
+
+        # метаданные для заголовков (обновляет главный цикл)
+        self.freq = 0
+        self.rssi = None
+
+        self.enabled = False
+        self.f = None
+        self.seg_no = -1
+        self.seg_used = 0
+
+        # статистика
+        self.bytes_logged = 0
+        self.bytes_dropped = 0
+        self.blocks_written = 0
+        self.write_errors = 0
+
+        if enabled:
+            self.enable(True)
+
+    # ------------------------------------------------------
+    # Управление
+    # ------------------------------------------------------
+    def enable(self, on=True):
+        if on and not self.enabled:
+            try:
+                os.mkdir(self.path)
+            except OSError:
+                pass
+            self.head = 0
+            self.tail = 0
+            self.enabled = True
+        elif not on and self.enabled:
+            self.enabled = False
+            self.flush(force=True)
+            self._close()
+
+    def note(self, freq, rssi):
+        self.freq = freq
+        self.rssi = rssi
+
+    # ------------------------------------------------------
+    # Путь записи: без аллокаций
+    # ------------------------------------------------------
+    def write(self, data):
+        if not self.enabled:
+            return
+        h = self.head
+        t = self.tail
+        mask = self.mask
+        ring = self.ring
+        for b in data:
+            nh = (h + 1) & mask
+            if nh == t:
+                self.bytes_dropped += 1
+                continue
+            ring[h] = b
+            h = nh
+        self.head = h
+
+    def available(self):
+        return (self.head - self.tail) & self.mask
+
+    # ------------------------------------------------------
+    # Сброс во флеш: только из главного цикла
+    # ------------------------------------------------------
+    def flush(self, force=False):
+        """Записать все полные блоки (и неполный при force). Возвращает число блоков."""
+        n = 0
+        while True:
+            avail = self.available()
+            if not avail:
+                break
+            cap = self._block_cap()
+            if avail < cap and not force:
+                break
+            self._write_block(avail if avail < cap else cap)
+            n += 1
+        return n
+
+    def _block_cap(self):
+        if self.f is None or self.seg_used == 0:
+            return BLOCK - SEG_HDR - BLK_HDR
+        return BLOCK - BLK_HDR
+
+    def _write_block(self, count):
+        blk = self.block
+        ofs = 0
+        if self.f is None:
+            if not self._open_next():
+                # флеш недоступен — данные теряются, кольцо не растёт
+                self.tail = (self.tail + count) & self.mask
+                self.bytes_dropped += count
+                return
+        if self.seg_used == 0:
+            struct.pack_into(SEG_FMT, blk, 0, SEG_MAGIC, SEG_VERSION, 0,
+                             self.bitrate, self.seg_no, time.time() & 0xFFFFFFFF,
+                             time.ticks_ms(), self.freq, _rssi10(self.rssi))
+            for i in range(struct.calcsize(SEG_FMT), SEG_HDR):
+                blk[i] = 0
+            ofs = SEG_HDR
+
+        struct.pack_into(BLK_FMT, blk, ofs, BLK_MAGIC, count, self.freq,
+                         time.time() & 0xFFFFFFFF, time.ticks_ms(), _rssi10(self.rssi))
+        for i in range(ofs + struct.calcsize(BLK_FMT), ofs + BLK_HDR):
+            blk[i] = 0
+        p = ofs + BLK_HDR
+
+        t = self.tail
+        mask = self.mask
+        ring = self.ring
+        for i in range(count):
+            blk[p + i] = ring[t]
+            t = (t + 1) & mask
+        self.tail = t
+        # хвост неполного блока — нули, запись всё равно целым блоком
+        for i in range(p + count, BLOCK):
+            blk[i] = 0
+
+        try:
+            self.f.write(blk)
+            self.f.flush()
+        except OSError:
+            self.write_errors += 1
+            self._close()
+            return
+        self.blocks_written += 1
+        self.bytes_logged += count
+        self.seg_used += BLOCK
+        if self.seg_used >= self.seg_bytes:
+            self._close()
+
+    # ------------------------------------------------------
+    # Сегменты
+    # ------------------------------------------------------
+    def _segments(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        out = []
+        for nm in names:
+            if nm.startswith("raw") and nm.endswith(".bin"):
+                try:
+                    out.append(int(nm[3:-4]))
+                except ValueError:
+                    pass
+        out.sort()
+        return out
+
+    def _open_next(self):
+        segs = self._segments()
+        if self.seg_no < 0:
+            self.seg_no = segs[-1] if segs else -1
+        self.seg_no = (self.seg_no + 1) % 10000
+        # жёсткий предел: удаляем старые, оставляя место под новый
+        while len(segs) >= self.max_segs:
+            try:
+                os.remove(self.path + "/" + _seg_name(segs.pop(0)))
+            except OSError:
+                break
+        try:
+            self.f = open(self.path + "/" + _seg_name(self.seg_no), "wb")
+        except OSError:
+            self.write_errors += 1
+            self.f = None
+            return False
+        self.seg_used = 0
+        return True
+
+    def event(self, text):
+        """Строка в events.txt (редкие события, пишется сразу)."""
+        if not self.enabled:
+            return
+        name = self.path + "/events.txt"
+        try:
+            if os.stat(name)[6] > EVENTS_MAX:
+                try:
+                    os.remove(name + ".1")
+                except OSError:
+                    pass
+                os.rename(name, name + ".1")
+        except OSError:
+            pass
+        try:
+            with open(name, "a") as f:
+                f.write("%d %d %d %s\n" % (time.time(), time.ticks_ms(), self.freq, text))
+        except OSError:
+            self.write_errors += 1
+
+    def _close(self):
+        if self.f is not None:
+            try:
+                self.f.close()
+            except OSError:
+                pass
+            self.f = None
+        self.seg_used = 0
+
+
+# ------------------------------------------------------------
+# Чтение сегментов (хост: tools/replay_log.py)
+# ------------------------------------------------------------
+def read_segment(path):
+    """Генератор по блокам сегмента: (заголовок сегмента, заголовок блока, данные)."""
+    with open(path, "rb") as f:
+        raw = f.read(SEG_HDR)
+        if len(raw) < SEG_HDR:
+            return
+        magic, ver, _, bitrate, seg_no, t, ticks, freq, rssi = \
+            struct.unpack_from(SEG_FMT, raw, 0)
+        if magic != SEG_MAGIC or ver != SEG_VERSION:
+            raise ValueError("not a raw log segment: %s" % path)
+        seg = {"seg": seg_no, "bitrate": bitrate, "time": t, "ticks_ms": ticks,
+               "freq": freq, "rssi": None if rssi == -32768 else rssi / 10.0}
+        size = BLOCK - SEG_HDR
+        while True:
+            blk = f.read(size)
+            if len(blk) < BLK_HDR:
+                return
+            magic, n, freq, t, ticks, rssi = struct.unpack_from(BLK_FMT, blk, 0)
+            if magic != BLK_MAGIC:
+                return
+            hdr = {"freq": freq, "time": t, "ticks_ms": ticks,
+                   "rssi": None if rssi == -32768 else rssi / 10.0}
+            yield seg, hdr, blk[BLK_HDR:BLK_HDR + n]
+            size = BLOCK
+
+
+# ------------------------------------------------------------
+# Модульный интерфейс (совместимость со старыми вызовами)
+# ------------------------------------------------------------
+logger = None
+
+
+def init(**kw):
+    global logger
+    logger = RawLogger(**kw)
+    return logger
+
 
 def log_raw_bits(bits, meta=None):
-    """Принимает сырые биты и метаданные, но ничего не делает.
-    Это нужно, чтобы система не падала от отсутствия функции,
-    но при этом не расходовала память.
+    """Сырые байты GDO0 (bytes/memoryview) в кольцо логгера.
+
+    meta — (freq, rssi) для заголовков следующих блоков.
     """
-    return
+    lg = logger
+    if lg is None or not lg.enabled:
+        return
+    if meta is not None:
+        lg.note(meta[0], meta[1])
+    lg.write(bits)
+
 
 def log_event(text):
-    """Лог событий (минимальный)."""
-    # Можно включить print(text) для отладки
-    return
+    """Лог событий (events.txt рядом с сегментами, только при включённой записи)."""
+    lg = logger
+    if lg is not None:
+        lg.event(text)
@@ -0,0 +1,68 @@
+# rx_ring.py — кольцевой буфер байт ISR → главный цикл (single producer / single consumer)
+#
+# Пишет только обработчик таймера GDO0 (put), читает только главный цикл
+# (drain). head меняет только писатель, tail — только читатель, поэтому
+# блокировки не нужны. Память выделяется один раз в конструкторе.
+
+
+class ByteRing:
+    def __init__(self, size=2048):
+        if size < 2 or size & (size - 1):
+            raise ValueError("ring size must be a power of two")
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.mask = size - 1
+
+        self.head = 0        # следующая позиция записи (ISR)
+        self.tail = 0        # следующая позиция чтения (главный цикл)
+
+        # статистика
+        self.overruns = 0    # байты, потерянные из-за переполнения
+        self.max_fill = 0    # максимальная наблюдавшаяся заполненность
+
+    # ------------------------------------------------------
+    # Сторона ISR: без аллокаций, O(1)
+    # ------------------------------------------------------
+    def put(self, b):
+        h = self.head
+        nh = (h + 1) & self.mask
+        if nh == self.tail:
+            self.overruns += 1
+            return
+        self.buf[h] = b
+        self.head = nh
+
+    # ------------------------------------------------------
+    # Сторона главного цикла
+    # ------------------------------------------------------
+    def available(self):
+        return (self.head - self.tail) & self.mask
+
+    def drain(self, sink, max_bytes=0):
+        """Передать накопленные байты в sink(memoryview) пачками.
+
+        Данные отдаются без копирования: не больше двух непрерывных кусков
+        (до конца буфера и с начала). Возвращает число переданных байт.
+        """
+        h = self.head
+        t = self.tail
+        n = (h - t) & self.mask
+        if not n:
+            return 0
+        if n > self.max_fill:
+            self.max_fill = n
+        if max_bytes and n > max_bytes:
+            n = max_bytes
+
+        done = 0
+        size = self.mask + 1
+        while done < n:
+            chunk = n - done
+            if t + chunk > size:
+                chunk = size - t
+            sink(self.mv[t:t + chunk])
+            t = (t + chunk) & self.mask
+            # освобождаем место для ISR сразу после каждого куска
+            self.tail = t
+            done += chunk
+        return done
@@ -0,0 +1,182 @@
+# scheduler.py — несколько зондов на одном CC1101: окна приёма по расписанию
+#
+# M20 передаёт кадр раз в секунду. Для каждого зонда таблица хранит частоту
+# и фазу кадров — момент, когда ожидается разбор следующего кадра (due).
+# Незадолго до due приёмник перестраивается на зонд и слушает окно
+# [due - frame_ms - guard_ms, due + guard_ms]; окно закрывается раньше,
+# как только кадр разобран. Промежутки между окнами отдаются фоновому скану.
+#
+# Если окна двух зондов перекрываются, в этом периоде слушаем того, от кого
+# дольше не было кадра, второй пропускает период (skip). Зонд, не давший
+# кадра drop_misses окон подряд, снимается с таблицы.
+
+from hal import time
+
+
+class Sonde:
+    """Запись таблицы расписания."""
+    __slots__ = ("serial", "freq", "due", "first_ms", "last_ms",
+                 "frames", "windows", "misses", "skips", "run_miss", "hit")
+
+    def __init__(self, serial, freq, now):
+        self.serial = serial
+        self.freq = freq
+        self.due = now
+        self.first_ms = now
+        self.last_ms = now
+        self.frames = 0       # разобрано кадров
+        self.windows = 0      # открыто окон
+        self.misses = 0       # окон без кадра
+        self.skips = 0        # периодов без окна (перекрытие, занятый приёмник)
+        self.run_miss = 0     # окон без кадра подряд
+        self.hit = False      # кадр в текущем окне
+
+
+class Scheduler:
+    def __init__(self, max_sondes=4, period_ms=1000, frame_ms=65, guard_ms=60,
+                 drop_misses=10, near_hz=50000):
+        self.max = max_sondes
+        self.period = period_ms
+        self.frame = frame_ms
+        self.guard = guard_ms
+        self.drop_misses = drop_misses
+        self.near = near_hz
+
+        self.sondes = []
+        self.cur = None       # зонд, чьё окно сейчас открыто
+
+        # статистика
+        self.added = 0
+        self.dropped = 0
+        self.full = 0         # новых зондов, не поместившихся в таблицу
+
+    # ------------------------------------------------------
+    # Таблица
+    # ------------------------------------------------------
+    def find(self, serial):
+        for e in self.sondes:
+            if e.serial == serial:
+                return e
+        return None
+
+    def covers(self, freq):
+        """Частота уже занята зондом из таблицы (кандидат скана не нужен)."""
+        for e in self.sondes:
+            if abs(e.freq - freq) <= self.near:
+                return True
+        return False
+
+    def on_frame(self, serial, freq, now):
+        """Разобран кадр зонда serial, принятый на freq.
+
+        Возвращает запись зонда (новую — на первом кадре) или None, если
+        зонда нет в таблице и она заполнена.
+        """
+        e = self.find(serial)
+        if e is None:
+            if len(self.sondes) >= self.max:
+                self.full += 1
+                return None
+            e = Sonde(serial, freq, now)
+            self.sondes.append(e)
+            self.added += 1
+        e.freq = freq
+        e.frames += 1
+        e.last_ms = now
+        e.run_miss = 0
+        # фаза по последнему кадру: следующий — через период
+        e.due = time.ticks_add(now, self.period)
+        if e is self.cur:
+            e.hit = True
+        return e
+
+    # ------------------------------------------------------
+    # Расписание
+    # ------------------------------------------------------
+    def open_at(self, e):
+        return time.ticks_add(e.due, -(self.frame + self.guard))
+
+    def close_at(self, e):
+        return time.ticks_add(e.due, self.guard)
+
+    def _skip(self, e):
+        e.due = time.ticks_add(e.due, self.period)
+        e.skips += 1
+
+    def next(self, now):
+        """Зонд, чьё окно открывается раньше всех, или None (таблица пуста).
+
+        Окна, закрывшиеся без нас, и проигравшие при перекрытии сдвигаются
+        на период.
+        """
+        sondes = self.sondes
+        if not sondes:
+            return None
+        for e in sondes:
+            while time.ticks_diff(now, self.close_at(e)) > 0:
+                self._skip(e)
+        while True:
+            best = sondes[0]
+            for e in sondes:
+                if time.ticks_diff(self.open_at(e), self.open_at(best)) < 0:
+                    best = e
+            end = self.close_at(best)
+            rival = None
+            for e in sondes:
+                if e is not best and time.ticks_diff(self.open_at(e), end) < 0:
+                    rival = e
+                    break
+            if rival is None:
+                return best
+            # перекрытие: слушаем того, от кого дольше не было кадра
+            if time.ticks_diff(rival.last_ms, best.last_ms) < 0:
+                self._skip(best)
+            else:
+                self._skip(rival)
+
+    def gap(self, now):
+        """Сколько мс до ближайшего окна (None — окон нет)."""
+        e = self.next(now)
+        if e is None:
+            return None
+        return time.ticks_diff(self.open_at(e), now)
+
+    def begin(self, e):
+        self.cur = e
+        e.windows += 1
+        e.hit = False
+
+    def end(self):
+        """Закрыть текущее окно. Возвращает зонд, снятый с таблицы, или None."""
+        e = self.cur
+        self.cur = None
+        if e is None or e.hit:
+            return None
+        e.misses += 1
+        e.run_miss += 1
+        e.due = time.ticks_add(e.due, self.period)
+        if e.run_miss >= self.drop_misses:
+            self.sondes.remove(e)
+            self.dropped += 1
+            return e
+        return None
+
+    # ------------------------------------------------------
+    # Отчёт
+    # ------------------------------------------------------
+    def stats(self, now):
+        """Выход кадров по зондам: кадров / периодов с первого кадра."""
+        out = []
+        for e in self.sondes:
+            periods = time.ticks_diff(now, e.first_ms) // self.period + 1
+            out.append({
+                "serial": e.serial,
+                "freq": e.freq,
+                "frames": e.frames,
+                "windows": e.windows,
+                "misses": e.misses,
+                "skips": e.skips,
+                "yield": round(e.frames / periods, 3),
+                "age": time.ticks_diff(now, e.last_ms) / 1000.0,
+            })
+        return out
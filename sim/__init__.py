@@ -0,0 +1,35 @@
+# sim — симуляция железа трекера для запуска на CPython
+#
+#   clock   — виртуальные часы и очередь событий (таймеры, фронты)
+#   utime   — замена time с ticks_ms/ticks_us/sleep_ms на виртуальных часах
+#   machine — Pin / SPI / Timer поверх виртуальных часов
+#   esp32   — датчик температуры кристалла
+#   rf      — эфир: передатчики зондов и шум
+#   radio   — регистровая модель CC1101 на шине SPI
+#   m20_gen — синтетические кадры и потоки M20 с искажениями
+#
+# Типичный запуск: sim.setup(env) до создания Tracker, дальше
+# tracker.start() и tracker.step() до нужного виртуального времени.
+
+from sim.clock import clock
+from sim.rf import RfEnvironment
+
+
+def setup(env=None, spi_id=1, cs_pin=None, gdo0_pin=None):
+    """Сбросить часы и подключить симулятор CC1101 к шине SPI.
+
+    Возвращает объект SimCC1101 (регистры, эфир, статистика).
+    """
+    from sim import machine
+    from sim.radio import SimCC1101
+    from config import CC1101_CS, CC1101_GDO0
+
+    clock.reset()
+    machine.reset()
+    if env is None:
+        env = RfEnvironment()
+    radio = SimCC1101(env,
+                      cs_pin=CC1101_CS if cs_pin is None else cs_pin,
+                      gdo0_pin=CC1101_GDO0 if gdo0_pin is None else gdo0_pin)
+    machine.attach_spi_device(spi_id, radio)
+    return radio
@@ -0,0 +1,65 @@
+# sim/clock.py — виртуальные часы с очередью событий
+#
+# Время идёт только через sleep_*/advance_us: код трекера «спит», а часы
+# за это время прогоняют все события по порядку (тики таймера GDO0,
+# фронты сигнала). Поэтому симуляция идёт быстрее реального времени и
+# полностью воспроизводима.
+
+import heapq
+
+
+class _Event:
+    __slots__ = ("t", "fn", "period", "active")
+
+    def __init__(self, t, fn, period):
+        self.t = t
+        self.fn = fn
+        self.period = period
+        self.active = True
+
+    def cancel(self):
+        self.active = False
+
+
+class VirtualClock:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.now_us = 0
+        self._queue = []
+        self._seq = 0
+
+    def schedule(self, t_us, fn, period_us=0):
+        """Событие в момент t_us; period_us > 0 — периодическое.
+
+        Период может быть дробным: моменты срабатывания считаются в float
+        и округляются только при выдаче времени.
+        """
+        ev = _Event(t_us, fn, period_us)
+        self._push(ev)
+        return ev
+
+    def _push(self, ev):
+        self._seq += 1
+        heapq.heappush(self._queue, (ev.t, self._seq, ev))
+
+    def advance_us(self, dt_us):
+        target = self.now_us + dt_us
+        q = self._queue
+        while q and q[0][0] <= target:
+            t, _, ev = heapq.heappop(q)
+            if not ev.active:
+                continue
+            t_int = int(t)
+            if t_int > self.now_us:
+                self.now_us = t_int
+            if ev.period:
+                ev.t = t + ev.period
+                self._push(ev)
+            ev.fn()
+        if target > self.now_us:
+            self.now_us = target
+
+
+clock = VirtualClock()
@@ -0,0 +1,9 @@
+# sim/esp32.py — замена модуля esp32: датчик температуры кристалла
+#
+# Температуру задаёт SimCC1101.set_temperature (радио и MCU на одной плате).
+
+temp_c = 25.0
+
+
+def mcu_temperature():
+    return int(temp_c)
@@ -0,0 +1,240 @@
+# sim/m20_gen.py — синтетический сигнал M20 для бенчмарков и симулятора
+#
+#   M20Signal      — кадры с верным CHECKM10 и полями, проходящими parse_m20
+#   bit_stream()   — бесконечный (или n_frames) поток бит: шумовые паузы,
+#                    sync + кадр, искажения (BER, дрейф тактов, выпадения)
+#   pack_bytes()   — биты → байты GDO0 кусками, как их видит M20Decoder
+#   sample_stream()/edge_stream() — уровни GDO0 для ClockRecovery / EdgeBitSlicer
+#
+# Всё — генераторы: часы сигнала не держатся в памяти целиком.
+
+import random
+import struct
+
+from config import M20_SYNC_BYTES
+from m20_decoder import update_checkM10
+
+BITRATE = 9600
+
+
+class M20Signal:
+    """Зонд с простой моделью полёта: подъём до разрыва, спуск, посадка.
+
+    Высота в кадре — int16 (м), поэтому burst_alt не выше 32767; после
+    посадки зонд лежит на alt0 и продолжает передавать (TOW растёт), так
+    что поток кадров любой длины остаётся в формате.
+    """
+
+    def __init__(self, serial=0x1234, frame_len=70, week=2300, tow0=100000,
+                 lat0=1.25, lon0=2.5, alt0=300, climb=5.0, drift_e=4.0,
+                 drift_n=-2.5, burst_alt=30000, descent=8.0, seed=1):
+        if frame_len < 0x41 or frame_len > 256:
+            raise ValueError("frame_len out of range")
+        if not alt0 < burst_alt <= 32767:
+            raise ValueError("burst_alt out of range")
+        if climb <= 0 or descent <= 0:
+            raise ValueError("climb and descent must be positive")
+        self.serial = serial
+        self.frame_len = frame_len
+        self.week = week
+        self.tow0 = tow0
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.alt0 = alt0
+        self.climb = climb
+        self.drift_e = drift_e
+        self.drift_n = drift_n
+        self.burst_alt = burst_alt
+        self.descent = descent
+        self.seed = seed
+        # моменты разрыва и посадки, с (кадр в секунду)
+        self.t_burst = (burst_alt - alt0) / climb
+        self.t_land = self.t_burst + (burst_alt - alt0) / descent
+
+    def fields(self, k):
+        """Значения полей кадра k (как их вернёт parse_m20)."""
+        t = float(k)
+        landed = t >= self.t_land
+        if landed:
+            # лежит на земле: координаты точки посадки
+            t = self.t_land
+            alt = self.alt0
+            velU = 0.0
+        elif t >= self.t_burst:
+            alt = self.burst_alt - self.descent * (t - self.t_burst)
+            velU = -self.descent
+        else:
+            alt = self.alt0 + self.climb * t
+            velU = self.climb
+        # 1 градус ≈ 111 км; формат кадра — int16 × 1e-4 градуса
+        lat = self.lat0 + self.drift_n * t / 111000.0
+        lon = self.lon0 + self.drift_e * t / 111000.0
+        return {
+            "tow": (self.tow0 + k) & 0xFFFF,
+            "week": self.week,
+            "lat": lat,
+            "lon": lon,
+            "alt": int(alt),
+            "velE": 0.0 if landed else self.drift_e,
+            "velN": 0.0 if landed else self.drift_n,
+            "velU": velU,
+            "serial": self.serial,
+            "batt_raw": 160,
+        }
+
+    def frame(self, k):
+        """Кадр k: L, поля, псевдослучайный хвост, CHECKM10 последним байтом."""
+        f = self.fields(k)
+        body = bytearray(self.frame_len - 1)
+        body[0] = self.frame_len - 1          # L, всего L + 1 байт
+        struct.pack_into(">HBH", body, 1, f["tow"], 0, f["week"])
+        struct.pack_into(">hhhhhhH", body, 6,
+                         int(round(f["lat"] * 1e4)), int(round(f["lon"] * 1e4)),
+                         f["alt"], int(f["velE"] * 100), int(f["velN"] * 100),
+                         int(f["velU"] * 100), f["serial"])
+        body[20] = f["batt_raw"]
+        # остальные поля (PTU и т.п.) — детерминированный шум, без длинных серий нулей
+        rnd = random.Random((self.seed << 20) ^ k)
+        for i in range(21, len(body)):
+            body[i] = rnd.getrandbits(8)
+        cs = 0
+        for b in body:
+            cs = update_checkM10(cs, b)
+        return bytes(body) + bytes([cs])
+
+    def burst(self, k):
+        """То, что уходит в эфир: sync + кадр."""
+        return M20_SYNC_BYTES + self.frame(k)
+
+
+def _bits_of(data):
+    for b in data:
+        for k in range(7, -1, -1):
+            yield (b >> k) & 1
+
+
+def bit_stream(signal, n_frames=None, gap_bits=(200, 2000), ber=0.0,
+               drift_ppm=0.0, dropout_rate=0.0, dropout_bits=(50, 400),
+               noise_frames=0.0, seed=1, on_frame=None):
+    """Поток бит: [шумовая пауза, sync + кадр] × n_frames с искажениями.
+
+    gap_bits      — длина шумовой паузы перед кадром (случайная, поэтому
+                    кадры приходят с произвольным битовым смещением)
+    ber           — вероятность инверсии каждого бита
+    drift_ppm     — уход тактов: вставка (+) / потеря (−) бита раз в 1e6/ppm бит
+    dropout_rate  — вероятность выпадения на кадр (кусок кадра заменён шумом)
+    noise_frames  — доля «пустых» слотов: только шум вместо кадра
+    on_frame(k, burst_bytes) — вызывается перед выдачей каждого кадра
+    """
+    rnd = random.Random(seed)
+    getbit = rnd.getrandbits
+    flip = ber > 0
+    rand = rnd.random
+    slip_every = int(1e6 / abs(drift_ppm)) if drift_ppm else 0
+    since_slip = 0
+    prev = 0
+    k = 0
+    while n_frames is None or k < n_frames:
+        gap = rnd.randint(gap_bits[0], gap_bits[1])
+        for _ in range(gap):
+            yield getbit(1)
+
+        if noise_frames and rand() < noise_frames:
+            burst = None
+            n = len(M20_SYNC_BYTES) * 8 + signal.frame_len * 8
+            src = (getbit(1) for _ in range(n))
+        else:
+            burst = signal.burst(k)
+            if on_frame is not None:
+                on_frame(k, burst)
+            src = _bits_of(burst)
+        k += 1
+
+        drop_at = drop_len = -1
+        if burst is not None and dropout_rate and rand() < dropout_rate:
+            drop_at = rnd.randrange(len(burst) * 8)
+            drop_len = rnd.randint(dropout_bits[0], dropout_bits[1])
+
+        i = 0
+        for bit in src:
+            if drop_len > 0 and i >= drop_at:
+                bit = getbit(1)
+                drop_len -= 1
+            elif flip and rand() < ber:
+                bit ^= 1
+            i += 1
+
+            if slip_every:
+                since_slip += 1
+                if since_slip >= slip_every:
+                    since_slip = 0
+                    if drift_ppm > 0:
+                        # приёмник «быстрее» — бит прочитан дважды
+                        yield prev
+                    else:
+                        # приёмник «медленнее» — бит потерян
+                        prev = bit
+                        continue
+            prev = bit
+            yield bit
+
+
+def pack_bytes(bits, chunk=4096):
+    """Биты (MSB first) → куски bytes по chunk байт."""
+    buf = bytearray(chunk)
+    n = 0
+    acc = 0
+    cnt = 0
+    for bit in bits:
+        acc = (acc << 1) | bit
+        cnt += 1
+        if cnt == 8:
+            buf[n] = acc
+            n += 1
+            acc = 0
+            cnt = 0
+            if n == chunk:
+                yield bytes(buf)
+                n = 0
+    if n:
+        yield bytes(buf[:n])
+
+
+def sample_stream(bits, os_factor=4, bitrate=BITRATE, drift_ppm=0.0,
+                  jitter=0.0, period_us=None, seed=1):
+    """Уровни GDO0, снятые таймером с периодом period_us (по умолчанию —
+    целым, как на ESP32), при скорости передатчика bitrate·(1+ppm) и
+    гауссовом джиттере фронтов (доля бита)."""
+    rnd = random.Random(seed)
+    if period_us is None:
+        period_us = int(1_000_000 / (bitrate * os_factor))
+    bit_us = 1e6 / (bitrate * (1 + drift_ppm * 1e-6))
+    t = period_us * 0.37
+    edge = 0.0
+    cur = None
+    for i, bit in enumerate(bits):
+        nxt = (i + 1) * bit_us
+        if jitter:
+            nxt += rnd.gauss(0, jitter * bit_us)
+        if cur is None:
+            cur = bit
+        while t < nxt:
+            # до фронта — старый уровень
+            yield bit if t >= edge else cur
+            t += period_us
+        cur = bit
+        edge = nxt
+
+
+def edge_stream(bits, bitrate=BITRATE, drift_ppm=0.0, jitter=0.0, t0_us=1000, seed=1):
+    """Фронты (t_us, уровень после фронта) для EdgeBitSlicer."""
+    rnd = random.Random(seed)
+    bit_us = 1e6 / (bitrate * (1 + drift_ppm * 1e-6))
+    prev = None
+    for i, bit in enumerate(bits):
+        if bit != prev:
+            t = t0_us + i * bit_us
+            if jitter and prev is not None:
+                t += rnd.gauss(0, jitter * bit_us)
+            yield int(t), bit
+            prev = bit
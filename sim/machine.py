@@ -0,0 +1,162 @@
+# sim/machine.py — Pin / SPI / Timer поверх виртуальных часов
+#
+# Линии GPIO общие для всех объектов Pin с одним номером. Выход
+# устройства (GDO0 симулятора CC1101) подключается к линии как driver;
+# CS-линия сообщает устройству SPI о начале и конце транзакции.
+
+from sim.clock import clock
+
+
+class _Line:
+    def __init__(self, num):
+        self.num = num
+        self.level = 0
+        self.driver = None          # fn() -> 0/1, если линией управляет устройство
+        self.irq_handler = None
+        self.irq_trigger = 0
+        self.listeners = []         # fn(line) на изменение выхода / irq
+
+    def read(self):
+        if self.driver is not None:
+            return self.driver()
+        return self.level
+
+    def write(self, v):
+        v = 1 if v else 0
+        if v == self.level:
+            return
+        self.level = v
+        for fn in self.listeners:
+            fn(self)
+
+    def edge(self, new_level, pin):
+        """Фронт, сгенерированный устройством: вызвать irq, если подходит."""
+        h = self.irq_handler
+        if h is None:
+            return
+        trig = Pin.IRQ_RISING if new_level else Pin.IRQ_FALLING
+        if self.irq_trigger & trig:
+            h(pin)
+
+
+_lines = {}
+_spi_devices = {}
+
+
+def reset():
+    _lines.clear()
+    _spi_devices.clear()
+
+
+def line(num):
+    ln = _lines.get(num)
+    if ln is None:
+        ln = _lines[num] = _Line(num)
+    return ln
+
+
+def attach_spi_device(spi_id, dev):
+    _spi_devices.setdefault(spi_id, []).append(dev)
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, num, mode=-1, pull=-1, value=None):
+        self.num = num
+        self.mode = mode
+        self._line = line(num)
+        if value is not None:
+            self._line.write(value)
+
+    def value(self, v=None):
+        if v is None:
+            return self._line.read()
+        self._line.write(v)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self._line.write(1)
+
+    def off(self):
+        self._line.write(0)
+
+    def irq(self, handler=None, trigger=IRQ_RISING | IRQ_FALLING, hard=False):
+        ln = self._line
+        ln.irq_handler = handler
+        ln.irq_trigger = trigger
+        for fn in ln.listeners:
+            fn(ln)
+
+
+class SPI:
+    def __init__(self, spi_id, baudrate=1_000_000, polarity=0, phase=0,
+                 bits=8, firstbit=0, sck=None, mosi=None, miso=None):
+        self.id = spi_id
+        self.baudrate = baudrate
+
+    def _selected(self):
+        for dev in _spi_devices.get(self.id, ()):
+            if dev.selected():
+                return dev
+        return None
+
+    def write(self, buf):
+        dev = self._selected()
+        for b in buf:
+            if dev is not None:
+                dev.xfer(b)
+
+    def readinto(self, buf, write=0):
+        dev = self._selected()
+        for i in range(len(buf)):
+            buf[i] = dev.xfer(write) if dev is not None else 0xFF
+
+    def read(self, nbytes, write=0):
+        buf = bytearray(nbytes)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def write_readinto(self, wbuf, rbuf):
+        dev = self._selected()
+        for i in range(len(wbuf)):
+            rbuf[i] = dev.xfer(wbuf[i]) if dev is not None else 0xFF
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id=-1):
+        self.id = timer_id
+        self._ev = None
+
+    def init(self, mode=PERIODIC, period=-1, freq=None, callback=None):
+        """Как в MicroPython: period — в миллисекундах, freq — в Гц."""
+        self.deinit()
+        if freq is not None:
+            period_us = 1_000_000 / freq
+        else:
+            period_us = period * 1000
+        cb = callback
+
+        def fire():
+            if mode != Timer.PERIODIC:
+                self._ev = None
+            cb(self)
+
+        self._ev = clock.schedule(clock.now_us + period_us, fire,
+                                  period_us if mode == Timer.PERIODIC else 0)
+
+    def deinit(self):
+        if self._ev is not None:
+            self._ev.cancel()
+            self._ev = None
@@ -0,0 +1,269 @@
+# sim/radio.py — регистровая модель CC1101 на симулированной шине SPI
+#
+# Учитывается то, чем пользуется трекер: FREQ2/1/0 (частота), MDMCFG4/3
+# (полоса и скорость), IOCFG0=0x0D (асинхронные данные на GDO0), строб-
+# команды SRES/SIDLE/SRX/SCAL, статусные RSSI/FREQEST/MARCSTATE и
+# калибровка синтезатора FSCAL3/2/1 (значения зависят от частоты и
+# температуры, с чужими значениями синтезатор «не захвачен»).
+
+from sim import esp32, machine
+from sim.clock import clock
+from sim.rf import hash01
+from cc1101 import (
+    IOCFG0, FREQ2, FREQ1, FREQ0, MDMCFG4, MDMCFG3,
+    MCSM0, FSCAL3, FSCAL2, FSCAL1, RSSI, MARCSTATE, FREQEST,
+    SRES, SCAL, SRX, STX, SIDLE, SFRX, SFTX, SXOFF, SFSTXON,
+    READ_SINGLE, WRITE_BURST, F_XOSC, REG_RESET,
+)
+
+# статусные регистры (доступ с READ_BURST)
+PARTNUM = 0x30
+VERSION = 0x31
+LQI = 0x33
+PKTSTATUS = 0x38
+
+# MARCSTATE
+ST_IDLE = 0x01
+ST_RX = 0x0D
+ST_TX = 0x13
+
+
+def fscal_for(freq_hz, temp_c):
+    """Результат калибровки синтезатора (FSCAL3, FSCAL2, FSCAL1) для модели."""
+    band = int(freq_hz // 400_000)
+    drift = int((temp_c + 40) // 25)
+    return 0xE9, 0x2A, (band + drift) & 0x3F
+
+
+class SimCC1101:
+    def __init__(self, env, cs_pin, gdo0_pin):
+        self.env = env
+        self.regs = bytearray(0x2F)
+        self.temp_c = 25.0
+        esp32.temp_c = self.temp_c
+
+        self.cs = machine.line(cs_pin)
+        self.cs.listeners.append(self._on_cs)
+        self.gdo0 = machine.line(gdo0_pin)
+        self.gdo0.driver = self._gdo0_level
+        self.gdo0.listeners.append(self._on_gdo0_cfg)
+        self._gdo0_pin = None
+        self._edge_ev = None
+        self._gdo0_last = 0
+        self._force = None        # уровень GDO0 на время обработчика фронта
+
+        self._hdr = None
+        self._addr = 0
+
+        # статистика для бенчмарков
+        self.spi_bytes = 0
+        self.transactions = 0
+        self.strobes = {}
+        self.calibrations = 0
+        self.freq_writes = 0
+
+        self._reset_regs()
+
+    # ---------------- сброс / состояние ----------------
+    def _reset_regs(self):
+        # значения после SRES (datasheet, таблица 43)
+        self.regs[:] = REG_RESET
+        self.state = ST_IDLE
+        self._retune()
+
+    def _retune(self):
+        r = self.regs
+        f = (r[FREQ2] << 16) | (r[FREQ1] << 8) | r[FREQ0]
+        self.freq = f * F_XOSC / 65536.0
+        e = r[MDMCFG4] >> 6
+        m = (r[MDMCFG4] >> 4) & 3
+        self.bw = F_XOSC / (8.0 * (4 + m) * (1 << e))
+        de = r[MDMCFG4] & 0x0F
+        self.drate = (256 + r[MDMCFG3]) * (1 << de) * F_XOSC / (1 << 28)
+        self._update_lock()
+
+    def _update_lock(self):
+        r = self.regs
+        self.locked = (r[FSCAL3], r[FSCAL2], r[FSCAL1] & 0x3F) == \
+            fscal_for(self.freq, self.temp_c)
+
+    def set_temperature(self, temp_c):
+        """Смена температуры: старая калибровка может перестать подходить."""
+        self.temp_c = temp_c
+        esp32.temp_c = temp_c
+        self._update_lock()
+
+    def _calibrate(self):
+        self.calibrations += 1
+        f3, f2, f1 = fscal_for(self.freq, self.temp_c)
+        self.regs[FSCAL3] = f3
+        self.regs[FSCAL2] = f2
+        self.regs[FSCAL1] = f1
+        self._update_lock()
+
+    # ---------------- SPI ----------------
+    def selected(self):
+        return self.cs.level == 0
+
+    def _on_cs(self, line):
+        if line.level == 0:
+            self.transactions += 1
+        self._hdr = None
+
+    def _status_byte(self):
+        st = 1 if self.state == ST_RX else (2 if self.state == ST_TX else 0)
+        return st << 4
+
+    def xfer(self, b):
+        self.spi_bytes += 1
+        if self._hdr is None:
+            addr = b & 0x3F
+            read = b & READ_SINGLE
+            burst = b & WRITE_BURST
+            if addr >= 0x30 and not (read and burst):
+                self._strobe(addr)
+                return self._status_byte()
+            self._hdr = b
+            self._addr = addr
+            return self._status_byte()
+
+        hdr = self._hdr
+        addr = self._addr
+        if hdr & READ_SINGLE:
+            v = self._read(addr, bool(hdr & WRITE_BURST))
+        else:
+            self._write(addr, b)
+            v = self._status_byte()
+
+        if hdr & WRITE_BURST and addr < 0x30:
+            self._addr = addr + 1
+        else:
+            # одиночный доступ: следующий байт — снова заголовок
+            self._hdr = None
+        return v
+
+    def _write(self, addr, v):
+        if addr >= len(self.regs):
+            return
+        self.regs[addr] = v
+        if addr in (FREQ2, FREQ1, FREQ0):
+            self.freq_writes += 1
+            self._retune()
+        elif addr in (MDMCFG4, MDMCFG3):
+            self._retune()
+        elif addr in (FSCAL3, FSCAL2, FSCAL1):
+            self._update_lock()
+        elif addr == IOCFG0:
+            self._on_gdo0_cfg(self.gdo0)
+
+    def _read(self, addr, status):
+        if status and addr >= 0x30:
+            return self._read_status(addr)
+        if addr < len(self.regs):
+            return self.regs[addr]
+        return 0
+
+    def _read_status(self, addr):
+        t = clock.now_us
+        if addr == PARTNUM:
+            return 0x00
+        if addr == VERSION:
+            return 0x14
+        if addr == MARCSTATE:
+            return self.state
+        if addr == RSSI:
+            dbm = self.env.noise_floor - 20
+            if self.state == ST_RX:
+                dbm = self.env.rssi_dbm(self.freq, self.bw, t) if self.locked \
+                    else self.env.noise_dbm(self.bw)
+            raw = int(round((dbm + 74.0) * 2))
+            raw = max(-128, min(127, raw))
+            return raw & 0xFF
+        if addr == FREQEST:
+            tx, off = self.env.dominant(self.freq, self.bw, t)
+            if tx is None or not self.locked or self.state != ST_RX:
+                fe = int((hash01(t // 1000, 3) - 0.5) * 4)
+            else:
+                fe = int(round(off / (F_XOSC / (1 << 14))))
+                fe = max(-128, min(127, fe))
+            return fe & 0xFF
+        if addr == LQI:
+            return 0x80
+        if addr == PKTSTATUS:
+            return self._gdo0_level() & 1
+        return 0
+
+    def _strobe(self, cmd):
+        self.strobes[cmd] = self.strobes.get(cmd, 0) + 1
+        if cmd == SRES:
+            self._reset_regs()
+        elif cmd == SIDLE or cmd == SXOFF:
+            self.state = ST_IDLE
+        elif cmd == SCAL:
+            # SCAL действует только из IDLE, после калибровки — снова IDLE
+            if self.state == ST_IDLE:
+                self._calibrate()
+        elif cmd == SRX:
+            # FS_AUTOCAL=01: калибровка при переходе IDLE → RX
+            if self.state == ST_IDLE and (self.regs[MCSM0] >> 4) & 3 == 1:
+                self._calibrate()
+            self.state = ST_RX
+        elif cmd == STX or cmd == SFSTXON:
+            self.state = ST_TX
+        elif cmd in (SFRX, SFTX):
+            pass
+
+    # ---------------- GDO0 ----------------
+    def _gdo0_level(self, t=None):
+        if self._force is not None:
+            return self._force
+        if self.regs[IOCFG0] & 0x3F != 0x0D or self.state != ST_RX:
+            return 0
+        if t is None:
+            t = clock.now_us
+        env = self.env
+        tx, off = env.dominant(self.freq, self.bw, t) if self.locked else (None, 0)
+        if tx is None:
+            return env.noise_bit(t)[1]
+        idx, bit = tx.bit_at(t)
+        if hash01(idx, env.seed + 11) < env.ber(tx, off, self.bw):
+            bit ^= 1
+        return bit
+
+    def _on_gdo0_cfg(self, line):
+        """Включено/выключено прерывание по фронтам GDO0 — планируем фронты."""
+        want = line.irq_handler is not None
+        if want and self._edge_ev is None:
+            self._gdo0_pin = machine.Pin(line.num)
+            self._gdo0_last = self._gdo0_level()
+            self._schedule_edge(clock.now_us)
+        elif not want and self._edge_ev is not None:
+            self._edge_ev.cancel()
+            self._edge_ev = None
+
+    def _next_boundary(self, t):
+        tx, _ = self.env.dominant(self.freq, self.bw, t) if self.locked else (None, 0)
+        if tx is not None:
+            return tx.next_boundary(t)
+        n = self.env.noise_bit(t)[0] + 1
+        return n * 1_000_000 / 9600.0
+
+    def _schedule_edge(self, after):
+        t_next = self._next_boundary(after + 0.01)
+        self._edge_ev = clock.schedule(t_next, lambda: self._edge(t_next))
+
+    def _edge(self, t):
+        lv = self._gdo0_level(t + 0.5)
+        if lv != self._gdo0_last:
+            self._gdo0_last = lv
+            # часы целые (мкс), фронт — дробный: обработчик должен
+            # прочитать уже новый уровень
+            self._force = lv
+            try:
+                self.gdo0.edge(lv, self._gdo0_pin)
+            finally:
+                self._force = None
+        if self.gdo0.irq_handler is not None:
+            self._schedule_edge(t)
+        else:
+            self._edge_ev = None
@@ -0,0 +1,148 @@
+# sim/rf.py — эфир для симулятора: передатчики зондов и шум приёмника
+#
+# Все «случайные» величины — детерминированный хеш от номера бита/момента,
+# поэтому прогон полностью воспроизводим и несколько отсчётов одного бита
+# видят одно и то же значение.
+
+import math
+
+BITRATE = 9600
+
+
+def hash01(n, seed=0):
+    """Детерминированное псевдослучайное число [0, 1) от целого n."""
+    x = (n * 0x9E3779B1 + seed * 0x85EBCA77 + 0x165667B1) & 0xFFFFFFFF
+    x ^= x >> 16
+    x = (x * 0x85EBCA6B) & 0xFFFFFFFF
+    x ^= x >> 13
+    x = (x * 0xC2B2AE35) & 0xFFFFFFFF
+    x ^= x >> 16
+    return x / 4294967296.0
+
+
+class Transmitter:
+    """Зонд в эфире: несущая и пачка бит раз в period_ms.
+
+    bursts — bytes (повторяется каждую пачку) или fn(k) -> bytes для пачки k
+    (sync + кадр). Между пачками передаётся чередование 0101, несущая есть
+    всегда, пока передатчик активен (start_ms..stop_ms).
+    """
+
+    def __init__(self, freq_hz, power_dbm, bursts, period_ms=1000, phase_ms=0,
+                 bitrate=BITRATE, drift_ppm=0, start_ms=0, stop_ms=None):
+        self.freq = freq_hz
+        self.power = power_dbm
+        self.bursts = bursts
+        self.period_us = period_ms * 1000.0
+        self.phase_us = phase_ms * 1000.0
+        self.bit_us = 1e6 / (bitrate * (1 + drift_ppm * 1e-6))
+        self.bits_per_period = int(self.period_us / self.bit_us)
+        self.start_us = start_ms * 1000.0
+        self.stop_us = None if stop_ms is None else stop_ms * 1000.0
+
+        self._k = None
+        self._burst = b""
+
+    def active(self, t_us):
+        if t_us < self.start_us:
+            return False
+        return self.stop_us is None or t_us < self.stop_us
+
+    def burst(self, k):
+        if self._k != k:
+            self._k = k
+            b = self.bursts
+            self._burst = b(k) if callable(b) else b
+        return self._burst
+
+    def bursts_in(self, t0_us, t1_us):
+        """Сколько пачек началось в [t0, t1) за время активности."""
+        lo = max(t0_us, self.start_us)
+        hi = t1_us if self.stop_us is None else min(t1_us, self.stop_us)
+        if hi <= lo:
+            return 0
+        p = self.period_us
+        return int(math.ceil((hi - self.phase_us) / p) - math.ceil((lo - self.phase_us) / p))
+
+    def bit_at(self, t_us):
+        """(глобальный номер бита, бит) в момент t_us."""
+        rel = t_us - self.phase_us
+        k = int(rel // self.period_us)
+        p = rel - k * self.period_us
+        j = int(p / self.bit_us)
+        if j >= self.bits_per_period:
+            j = self.bits_per_period - 1
+        idx = k * self.bits_per_period + j
+        data = self.burst(k)
+        if j < len(data) * 8:
+            return idx, (data[j >> 3] >> (7 - (j & 7))) & 1
+        return idx, j & 1
+
+    def next_boundary(self, t_us):
+        rel = t_us - self.phase_us
+        k = rel // self.period_us
+        p = rel - k * self.period_us
+        j = int(p / self.bit_us) + 1
+        if j >= self.bits_per_period:
+            return self.phase_us + (k + 1) * self.period_us
+        return self.phase_us + k * self.period_us + j * self.bit_us
+
+
+class RfEnvironment:
+    """Набор передатчиков + шум приёмника."""
+
+    def __init__(self, transmitters=(), noise_floor_dbm=-118.0, seed=1):
+        self.txs = list(transmitters)
+        self.noise_floor = noise_floor_dbm
+        self.seed = seed
+
+    def add(self, tx):
+        self.txs.append(tx)
+        return tx
+
+    # ---------- что видит приёмник на частоте f с полосой bw ----------
+    def noise_dbm(self, bw_hz):
+        return self.noise_floor + 10.0 * math.log10(bw_hz / 100e3)
+
+    def dominant(self, f_rx, bw_hz, t_us):
+        """Самый сильный активный передатчик в полосе: (tx, offset) или (None, 0)."""
+        best = None
+        best_p = -1e9
+        off_best = 0
+        half = bw_hz / 2
+        for tx in self.txs:
+            off = tx.freq - f_rx
+            if abs(off) > half or not tx.active(t_us):
+                continue
+            if tx.power > best_p:
+                best = tx
+                best_p = tx.power
+                off_best = off
+        return best, off_best
+
+    def rssi_dbm(self, f_rx, bw_hz, t_us):
+        p = 10 ** (self.noise_dbm(bw_hz) / 10)
+        half = bw_hz / 2
+        for tx in self.txs:
+            off = abs(tx.freq - f_rx)
+            if not tx.active(t_us):
+                continue
+            if off <= half:
+                p += 10 ** (tx.power / 10)
+            elif off <= bw_hz:
+                # скат фильтра: -30 dB на краю соседней полосы
+                p += 10 ** ((tx.power - 30 * (off - half) / half) / 10)
+        # флуктуация показаний ±1.5 dB, шаг — 1 мс
+        jit = (hash01(int(t_us) // 1000, self.seed + 7) - 0.5) * 3.0
+        return 10 * math.log10(p) + jit
+
+    def ber(self, tx, offset, bw_hz):
+        """Оценка BER некогерентного 2-FSK по SNR с потерей на расстройке."""
+        snr = tx.power - self.noise_dbm(bw_hz)
+        snr -= 20.0 * (2.0 * abs(offset) / bw_hz) ** 2
+        lin = 10 ** (snr / 10)
+        return 0.5 * math.exp(-lin / 2)
+
+    def noise_bit(self, t_us, bitrate=BITRATE):
+        n = int(t_us * bitrate // 1_000_000)
+        return n, 1 if hash01(n, self.seed) < 0.5 else 0
@@ -0,0 +1,39 @@
+# sim/utime.py — подмножество MicroPython time на виртуальных часах
+
+from sim.clock import clock
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD >> 1
+
+
+def ticks_ms():
+    return (clock.now_us // 1000) & TICKS_MAX
+
+
+def ticks_us():
+    return clock.now_us & TICKS_MAX
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+
+def ticks_diff(t1, t2):
+    return ((t1 - t2 + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+
+def sleep_us(us):
+    clock.advance_us(int(us))
+
+
+def sleep_ms(ms):
+    clock.advance_us(int(ms * 1000))
+
+
+def sleep(s):
+    clock.advance_us(int(s * 1_000_000))
+
+
+def time():
+    return clock.now_us // 1_000_000
@@ -0,0 +1,147 @@
+# sonde_registry.py — зонды по серийному номеру: последние данные каждого
+#
+# TrackStore держит только последний кадр — кадр другого зонда с соседнего
+# канала его перезаписывает. Реестр хранит запись на каждый serial.
+# Ёмкость фиксирована (память ESP32): при переполнении вытесняется зонд,
+# от которого дольше всех не было кадров (LRU). Порядок LRU — двусвязный
+# кольцевой список прямо в записях (prev/next), поиск — dict по serial,
+# так что обновление на кадр — O(1), а вытесненная запись переиспользуется.
+
+from hal import time
+
+
+class SondeRecord:
+    """Запись реестра: последний фикс, частота, сигнал, счётчики."""
+    __slots__ = ("serial", "week", "tow", "lat", "lon", "alt",
+                 "velE", "velN", "velU", "batt_v",
+                 "freq", "rssi", "snr", "frames", "first_ms", "last_ms",
+                 "prev", "next")
+
+    def __init__(self, serial=None, now=0):
+        self.prev = self
+        self.next = self
+        self.reset(serial, now)
+
+    def reset(self, serial, now):
+        self.serial = serial
+        self.week = None
+        self.tow = None
+        self.lat = None
+        self.lon = None
+        self.alt = None
+        self.velE = None
+        self.velN = None
+        self.velU = None
+        self.batt_v = None
+        self.freq = 0
+        self.rssi = None
+        self.snr = None
+        self.frames = 0
+        self.first_ms = now
+        self.last_ms = now
+
+    def to_dict(self, now):
+        return {
+            "serial": self.serial,
+            "week": self.week,
+            "tow": self.tow,
+            "lat": self.lat,
+            "lon": self.lon,
+            "alt": self.alt,
+            "velE": self.velE,
+            "velN": self.velN,
+            "velU": self.velU,
+            "batt_v": self.batt_v,
+            "freq": self.freq,
+            "rssi": self.rssi,
+            "snr": self.snr,
+            "frames": self.frames,
+            "first_age": time.ticks_diff(now, self.first_ms) / 1000.0,
+            "last_age": time.ticks_diff(now, self.last_ms) / 1000.0,
+        }
+
+
+class SondeRegistry:
+    def __init__(self, capacity=16):
+        self.cap = capacity
+        self.map = {}
+        # фиктивная голова кольца: head.next — самый свежий, head.prev — самый старый
+        self.head = SondeRecord()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.map)
+
+    def get(self, serial):
+        return self.map.get(serial)
+
+    # ------------------------------------------------------
+    # Список LRU
+    # ------------------------------------------------------
+    @staticmethod
+    def _unlink(e):
+        e.prev.next = e.next
+        e.next.prev = e.prev
+
+    def _push_front(self, e):
+        h = self.head
+        e.prev = h
+        e.next = h.next
+        h.next.prev = e
+        h.next = e
+
+    # ------------------------------------------------------
+    # Обновление по кадру
+    # ------------------------------------------------------
+    def update(self, frame, freq, rssi=None, snr=None, now=None):
+        """Занести валидный кадр M20Frame, принятый на freq. Возвращает запись."""
+        if now is None:
+            now = time.ticks_ms()
+        serial = frame.serial
+        e = self.map.get(serial)
+        if e is None:
+            if len(self.map) >= self.cap:
+                # вытесняем самый старый, запись переиспользуем
+                e = self.head.prev
+                self._unlink(e)
+                del self.map[e.serial]
+                self.evicted += 1
+                e.reset(serial, now)
+            else:
+                e = SondeRecord(serial, now)
+            self.map[serial] = e
+        else:
+            self._unlink(e)
+        self._push_front(e)
+
+        e.week = frame.week
+        e.tow = frame.tow
+        e.lat = frame.lat
+        e.lon = frame.lon
+        e.alt = frame.alt
+        e.velE = frame.velE
+        e.velN = frame.velN
+        e.velU = frame.velU
+        e.batt_v = frame.batt_v
+        e.freq = freq
+        e.rssi = rssi
+        e.snr = snr
+        e.frames += 1
+        e.last_ms = now
+        return e
+
+    # ------------------------------------------------------
+    # Выдача
+    # ------------------------------------------------------
+    def records(self):
+        """Записи от самой свежей к самой старой."""
+        h = self.head
+        e = h.next
+        while e is not h:
+            yield e
+            e = e.next
+
+    def to_list(self, now=None):
+        if now is None:
+            now = time.ticks_ms()
+        return [e.to_dict(now) for e in self.records()]
@@ -0,0 +1,130 @@
+# spectrum_scan.py — двухфазный скан: быстрый проход RSSI + остановки на пиках
+#
+# Фаза 1: проход по всем каналам с минимальной паузой, по одному отсчёту
+#         RSSI на канал в массив rssi[].
+# Фаза 2: остановка (dwell) только на кандидатах — пиках выше оценки шума
+#         своего канала на margin_db. Пик — самый сильный канал и соседние
+#         выше порога (зонд в полосе 100 кГц виден на 2-3 шагах по 50 кГц),
+#         частота пика — центр тяжести этих каналов по мощности.
+#
+# Шум оценивается по каждому каналу отдельно: медленное среднее по
+# проходам, в которое не попадают отсчёты выше порога. Канал, где остановка
+# sync не нашла (постоянная помеха), поднимает свою оценку шума и перестаёт
+# быть кандидатом.
+
+from array import array
+
+# на сколько dB пик должен быть выше шума канала
+SCAN_PEAK_DB = 6.0
+# вес нового отсчёта в оценке шума
+NOISE_ALPHA = 0.25
+# подъём шума за проход, если канал выше порога (медленно «съедаем» несущую)
+NOISE_RISE_DB = 0.2
+
+
+class SpectrumScanner:
+    def __init__(self, start_hz, end_hz, step_hz, margin_db=SCAN_PEAK_DB, max_cand=4):
+        self.start = start_hz
+        self.step = step_hz
+        self.n = (end_hz - start_hz) // step_hz + 1
+        self.margin = margin_db
+        self.max_cand = max_cand
+
+        # последний проход и шум по каналам, dBm
+        self.rssi = array("f", [0.0] * self.n)
+        self.noise = array("f", [0.0] * self.n)
+        self.sweeps = 0
+
+        # кандидаты текущего прохода: [(частота, превышение, каналы lo..hi-1)]
+        self.cand = []
+        self.ci = 0
+
+        # статистика
+        self.dwells = 0
+        self.misses = 0
+
+    def freq(self, i):
+        return self.start + i * self.step
+
+    # ------------------------------------------------------
+    # Фаза 1 → ранжирование
+    # ------------------------------------------------------
+    def rank(self):
+        """Обновить шум по только что снятому rssi[] и выбрать кандидатов."""
+        n = self.n
+        rssi = self.rssi
+        noise = self.noise
+        margin = self.margin
+
+        if self.sweeps == 0:
+            # первого прохода мало для оценки по каналу — берём медиану
+            # полосы (несколько несущих её не сдвигают)
+            floor = sorted(rssi)[n // 2]
+            for i in range(n):
+                r = rssi[i]
+                noise[i] = r if r < floor else floor
+        else:
+            for i in range(n):
+                r = rssi[i]
+                nz = noise[i]
+                if r < nz + margin:
+                    noise[i] = nz + (r - nz) * NOISE_ALPHA
+                else:
+                    noise[i] = nz + NOISE_RISE_DB
+        self.sweeps += 1
+
+        # пики: жадно берём самый сильный свободный канал и его соседей
+        # (сигнал в полосе BW занимает не больше трёх шагов), так что две
+        # близкие несущие не сливаются в один кандидат
+        ex = [rssi[i] - noise[i] for i in range(n)]
+        used = bytearray(n)
+        peaks = []
+        while len(peaks) < self.max_cand:
+            best = margin
+            bi = -1
+            for i in range(n):
+                if not used[i] and ex[i] >= best:
+                    best = ex[i]
+                    bi = i
+            if bi < 0:
+                break
+            lo = bi - 1 if bi > 0 and not used[bi - 1] and ex[bi - 1] >= margin else bi
+            hi = bi + 2 if bi + 1 < n and not used[bi + 1] and ex[bi + 1] >= margin else bi + 1
+            # частота — центр тяжести по мощности (в разах, не в dB)
+            wsum = 0.0
+            fsum = 0.0
+            for i in range(lo, hi):
+                used[i] = 1
+                w = 10 ** (ex[i] / 10)
+                wsum += w
+                fsum += w * i
+            f = self.start + int(fsum / wsum * self.step + 0.5)
+            peaks.append((f, best, lo, hi))
+
+        self.cand = peaks
+        self.ci = 0
+        return len(peaks)
+
+    # ------------------------------------------------------
+    # Фаза 2
+    # ------------------------------------------------------
+    def next_candidate(self):
+        """Частота следующего кандидата или None (пора на новый проход)."""
+        if self.ci >= len(self.cand):
+            return None
+        f = self.cand[self.ci][0]
+        self.ci += 1
+        self.dwells += 1
+        return f
+
+    def miss(self):
+        """Остановка на последнем кандидате не нашла sync."""
+        self.misses += 1
+        _, _, lo, hi = self.cand[self.ci - 1]
+        # несущая без M20: поднимаем шум каналов пика на полпути к ней
+        for i in range(lo, hi):
+            self.noise[i] += (self.rssi[i] - self.noise[i]) * 0.5
+
+    def peaks(self):
+        """Кандидаты последнего прохода для Web UI: [(частота, dB над шумом)]."""
+        return [(f, round(ex, 1)) for f, ex, _, _ in self.cand]
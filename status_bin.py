@@ -0,0 +1,128 @@
+# status_bin.py — компактный двоичный статус для слабого канала
+#
+# Та же информация, что в JSON /status (без списков расписания и пиков
+# скана), но упакованная struct.pack_into в заранее выделенный буфер:
+# масштабированные целые вместо float, флаги битами. Около 80 байт вместо
+# ~700 байт JSON; сборка — один вызов pack_into без словаря и строк.
+#
+# Раскладка — таблица FIELDS (little-endian, без выравнивания); первым
+# байтом идёт номер версии протокола PROTO. По той же таблице работают
+# decode() на хосте и декодер в странице Web UI (JS_FIELDS).
+# Отдаётся как /status.bin и в потоке /events?bin=1 (base64 в data:).
+
+import struct
+
+from hal import time
+
+PROTO = 1
+
+# «нет данных» для знаковых полей
+NONE_I16 = -0x8000
+NONE_I32 = -0x80000000
+
+# (имя, тип struct, делитель, значение «нет данных» или None)
+FIELDS = (
+    ("proto", "B", 1, None),
+    ("flags", "B", 1, None),            # 1 fixed, 2 signal, 4 rawlog, 8 расписание
+    ("state", "B", 1, None),            # индекс в STATES
+    ("sondes", "B", 1, None),
+    ("version", "I", 1, None),          # версия снимка /status
+    ("freq", "I", 1, None),             # Гц
+    ("serial", "H", 1, 0xFFFF),
+    ("lat", "i", 1000000, NONE_I32),    # 1e-6 °
+    ("lon", "i", 1000000, NONE_I32),
+    ("alt", "i", 100, NONE_I32),        # см
+    ("velE", "h", 100, NONE_I16),       # см/с
+    ("velN", "h", 100, NONE_I16),
+    ("velU", "h", 100, NONE_I16),
+    ("batt_v", "H", 1000, 0xFFFF),      # мВ
+    ("rssi", "h", 10, NONE_I16),        # 0.1 dB
+    ("raw_rssi", "h", 10, NONE_I16),
+    ("noise", "h", 10, NONE_I16),
+    ("snr", "h", 10, NONE_I16),
+    ("last_frame_age", "H", 10, 0xFFFF),  # 0.1 с
+    ("frames_total", "I", 1, None),
+    ("frames_valid", "I", 1, None),
+    ("frames_crc_fail", "I", 1, None),
+    ("sync_hits", "I", 1, None),
+    ("last_shift", "h", 1, NONE_I16),
+    ("afc_conf", "I", 1, 0),            # Гц
+    ("afc_streak", "H", 1, None),
+    ("afc_freqest", "h", 1, None),
+    ("afc_df", "i", 1, None),           # Гц
+    ("rx_overruns", "I", 1, None),
+    ("sondes_evicted", "H", 1, None),
+)
+
+FMT = "<" + "".join(f[1] for f in FIELDS)
+SIZE = struct.calcsize(FMT)
+
+STATES = ("SCAN", "TRACK")
+_STATE_NO = {s: i for i, s in enumerate(STATES)}
+
+F_FIXED = 1
+F_SIGNAL = 2
+F_RAWLOG = 4
+F_SCHED = 8
+
+# таблица для декодера в странице: [[имя, тип, делитель, «нет»], ...]
+JS_FIELDS = "[%s]" % ",".join(
+    "['%s','%s',%d,%s]" % (n, f, k, "null" if z is None else z) for n, f, k, z in FIELDS)
+
+
+def _q(x, k, none):
+    """Число → масштабированное целое (None → метка «нет данных»)."""
+    return none if x is None else int(round(x * k))
+
+
+def _u16(x):
+    return x if x < 0xFFFF else 0xFFFF
+
+
+def encode_into(buf, t, version=0, now=None):
+    """Упаковать статус трекера t в buf (не короче SIZE). Возвращает SIZE."""
+    tr = t.track
+    dec = t.decoder
+    afc = t.afc
+    flags = ((F_FIXED if t.fixed_mode else 0) | (F_SIGNAL if tr.signal else 0) |
+             (F_RAWLOG if t.rawlog.enabled else 0) | (F_SCHED if t.sched is not None else 0))
+    if tr.last_frame_time is None:
+        age = 0xFFFF
+    else:
+        if now is None:
+            now = time.ticks_ms()
+        age = min(time.ticks_diff(now, tr.last_frame_time) // 100, 0xFFFE)
+    struct.pack_into(
+        FMT, buf, 0,
+        PROTO, flags, _STATE_NO.get(t.state, 255), min(len(t.sondes), 255),
+        version, tr.freq,
+        0xFFFF if tr.last_serial is None else tr.last_serial,
+        _q(tr.last_lat, 1000000, NONE_I32), _q(tr.last_lon, 1000000, NONE_I32),
+        _q(tr.last_alt, 100, NONE_I32),
+        _q(tr.last_velE, 100, NONE_I16), _q(tr.last_velN, 100, NONE_I16),
+        _q(tr.last_velU, 100, NONE_I16),
+        _q(tr.last_batt_v, 1000, 0xFFFF),
+        _q(tr.rssi, 10, NONE_I16), _q(tr.raw_rssi, 10, NONE_I16),
+        _q(tr.noise, 10, NONE_I16), _q(tr.snr, 10, NONE_I16),
+        age,
+        dec.frames_total, dec.frames_valid, dec.frames_crc_fail, dec.sync_hits,
+        NONE_I16 if dec.last_valid_shift is None else dec.last_valid_shift,
+        afc.confirmed_freq or 0, _u16(afc.streak), afc.last_freqest, afc.last_df,
+        t.rx.overruns, _u16(t.sondes.evicted),
+    )
+    return SIZE
+
+
+def decode(b):
+    """Байты /status.bin → словарь с ключами как в JSON /status (для хоста)."""
+    if len(b) < SIZE or b[0] != PROTO:
+        raise ValueError("status.bin: unknown layout")
+    d = {}
+    for (name, _, k, none), x in zip(FIELDS, struct.unpack_from(FMT, b, 0)):
+        d[name] = None if x == none else (x / k if k != 1 else x)
+    f = d["flags"]
+    d["fixed"] = bool(f & F_FIXED)
+    d["signal"] = 1 if f & F_SIGNAL else 0
+    d["rawlog_on"] = bool(f & F_RAWLOG)
+    d["state"] = STATES[d["state"]] if d["state"] < len(STATES) else "?"
+    return d
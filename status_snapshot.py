@@ -0,0 +1,184 @@
+# status_snapshot.py — снимок состояния трекера для Web UI
+#
+# Раньше /status собирал словарь на каждый запрос, залезая в track, afc,
+# decoder и т.д. Теперь трекер сам публикует снимок: словарь собирается
+# и сериализуется в JSON один раз, когда состояние изменилось, и
+# подменяется одной ссылкой. Web UI отдаёт готовые байты, ETag = версия
+# (If-None-Match → 304), /status?since=<версия> ждёт следующую версию.
+# Рядом с JSON в снимке лежит двоичный вариант (status_bin, /status.bin).
+#
+# Публикация идёт в паузе главного цикла перед тем, как отдать управление
+# задачам Web UI, — каждый клиент видит согласованный срез, а не поля
+# из разных моментов. Пересборка не чаще STATUS_MIN_MS; без изменений —
+# раз в STATUS_MAX_AGE_MS (возрасты, счётчики rawlog и т.п.).
+
+import random
+
+from hal import json, time
+from config import STATUS_MIN_MS, STATUS_MAX_AGE_MS, STATUS_RSSI_DB
+import status_bin
+
+
+# ------------------------------------------------------------
+# Группы полей статуса (для /status целиком, для /events — изменившиеся)
+# ------------------------------------------------------------
+def status_state(t, d):
+    """Режим, частота, AFC."""
+    d["state"] = t.state
+    d["fixed"] = t.fixed_mode
+    d["freq"] = t.track.freq
+    d["afc_conf"] = t.afc.confirmed_freq
+    d["afc_streak"] = t.afc.streak
+
+
+def status_radio(t, d):
+    """Уровни сигнала и последняя оценка FREQEST."""
+    d["rssi"] = t.track.rssi
+    d["raw_rssi"] = getattr(t.track, "raw_rssi", None)
+    d["noise"] = getattr(t.track, "noise", None)
+    d["snr"] = getattr(t.track, "snr", None)
+    d["signal"] = getattr(t.track, "signal", 0)
+    d["afc_freqest"] = t.afc.last_freqest
+    d["afc_df"] = t.afc.last_df
+
+
+def status_frame(t, d):
+    """Счётчики декодера, последний фикс, реестр зондов."""
+    dec = t.decoder
+    d["frames_total"] = dec.frames_total
+    d["frames_valid"] = dec.frames_valid
+    d["frames_crc_fail"] = dec.frames_crc_fail
+    d["sync_hits"] = dec.sync_hits
+    d["last_shift"] = dec.last_valid_shift
+
+    # возраст последнего успешного кадра
+    if t.track.last_frame_time is not None:
+        age_ms = time.ticks_diff(time.ticks_ms(), t.track.last_frame_time)
+        d["last_frame_age"] = age_ms / 1000.0
+    else:
+        d["last_frame_age"] = None
+
+    # телеметрия
+    d["lat"] = t.track.last_lat
+    d["lon"] = t.track.last_lon
+    d["alt"] = t.track.last_alt
+    d["batt_v"] = t.track.last_batt_v
+
+    # реестр зондов (полный список — /sondes)
+    d["sondes"] = len(t.sondes)
+    d["sondes_evicted"] = t.sondes.evicted
+
+
+def build_status(tracker):
+    """Полный словарь /status (собирается при публикации снимка)."""
+    t = tracker
+    d = {}
+    status_state(t, d)
+    status_radio(t, d)
+    status_frame(t, d)
+
+    # сканер: кандидаты последнего быстрого прохода
+    sc = t.scanner
+    d["scan_freq"] = t.scan_freq
+    d["scan_peaks"] = sc.peaks() if sc is not None else None
+
+    # план скана и задержки (меняются командами /scan, /dwell)
+    d["scan_range"] = [t.scan_start, t.scan_end, t.scan_step]
+    d["dwell"] = [t.scan_dwell_ms, t.cand_dwell_ms]
+    d["cmd_queue"] = len(t.cmds)
+
+    # расписание нескольких зондов: выход кадров по каждому
+    d["sched"] = t.sched.stats(time.ticks_ms()) if t.sched is not None else None
+
+    # кэш калибровки синтезатора
+    d["cal_stale"] = t.radio.cal_stale()
+    d["hops_cached"] = t.radio.hops_cached
+    d["hops_scal"] = t.radio.hops_scal
+
+    # кольцо байт ISR → главный цикл
+    d["rx_overruns"] = t.rx.overruns
+    d["rx_max_fill"] = t.rx.max_fill
+
+    # запись сырого потока
+    lg = t.rawlog
+    d["rawlog_on"] = lg.enabled
+    d["rawlog_seg"] = lg.seg_no
+    d["rawlog_bytes"] = lg.bytes_logged
+    d["rawlog_dropped"] = lg.bytes_dropped
+
+    return d
+
+
+# ------------------------------------------------------------
+# Снимок и публикация
+# ------------------------------------------------------------
+class Snapshot:
+    """Опубликованный статус: версия, время сборки, JSON, двоичный, метка ETag."""
+    __slots__ = ("version", "ms", "body", "bin", "tag")
+
+    def __init__(self, version, ms, body, bin, tag):
+        self.version = version
+        self.ms = ms
+        self.body = body
+        self.bin = bin
+        self.tag = tag
+
+
+class StatusPublisher:
+    def __init__(self, tracker, min_ms=STATUS_MIN_MS, max_age_ms=STATUS_MAX_AGE_MS,
+                 rssi_db=STATUS_RSSI_DB):
+        self.t = tracker
+        self.min_ms = min_ms
+        self.max_age = max_age_ms
+        self.rssi_db = rssi_db
+        # ETag различает загрузки: версии после перезапуска снова с 1
+        self.boot = random.getrandbits(30)
+        self.version = 0
+        self.snap = None
+        self._key = None
+        self._rssi = None
+        self._buf = bytearray(status_bin.SIZE)
+        self.builds = 0
+
+    def _state_key(self):
+        """Дешёвый отпечаток того, что видно на странице (кроме RSSI)."""
+        t = self.t
+        dec = t.decoder
+        return (t.state, t.fixed_mode, t.track.freq, t.scan_freq,
+                dec.frames_total, dec.frames_valid, dec.sync_hits,
+                t.afc.streak, t.afc.confirmed_freq, t.rx.overruns,
+                t.rawlog.enabled, len(t.sondes), t.cmds.executed)
+
+    def get(self):
+        """Текущий снимок (первый — собирается сразу)."""
+        s = self.snap
+        return s if s is not None else self.publish()
+
+    def publish(self, now=None):
+        """Пересобрать снимок, если состояние изменилось. Возвращает текущий."""
+        if now is None:
+            now = time.ticks_ms()
+        s = self.snap
+        key = None
+        rssi = self.t.track.rssi
+        if s is not None:
+            age = time.ticks_diff(now, s.ms)
+            if age < self.min_ms:
+                return s
+            key = self._state_key()
+            if age < self.max_age and key == self._key and (
+                    rssi == self._rssi or rssi is not None and self._rssi is not None
+                    and abs(rssi - self._rssi) < self.rssi_db):
+                return s
+        self._key = key if key is not None else self._state_key()
+        self._rssi = rssi
+
+        self.version += 1
+        d = build_status(self.t)
+        d["version"] = self.version
+        status_bin.encode_into(self._buf, self.t, self.version, now)
+        s = Snapshot(self.version, now, json.dumps(d).encode(), bytes(self._buf),
+                     "%x-%d" % (self.boot, self.version))
+        self.snap = s
+        self.builds += 1
+        return s
@@ -0,0 +1,9 @@
+# tests/conftest.py — модули проекта лежат в корне репозитория (плоская раскладка)
+#
+# На хосте hal подставляет пакет sim (виртуальные часы, симулятор CC1101),
+# поэтому модули трекера импортируются на CPython без железа.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
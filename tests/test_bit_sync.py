@@ -0,0 +1,110 @@
+# tests/test_bit_sync.py — восстановление тактов GDO0 (ClockRecovery, EdgeBitSlicer)
+
+import random
+
+import pytest
+
+from bit_sync import TICKS_MASK, ClockRecovery, EdgeBitSlicer
+
+BITRATE = 9600
+
+
+def random_bits(n, seed):
+    rnd = random.Random(seed)
+    return [rnd.getrandbits(1) for _ in range(n)]
+
+
+def to_bits(out):
+    return [(b >> k) & 1 for b in out for k in range(7, -1, -1)]
+
+
+def errors_at_best_lag(ref, got, max_lag=8):
+    """Число расхождений при лучшем сдвиге, выбранном по началу потока."""
+    def errs(lag, lo, hi):
+        return sum(ref[i] != got[i + lag] for i in range(lo, hi) if 0 <= i + lag < len(got))
+    lag = min(range(-max_lag, max_lag + 1), key=lambda k: errs(k, 64, 320))
+    return errs(lag, 64, len(ref) - 64)
+
+
+def sample_stream(bits, os_factor, ppm, jitter, seed):
+    """Отсчёты таймера с целым периодом в мкс; уход передатчика ppm и джиттер фронтов."""
+    rnd = random.Random(seed)
+    bit_t = 1.0 / (BITRATE * (1 + ppm * 1e-6))
+    edges = [i * bit_t + rnd.gauss(0, jitter * bit_t) for i in range(len(bits) + 1)]
+    period = int(1_000_000 / (BITRATE * os_factor)) * 1e-6
+    samples = []
+    t = period * 0.37
+    i = 0
+    while t < edges[-1]:
+        while i < len(bits) - 1 and t >= edges[i + 1]:
+            i += 1
+        samples.append(bits[i])
+        t += period
+    return samples, 1.0 / period
+
+
+@pytest.mark.parametrize("ppm", [-2000, -300, 0, 300, 2000])
+def test_clock_recovery_with_drift(ppm):
+    bits = random_bits(4000, ppm)
+    samples, rate = sample_stream(bits, 4, ppm, 0.03, seed=1)
+    out = []
+    cdr = ClockRecovery(out.append, BITRATE, rate)
+    for v in samples:
+        cdr.feed(v)
+    got = to_bits(out)
+    assert abs(len(got) - len(bits)) <= 8
+    assert errors_at_best_lag(bits, got) == 0
+
+
+def test_clock_recovery_needs_tracking():
+    """Без подстройки по фронтам (огромный gain_shift) поток при уходе срывается."""
+    bits = random_bits(4000, 7)
+    samples, rate = sample_stream(bits, 4, 2000, 0.0, seed=2)
+    out = []
+    cdr = ClockRecovery(out.append, BITRATE, rate, gain_shift=30)
+    for v in samples:
+        cdr.feed(v)
+    assert errors_at_best_lag(bits, to_bits(out)) > 0
+
+
+def edge_stream(bits, t0, ppm=0):
+    """Фронты NRZ-потока: (отметки ticks_us по маске, уровни после фронта)."""
+    bit_us = 1_000_000 / (BITRATE * (1 + ppm * 1e-6))
+    times = []
+    levels = []
+    level = None
+    for i, b in enumerate(bits):
+        if b != level:
+            times.append(int(t0 + i * bit_us) & TICKS_MASK)
+            levels.append(b)
+            level = b
+    times.append(int(t0 + len(bits) * bit_us) & TICKS_MASK)
+    levels.append(1 - level)
+    return times, levels
+
+
+def slice_bits(times, levels):
+    out = []
+    sl = EdgeBitSlicer(out.append, BITRATE)
+    sl.push_edges(times, levels)
+    return to_bits(out), sl
+
+
+@pytest.mark.parametrize("ppm", [-1000, 0, 1000])
+def test_edge_slicer_exact(ppm):
+    bits = [1, 0] + random_bits(2046, 11 + ppm)
+    got, sl = slice_bits(*edge_stream(bits, 5000, ppm))
+    assert got == bits[:len(got)]
+    assert len(bits) - len(got) < 8
+    assert sl.glitches == 0
+
+
+def test_edge_slicer_ticks_wrap():
+    """Переполнение ticks_us посреди потока не меняет результат."""
+    bits = [1, 0] + random_bits(2046, 3)
+    plain = slice_bits(*edge_stream(bits, 5000))[0]
+    times, levels = edge_stream(bits, TICKS_MASK - 100000)
+    assert any(b < a for a, b in zip(times, times[1:]))
+    wrapped, sl = slice_bits(times, levels)
+    assert wrapped == plain
+    assert sl.long_runs == 0
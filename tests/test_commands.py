@@ -0,0 +1,76 @@
+# tests/test_commands.py — очередь команд Web UI → трекер
+
+import contextlib
+import io
+import random
+
+import pytest
+
+import sim
+from commands import CommandQueue
+from config import DWELL_MAX_MS
+from hal import time
+from sim.clock import clock
+from sim.rf import RfEnvironment, Transmitter
+
+
+def test_queue_bounded_and_ordered():
+    q = CommandQueue(size=2)
+    a = q.post("a", 1)
+    b = q.post("b", 2)
+    assert q.post("c", 3) is None
+    assert q.rejected == 1
+    done = []
+
+    def handler(name, args):
+        done.append(name)
+        if name == "b":
+            raise ValueError("bad b")
+        return args[0] * 10
+
+    q.drain(handler)
+    assert done == ["a", "b"]
+    assert len(q) == 0
+    assert a.done and a.ok and a.result == 10
+    assert b.done and not b.ok and b.result == "bad b"
+    assert (q.posted, q.executed, q.failed) == (2, 2, 1)
+
+
+def noise_bursts(k):
+    """Несущая с модуляцией, но без sync: кандидат, на котором кадров нет."""
+    rnd = random.Random(k)
+    return bytes(rnd.getrandbits(8) | 0x01 for _ in range(74))
+
+
+@pytest.mark.parametrize("linear", [False, True])
+def test_command_interrupts_long_dwell(linear):
+    """После /dwell с максимальными задержками команда выполняется быстро,
+    а не по окончании остановки (иначе HTTP-ответ — 504)."""
+    env = RfEnvironment(seed=5)
+    env.add(Transmitter(404_800_000, -70, noise_bursts))
+    sim.setup(env)
+    import main
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = main.Tracker()
+        if linear:
+            t.scanner = None
+        t.start()
+        c = t.cmds.post("dwell", DWELL_MAX_MS, DWELL_MAX_MS)
+        t.step()
+        assert c.done and c.ok
+
+        posted = []
+
+        def idle(ms):
+            time.sleep_ms(ms)
+            if not posted and clock.now_us > 33_000_000:
+                posted.append((clock.now_us, t.cmds.post("fixed", 405_100_000)))
+
+        t.idle = idle
+        while not posted or not posted[0][1].done:
+            t.step()
+            assert clock.now_us < 60_000_000
+    t0, c = posted[0]
+    assert c.ok
+    assert t.fixed_mode
+    assert clock.now_us - t0 < 500_000
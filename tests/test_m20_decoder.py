@@ -0,0 +1,210 @@
+# tests/test_m20_decoder.py — декодер M20: CHECKM10, поиск sync, захват кадра
+
+import random
+
+import pytest
+
+from m20_decoder import (SYNC, SYNC_HAMMING_THRESH, M20Decoder, SyncCorrelator, checkM10,
+                         checkM10_all_shifts, update_checkM10)
+
+
+# ------------------------------------------------------------
+# Эталон: бит-серийный CHECKM10 (как в m20mod)
+# ------------------------------------------------------------
+def ref_update_checkM10(c, b):
+    b &= 0xFF
+    b = ((b >> 1) | ((b & 1) << 7)) & 0xFF
+    b ^= (b >> 2) & 0xFF
+    c ^= b
+    for _ in range(8):
+        fb = c & 1
+        c >>= 1
+        if fb:
+            c ^= 0x98
+    return c & 0xFF
+
+
+def ref_checkM10(frame):
+    if len(frame) < 2:
+        return False
+    cs = 0
+    for b in frame[:-1]:
+        cs = ref_update_checkM10(cs, b)
+    return cs == frame[-1]
+
+
+def ref_all_shifts(frame):
+    mask = 0
+    for shift in range(8):
+        if ref_checkM10(M20Decoder._shift_frame_bits(frame, shift)):
+            mask |= 1 << shift
+    return mask
+
+
+def valid_frame(rnd, length, first_mask=0xFF):
+    body = bytes([rnd.randrange(256) & first_mask]) + bytes(rnd.randrange(256) for _ in range(length - 2))
+    cs = 0
+    for b in body:
+        cs = ref_update_checkM10(cs, b)
+    return body + bytes([cs])
+
+
+def test_update_table_matches_reference():
+    for c in range(256):
+        for b in range(256):
+            assert update_checkM10(c, b) == ref_update_checkM10(c, b)
+
+
+@pytest.mark.parametrize("length", [2, 3, 10, 69, 101, 300])
+def test_checkM10_random_frames(length):
+    rnd = random.Random(length)
+    for i in range(200):
+        f = valid_frame(rnd, length)
+        if i & 1:
+            f = f[:-1] + bytes([f[-1] ^ (1 << rnd.randrange(8))])
+        assert checkM10(f) == ref_checkM10(f)
+        assert checkM10(f) == (not i & 1)
+
+
+def test_checkM10_short_frames():
+    assert not checkM10(b"")
+    assert not checkM10(b"\x00")
+    assert checkM10_all_shifts(b"") == 0
+    assert checkM10_all_shifts(b"\x00") == 0
+
+
+@pytest.mark.parametrize("shift", range(8))
+def test_all_shifts_valid_at_shift(shift):
+    """Кадр, сходящийся только после сдвига shift: бит shift в маске."""
+    rnd = random.Random(100 + shift)
+    for length in (10, 69, 101):
+        for _ in range(20):
+            # старшие shift бит первого байта уходят при сдвиге — держим их нулевыми
+            f = valid_frame(rnd, length, 0xFF >> shift)
+            nbits = 8 * length
+            raw = ((int.from_bytes(f, "big") << shift) & ((1 << nbits) - 1)).to_bytes(length, "big")
+            assert M20Decoder._shift_frame_bits(raw, shift) == f
+            mask = checkM10_all_shifts(raw)
+            assert mask & (1 << shift)
+            assert mask == ref_all_shifts(raw)
+
+
+@pytest.mark.parametrize("shift", range(8))
+def test_all_shifts_random_frames(shift):
+    rnd = random.Random(200 + shift)
+    for _ in range(100):
+        f = bytes(rnd.randrange(256) for _ in range(rnd.randrange(2, 120)))
+        mask = checkM10_all_shifts(f)
+        assert mask == ref_all_shifts(f)
+        assert bool(mask & (1 << shift)) == checkM10(M20Decoder._shift_frame_bits(f, shift))
+
+
+# ------------------------------------------------------------
+# SyncCorrelator: побитовый поиск sync
+# ------------------------------------------------------------
+SYNC_WORD = int.from_bytes(SYNC, "big")
+
+
+def pack_bits(bits):
+    """Список бит (MSB first) → байты, хвост добит нулями."""
+    bits = bits + [0] * (-len(bits) % 8)
+    return bytes(int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8))
+
+
+def sync_bits(flips=()):
+    bits = [(SYNC_WORD >> (31 - i)) & 1 for i in range(32)]
+    for i in flips:
+        bits[i] ^= 1
+    return bits
+
+
+def push_all(corr, data):
+    """(индекс байта, k) для каждого срабатывания."""
+    hits = []
+    for i, b in enumerate(data):
+        k = corr.push_byte(b)
+        if k >= 0:
+            hits.append((i, k))
+    return hits
+
+
+@pytest.mark.parametrize("pre", range(8))
+def test_sync_every_bit_offset(pre):
+    """Sync после pre бит мусора: k — число бит байта после конца sync."""
+    payload = [1, 0, 1, 1, 0, 0, 1, 0] * 2
+    data = pack_bits([0] * (8 + pre) + sync_bits() + payload)
+    corr = SyncCorrelator()
+    hits = push_all(corr, data)
+    end = 8 + pre + 32                  # бит сразу после sync
+    assert hits[0] == ((end - 1) // 8, (8 - end % 8) % 8)
+    assert corr.dist == 0
+
+
+def test_sync_hamming_threshold():
+    flips = (0, 9, 18, 27, 31)
+    pad = [0] * 16
+    corr = SyncCorrelator()
+    hits = push_all(corr, pack_bits(pad + sync_bits(flips[:SYNC_HAMMING_THRESH]) + pad))
+    assert hits == [(5, 0)]
+    assert corr.dist == SYNC_HAMMING_THRESH
+
+    corr = SyncCorrelator()
+    assert push_all(corr, pack_bits(pad + sync_bits(flips[:SYNC_HAMMING_THRESH + 1]) + pad)) == []
+
+
+def test_sync_stops_at_match():
+    """Биты байта после совпадения не вдвигаются; reset() очищает регистр."""
+    corr = SyncCorrelator()
+    # 4 бита мусора + sync + 4 бита кадра: конец sync посреди пятого байта
+    data = pack_bits([0] * 4 + sync_bits() + [1, 0, 1, 0])
+    assert push_all(corr, data[:4]) == []
+    assert corr.push_byte(data[4]) == 4
+    assert (corr.hi << 16) | corr.lo == SYNC_WORD
+    corr.reset()
+    assert corr.hi == corr.lo == 0
+    assert corr.push_byte(0) == -1
+
+
+# ------------------------------------------------------------
+# Захват кадра: фаза sync переносится в приём, байты уже выровнены
+# ------------------------------------------------------------
+def m20_frame(rnd, length=70):
+    """Кадр с верным байтом длины L = length - 1 и CHECKM10."""
+    body = bytes([length - 1]) + bytes(rnd.randrange(256) for _ in range(length - 2))
+    cs = 0
+    for b in body:
+        cs = ref_update_checkM10(cs, b)
+    return body + bytes([cs])
+
+
+def frame_bits(frame):
+    return [(b >> (7 - j)) & 1 for b in frame for j in range(8)]
+
+
+@pytest.mark.parametrize("pre", range(8))
+def test_sync_frame_alignment(pre):
+    """Декодер восстанавливает байты кадра при любом битовом смещении sync."""
+    frame = m20_frame(random.Random(pre))
+    got = []
+    dec = M20Decoder(got.append)
+    dec.feed_bytes(pack_bits([0] * (8 + pre) + sync_bits() + frame_bits(frame)))
+    assert got == [frame]
+    assert dec.frames_total == dec.frames_valid == 1
+    assert dec.last_valid_shift == (8 - (8 + pre + 32) % 8) % 8
+
+
+@pytest.mark.parametrize("pre", [0, 3, 7])
+def test_bad_length_checked_on_aligned_byte(pre):
+    """Окно длины проверяется по настоящему байту L: короткий L — отказ
+    без CRC, следующий кадр с любым смещением принимается."""
+    rnd = random.Random(10 + pre)
+    good = m20_frame(rnd)
+    bad = bytes([3]) + good[1:]
+    got = []
+    dec = M20Decoder(got.append)
+    dec.feed_bytes(pack_bits([0] * (8 + pre) + sync_bits() + frame_bits(bad) +
+                             [0] * (16 + pre) + sync_bits() + frame_bits(good)))
+    assert got == [good]
+    assert dec.frames_bad_len == 1
+    assert dec.frames_total == 1
+    assert dec.frames_crc_fail == 0
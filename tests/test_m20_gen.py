@@ -0,0 +1,69 @@
+# tests/test_m20_gen.py — генератор сигнала M20 на длинных прогонах
+
+import pytest
+
+from m20_decoder import M20Decoder, checkM10
+from sim.m20_gen import M20Signal, bit_stream, pack_bytes
+from sonde_data import parse_m20
+
+
+def test_long_run_stays_in_frame_format():
+    """Часы сигнала: подъём, разрыв, спуск, посадка — все кадры в формате."""
+    sig = M20Signal()
+    n = 20000                             # ≈ 5.5 ч при кадре в секунду
+    assert sig.t_land < n
+    prev_alt = None
+    top = 0
+    for k in range(n):
+        f = sig.fields(k)
+        assert -32768 <= f["alt"] <= 32767
+        top = max(top, f["alt"])
+        if prev_alt is not None:
+            assert abs(f["alt"] - prev_alt) <= max(sig.climb, sig.descent) + 1
+        prev_alt = f["alt"]
+        if k % 97 == 0:
+            fr = sig.frame(k)
+            assert checkM10(fr)
+            p = parse_m20(fr)
+            assert p is not None
+            assert p.alt == f["alt"]
+            assert p.velU == pytest.approx(f["velU"], abs=0.01)
+            assert p.lat == pytest.approx(f["lat"], abs=1e-4)
+            assert p.lon == pytest.approx(f["lon"], abs=1e-4)
+    assert top >= sig.burst_alt - sig.climb
+    assert prev_alt == sig.alt0
+    assert sig.fields(n - 1)["velU"] == 0.0
+
+
+def test_flight_phases():
+    sig = M20Signal(alt0=100, climb=10.0, burst_alt=1100, descent=5.0)
+    assert sig.fields(50)["velU"] == 10.0
+    assert sig.fields(100)["alt"] == 1100
+    assert sig.fields(150)["alt"] == 850
+    assert sig.fields(150)["velU"] == -5.0
+    landed = sig.fields(400)
+    assert landed["alt"] == 100
+    assert landed["velE"] == landed["velN"] == 0.0
+    assert landed["lat"] == sig.fields(300)["lat"]
+
+
+def test_burst_alt_must_fit_int16():
+    with pytest.raises(ValueError):
+        M20Signal(burst_alt=35000)
+    with pytest.raises(ValueError):
+        M20Signal(descent=0)
+
+
+def test_bit_stream_decodes_across_landing():
+    """Кадры потока через момент посадки проходят декодер (ложный sync в
+    шумовой паузе может съесть отдельный кадр)."""
+    sig = M20Signal(alt0=100, climb=20.0, burst_alt=700, descent=20.0)
+    got = []
+    dec = M20Decoder(got.append)
+    for chunk in pack_bytes(bit_stream(sig, n_frames=80, gap_bits=(64, 300))):
+        dec.feed_bytes(chunk)
+    frames = [sig.frame(k) for k in range(80)]
+    ks = [frames.index(f) for f in got]
+    assert ks == sorted(ks)
+    assert len(ks) >= 75
+    assert ks[-1] > sig.t_land
@@ -0,0 +1,63 @@
+# tests/test_raw_log.py — сегменты сырого лога: запись, ротация, чтение
+
+import os
+import random
+
+from raw_log import BLK_HDR, BLOCK, SEG_HDR, RawLogger, read_segment
+
+
+def test_rotation_and_replay(tmp_path):
+    path = str(tmp_path / "rawlog")
+    lg = RawLogger(path=path, ring_size=8192, seg_bytes=3 * BLOCK, max_segs=2,
+                   bitrate=9600, enabled=True)
+    rnd = random.Random(1)
+    data = bytearray()
+    freqs = []
+    # 8 сегментов по 3 блока: старые удаляются, остаются два последних
+    for i in range(24):
+        freq = 405_000_000 + i * 1000
+        lg.note(freq, -80.5 - i)
+        chunk = bytes(rnd.getrandbits(8) for _ in range(BLOCK - BLK_HDR))
+        lg.write(chunk)
+        data += chunk
+        lg.flush()
+        freqs.append(freq)
+    lg.enable(False)
+    assert lg.bytes_dropped == 0
+    assert lg.write_errors == 0
+    assert lg.bytes_logged == len(data)
+
+    names = sorted(os.listdir(path))
+    assert len(names) == 2
+    assert names[-1] == "raw%04d.bin" % lg.seg_no
+
+    replay = bytearray()
+    seg_nos = []
+    for nm in names:
+        assert os.path.getsize(os.path.join(path, nm)) % BLOCK == 0
+        blocks = list(read_segment(os.path.join(path, nm)))
+        assert 1 <= len(blocks) <= 3
+        seg = blocks[0][0]
+        assert seg["bitrate"] == 9600
+        seg_nos.append(seg["seg"])
+        # первый блок сегмента короче на заголовок сегмента
+        assert len(blocks[0][2]) <= BLOCK - SEG_HDR - BLK_HDR
+        for s, hdr, payload in blocks:
+            assert s is seg
+            assert len(payload) <= BLOCK - BLK_HDR
+            assert hdr["freq"] in freqs
+            assert hdr["rssi"] < -80
+            replay += payload
+    assert seg_nos[1] == seg_nos[0] + 1
+    # последний сегмент может быть неполным (остаток при выключении)
+    assert len(replay) > 3 * BLOCK - SEG_HDR - 3 * BLK_HDR
+    assert bytes(replay) == bytes(data[-len(replay):])
+
+
+def test_disabled_logger_writes_nothing(tmp_path):
+    path = str(tmp_path / "rawlog")
+    lg = RawLogger(path=path)
+    lg.write(b"\x55" * 100)
+    assert lg.available() == 0
+    assert lg.flush(force=True) == 0
+    assert not os.path.exists(path)
@@ -0,0 +1,67 @@
+# tests/test_rx_ring.py — кольцо байт ISR → главный цикл
+
+import pytest
+
+from rx_ring import ByteRing
+
+
+def drain_all(ring, max_bytes=0):
+    parts = []
+    n = ring.drain(lambda mv: parts.append(bytes(mv)), max_bytes)
+    return n, parts
+
+
+def test_size_must_be_power_of_two():
+    for size in (0, 1, 3, 100):
+        with pytest.raises(ValueError):
+            ByteRing(size)
+
+
+def test_wrap_around():
+    ring = ByteRing(8)
+    for b in range(6):
+        ring.put(b)
+    assert drain_all(ring) == (6, [bytes(range(6))])
+    # запись переходит через конец буфера: два куска, порядок сохранён
+    for b in range(10, 16):
+        ring.put(b)
+    assert ring.available() == 6
+    n, parts = drain_all(ring)
+    assert n == 6
+    assert parts == [bytes([10, 11]), bytes([12, 13, 14, 15])]
+    assert ring.available() == 0
+    assert drain_all(ring) == (0, [])
+
+
+def test_overrun_when_full():
+    ring = ByteRing(8)
+    # одна ячейка всегда свободна: помещается size - 1 байт
+    for b in range(10):
+        ring.put(b)
+    assert ring.available() == 7
+    assert ring.overruns == 3
+    assert drain_all(ring) == (7, [bytes(range(7))])
+    assert ring.max_fill == 7
+    ring.put(99)
+    assert drain_all(ring) == (1, [bytes([99])])
+    assert ring.overruns == 3
+    assert ring.max_fill == 7
+
+
+def test_chunked_drain_order():
+    ring = ByteRing(16)
+    for b in range(10):
+        ring.put(b)
+    drain_all(ring)
+    # 13 байт с позиции 10: переход через конец буфера внутри второй пачки
+    data = bytes(range(100, 113))
+    for b in data:
+        ring.put(b)
+    got = []
+    while ring.available():
+        n, parts = drain_all(ring, max_bytes=5)
+        assert n == sum(len(p) for p in parts) <= 5
+        got.append(parts)
+    assert got == [[data[0:5]], [data[5:6], data[6:10]], [data[10:13]]]
+    assert ring.overruns == 0
+    assert ring.max_fill == 13
@@ -0,0 +1,46 @@
+# tests/test_scan.py — остановка на кандидате спектрального скана
+
+import contextlib
+import io
+
+import pytest
+
+import sim
+from m20_decoder import MAX_FRAME_LEN
+from sim.clock import clock
+from sim.m20_gen import M20Signal
+from sim.rf import RfEnvironment, Transmitter
+
+FREQ = 405_100_000
+
+
+@pytest.mark.parametrize("lead_ms", [40, 120, 200])
+def test_candidate_dwell_starts_with_fresh_decoder(lead_ms):
+    """Кадр, недобранный на прошлом канале, не съедает первый sync кандидата:
+    зонд найден, и канал не записан в промахи (шум не поднят)."""
+    tx = Transmitter(FREQ, -80, M20Signal(seed=4).burst)
+    env = RfEnvironment(seed=4)
+    env.add(tx)
+    sim.setup(env)
+    import main
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = main.Tracker()
+        t.start()
+        sc = t.scanner
+        # пачка зонда — вскоре после начала остановки; следующая — уже после неё
+        tx.phase_us = (clock.now_us + lead_ms * 1000) % tx.period_us
+        t.cand_dwell_ms = 600
+        i = (FREQ - sc.start) // sc.step
+        sc.cand = [(FREQ, 20.0, i - 1, i + 2)]
+        sc.ci = 0
+        noise = list(sc.noise[i - 1:i + 2])
+        # прошлый канал: sync был, кадр максимальной длины не добран
+        d = t.decoder
+        d.capturing = True
+        d.expected = MAX_FRAME_LEN
+        d.n = 1
+        t._run_scan_spectrum()
+    assert d.frames_valid == 1
+    assert d.frames_crc_fail == 0
+    assert sc.misses == 0
+    assert list(sc.noise[i - 1:i + 2]) == noise
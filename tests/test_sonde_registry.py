@@ -0,0 +1,60 @@
+# tests/test_sonde_registry.py — реестр зондов: порядок LRU и вытеснение
+
+from sonde_data import M20Frame
+from sonde_registry import SondeRegistry
+
+
+def frame(serial, alt=1000):
+    f = M20Frame()
+    f.serial = serial
+    f.week = 2300
+    f.tow = 100.0
+    f.lat = 1.0
+    f.lon = 2.0
+    f.alt = alt
+    f.velE = f.velN = f.velU = 0.0
+    f.batt_v = 3.0
+    return f
+
+
+def serials(reg):
+    return [e.serial for e in reg.records()]
+
+
+def test_lru_order():
+    reg = SondeRegistry(capacity=4)
+    for i, s in enumerate((1, 2, 3)):
+        reg.update(frame(s), 405_000_000, now=i)
+    assert serials(reg) == [3, 2, 1]
+    # кадр известного зонда переносит его в начало, запись та же
+    e = reg.get(1)
+    assert reg.update(frame(1, alt=2000), 405_100_000, now=10) is e
+    assert serials(reg) == [1, 3, 2]
+    assert e.frames == 2
+    assert e.alt == 2000
+    assert e.freq == 405_100_000
+    assert e.first_ms == 0 and e.last_ms == 10
+    assert len(reg) == 3
+    assert reg.evicted == 0
+
+
+def test_eviction_of_oldest():
+    reg = SondeRegistry(capacity=3)
+    for i, s in enumerate((1, 2, 3)):
+        reg.update(frame(s), 405_000_000, now=i)
+    reg.update(frame(1), 405_000_000, now=5)
+    # 2 — самый старый: уходит первым, его запись переиспользуется
+    old = reg.get(2)
+    e = reg.update(frame(4), 405_200_000, now=6)
+    assert e is old
+    assert reg.get(2) is None
+    assert serials(reg) == [4, 1, 3]
+    assert e.serial == 4 and e.frames == 1 and e.first_ms == 6
+    assert reg.evicted == 1
+
+    reg.update(frame(5), 405_000_000, now=7)
+    assert serials(reg) == [5, 4, 1]
+    assert reg.evicted == 2
+    assert len(reg) == 3
+    assert [d["serial"] for d in reg.to_list(now=8)] == [5, 4, 1]
+    assert reg.to_list(now=8)[0]["last_age"] == 0.001
@@ -0,0 +1,115 @@
+# tests/test_status_bin.py — двоичный статус: упаковка ↔ decode() ↔ JSON /status
+
+import contextlib
+import io
+
+import pytest
+
+import sim
+from hal import time
+from status_bin import PROTO, SIZE, decode, encode_into
+from status_snapshot import build_status
+
+# поля, которые переносятся без масштаба
+EXACT = ("state", "fixed", "signal", "rawlog_on", "freq", "sondes", "sondes_evicted",
+         "frames_total", "frames_valid", "frames_crc_fail", "sync_hits", "last_shift",
+         "afc_conf", "afc_streak", "afc_freqest", "afc_df", "rx_overruns")
+# масштабированные: допуск — половина шага (возраст кадра округляется вниз)
+SCALED = (("lat", 0.5e-6), ("lon", 0.5e-6), ("alt", 0.005), ("batt_v", 0.0005),
+          ("rssi", 0.05), ("raw_rssi", 0.05), ("noise", 0.05), ("snr", 0.05),
+          ("last_frame_age", 0.1))
+
+
+def tracker():
+    sim.setup()
+    import main
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = main.Tracker()
+        t.start()
+    return t
+
+
+def no_data(t):
+    """Все поля с меткой «нет данных»."""
+    tr = t.track
+    tr.last_serial = tr.last_lat = tr.last_lon = tr.last_alt = None
+    tr.last_velE = tr.last_velN = tr.last_velU = tr.last_batt_v = None
+    tr.rssi = tr.raw_rssi = tr.noise = tr.snr = None
+    tr.signal = 0
+    tr.last_frame_time = None
+    t.decoder.last_valid_shift = None
+    t.afc.confirmed_freq = None
+
+
+def in_range(t):
+    tr = t.track
+    t.state = "TRACK"
+    t.fixed_mode = True
+    tr.freq = 405_100_000
+    tr.last_serial = 0x1234
+    tr.last_lat, tr.last_lon, tr.last_alt = 48.123456, -2.654321, 12345.67
+    tr.last_velE, tr.last_velN, tr.last_velU = 12.34, -5.67, -21.5
+    tr.last_batt_v = 3.071
+    tr.rssi, tr.raw_rssi, tr.noise, tr.snr = -85.3, -84.9, -101.2, 15.9
+    tr.signal = 1
+    tr.last_frame_time = time.ticks_add(time.ticks_ms(), -2550)
+    t.decoder.frames_total = 70_000
+    t.decoder.frames_valid = 69_000
+    t.decoder.last_valid_shift = 3
+    t.afc.confirmed_freq = 405_101_000
+    t.afc.streak = 7
+    t.afc.last_freqest = -12
+    t.afc.last_df = -1500
+
+
+def next_to_sentinel(t):
+    """Значения в шаге от меток «нет данных» остаются значениями."""
+    in_range(t)
+    tr = t.track
+    tr.last_serial = 0xFFFE
+    tr.last_velU = -327.67
+    tr.last_batt_v = 65.534
+    tr.rssi = -3276.7
+    tr.last_alt = -21474836.47
+    t.decoder.last_valid_shift = 0
+
+
+def test_layout_pinned():
+    # раскладка поменялась — подними PROTO: страница сверяет первый байт
+    assert SIZE == 80
+    assert PROTO == 1
+
+
+@pytest.mark.parametrize("setup", [no_data, in_range, next_to_sentinel])
+def test_round_trip_matches_status(setup):
+    t = tracker()
+    setup(t)
+    buf = bytearray(SIZE + 4)
+    assert encode_into(buf, t, 42, time.ticks_ms()) == SIZE
+    got = decode(buf)
+    want = build_status(t)
+    assert got["proto"] == PROTO
+    assert got["version"] == 42
+    for k in EXACT:
+        assert got[k] == want[k], k
+    for k, tol in SCALED:
+        if want[k] is None:
+            assert got[k] is None, k
+        else:
+            assert got[k] == pytest.approx(want[k], abs=tol), k
+    tr = t.track
+    assert got["serial"] == tr.last_serial
+    for k in ("velE", "velN", "velU"):
+        x = getattr(tr, "last_" + k)
+        assert got[k] == (None if x is None else pytest.approx(x, abs=0.005)), k
+
+
+def test_decode_rejects_unknown_layout():
+    t = tracker()
+    buf = bytearray(SIZE)
+    encode_into(buf, t)
+    with pytest.raises(ValueError):
+        decode(buf[:-1])
+    buf[0] = PROTO + 1
+    with pytest.raises(ValueError):
+        decode(buf)
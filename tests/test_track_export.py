@@ -0,0 +1,42 @@
+# tests/test_track_export.py — выгрузка истории трека, пока трекер её меняет
+
+import track_export
+from track_store import TrackHistory
+
+
+def fill(h, k0, n, lat0=1.0):
+    for k in range(k0, k0 + n):
+        h.append(1_400_000_000 + k, lat0 + k * 1e-4, 2.0 + k * 1e-5, 1000 + 5 * k, 5.0)
+
+
+def test_export_survives_compaction():
+    h = TrackHistory(size=64)
+    fill(h, 0, 60)
+    pts = track_export.history_points(h)
+    got = [next(pts) for _ in range(10)]
+    # буфер переполняется и прореживается посреди выгрузки
+    fill(h, 60, 40)
+    assert h.compactions
+    got += list(pts)
+    seqs = [p[0] for p in got]
+    assert seqs == sorted(set(seqs))
+    assert seqs[-1] == h.last_seq
+
+
+def test_export_stops_on_clear():
+    h = TrackHistory(size=64)
+    fill(h, 0, 20)
+    pts = track_export.history_points(h)
+    got = [next(pts) for _ in range(5)]
+    h.clear()
+    fill(h, 0, 20, lat0=-3.0)
+    assert list(pts) == []
+    assert all(p[2] > 0 for p in got)
+
+
+def test_gpx_document_is_complete():
+    h = TrackHistory(size=64)
+    fill(h, 0, 30)
+    doc = b"".join(bytes(c) for c in track_export.gpx(track_export.history_points(h), "M20 1234"))
+    assert doc.count(b"<trkpt ") == 30
+    assert doc.rstrip().endswith(b"</gpx>")
@@ -0,0 +1,172 @@
+# tests/test_track_store.py — история трека: смена зонда после потери
+
+import contextlib
+import io
+import math
+
+import sim
+from sim.clock import clock
+from sim.m20_gen import M20Signal
+from sim.rf import RfEnvironment, Transmitter
+from sonde_data import M20Frame
+from track_store import COMPACT_BUDGET, RUN_MAX, TrackHistory, TrackStore
+
+
+def frame(serial, k):
+    f = M20Frame()
+    f.serial = serial
+    f.week = 2300
+    f.tow = 1000.0 + k
+    f.lat = 1.0 + k * 1e-4
+    f.lon = 2.0
+    f.alt = 1000 + 5 * k
+    f.velE = f.velN = 0.0
+    f.velU = 5.0
+    f.batt_v = 3.0
+    return f
+
+
+def test_other_serial_skipped_while_tracking():
+    ts = TrackStore(history_size=64)
+    for k in range(5):
+        ts.update_from_frame(frame(0xA, k))
+    ts.update_from_frame(frame(0xB, 5))
+    h = ts.history
+    assert h.serial == 0xA
+    assert h.n == 5
+    assert h.skipped == 1
+
+
+def test_handover_after_lost():
+    ts = TrackStore(history_size=64)
+    h = ts.history
+    for k in range(5):
+        ts.update_from_frame(frame(0xA, k))
+    gen = h.gen
+    ts.lost()
+    # трек потерянного зонда доступен, пока не пришёл кадр другого
+    assert h.serial == 0xA and h.n == 5 and h.gen == gen
+    for k in range(3):
+        ts.update_from_frame(frame(0xB, 10 + k))
+    assert h.serial == 0xB
+    assert h.n == 3
+    assert h.gen == gen + 1
+    assert [h.point(i)[2] for i in range(h.n)] == [int(round((1.0 + k * 1e-4) * 1e6)) for k in (10, 11, 12)]
+    # прежний зонд теперь чужой
+    ts.update_from_frame(frame(0xA, 20))
+    assert h.serial == 0xB and h.n == 3
+
+
+def test_same_sonde_back_after_lost_keeps_track():
+    ts = TrackStore(history_size=64)
+    h = ts.history
+    for k in range(4):
+        ts.update_from_frame(frame(0xA, k))
+    ts.lost()
+    ts.update_from_frame(frame(0xA, 4))
+    ts.update_from_frame(frame(0xB, 5))
+    assert h.serial == 0xA
+    assert h.n == 5
+    assert h.skipped == 1
+
+
+def test_release_other_serial_is_ignored():
+    ts = TrackStore(history_size=64)
+    h = ts.history
+    ts.update_from_frame(frame(0xA, 0))
+    h.release(0xC)
+    ts.update_from_frame(frame(0xB, 1))
+    assert h.serial == 0xA
+
+
+def climb(h, k):
+    """Подъём со сносом и покачиванием: прореживанию есть что выбрасывать."""
+    h.append(1_400_000_000 + k, 50 + 3e-5 * k + 2e-3 * math.sin(k / 20),
+             30 + 5e-5 * k, 5 * k, 5.0)
+
+
+def count_dev(h):
+    calls = [0]
+    dev = h._dev
+
+    def counted(*args):
+        calls[0] += 1
+        return dev(*args)
+    h._dev = counted
+    return calls
+
+
+def test_compaction_steps_are_bounded():
+    """append() в колбэке кадра не прореживает; шаг главного цикла —
+    не больше COMPACT_BUDGET отклонений, буфер не доходит до края."""
+    assert COMPACT_BUDGET >= RUN_MAX
+    h = TrackHistory(size=256)
+    calls = count_dev(h)
+    worst = 0
+    for k in range(2000):
+        calls[0] = 0
+        climb(h, k)
+        assert calls[0] == 0
+        assert h.n < h.size
+        for _ in range(4):
+            calls[0] = 0
+            h.step()
+            worst = max(worst, calls[0])
+    assert h.compactions >= 8
+    assert 0 < worst <= COMPACT_BUDGET
+    seqs = [h.point(i)[0] for i in range(h.n)]
+    assert seqs == sorted(set(seqs))
+    assert seqs[-1] == h.last_seq
+    # свежая четверть — в полном разрешении
+    assert seqs[-h.size // 4:] == list(range(h.last_seq - h.size // 4 + 1, h.last_seq + 1))
+
+
+def test_append_finishes_compaction_without_main_loop():
+    h = TrackHistory(size=64)
+    for k in range(300):
+        climb(h, k)
+        assert h.n <= h.size
+    assert h.compactions >= 4
+    seqs = [h.point(i)[0] for i in range(h.n)]
+    assert seqs == sorted(set(seqs))
+    assert seqs[-1] == h.last_seq
+
+
+def test_clear_drops_pending_compaction():
+    h = TrackHistory(size=64)
+    for k in range(60):
+        climb(h, k)
+    assert h.compacting
+    h.clear()
+    assert not h.compacting
+    assert not h.step()
+    climb(h, 0)
+    assert h.n == 1
+
+
+def test_tracker_handover_in_simulator():
+    """Зонд A замолкает, через 5 с выходит B: трекер теряет A, находит B,
+    история и /track переходят на B."""
+    env = RfEnvironment(seed=3)
+    env.add(Transmitter(405_100_000, -80, M20Signal(serial=0xA1, seed=1).burst,
+                        phase_ms=300, stop_ms=20_000))
+    env.add(Transmitter(404_500_000, -80, M20Signal(serial=0xB2, seed=2).burst,
+                        phase_ms=700, start_ms=25_000))
+    sim.setup(env)
+    import main
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = main.Tracker()
+        t.start()
+        h = t.track.history
+        while clock.now_us < 18_000_000:
+            t.step()
+        assert t.state == "TRACK"
+        assert h.serial == 0xA1 and h.n > 5
+        gen = h.gen
+        while clock.now_us < 60_000_000:
+            t.step()
+    assert t.state == "TRACK"
+    assert t.track.last_serial == 0xB2
+    assert h.serial == 0xB2
+    assert h.gen == gen + 1
+    assert h.n > 5
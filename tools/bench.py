@@ -0,0 +1,443 @@
+# tools/bench.py — набор бенчмарков горячих путей (хост, CPython)
+#
+# Запуск:
+#   python tools/bench.py                         # все, результат в bench.json
+#   python tools/bench.py -k decoder -o new.json  # только совпадающие по имени
+#   python tools/bench.py --compare base.json new.json --threshold 0.10
+#
+# Для каждого пути — операций в секунду и байт, выделенных за операцию
+# (пик tracemalloc на одиночном вызове, усреднённый). compare сравнивает
+# два файла и возвращает код 1, если ops/s упал больше чем на threshold.
+# Пути, чья цена на устройстве — ожидание железа (SCAL, шина SPI), а не
+# Python, дают ещё sim_us_per_op: время по виртуальным часам симулятора
+# плюс передача байт SPI на частоте шины.
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+BENCHES = []
+
+
+def bench(name):
+    """Регистрирует фабрику: setup() -> (fn, ops_per_call[, sim_us])."""
+    def deco(setup):
+        BENCHES.append((name, setup))
+        return setup
+    return deco
+
+
+# ------------------------------------------------------------
+# Входные данные
+# ------------------------------------------------------------
+def _noise_bytes(n, seed=1):
+    rnd = random.Random(seed)
+    return bytes(rnd.getrandbits(8) for _ in range(n))
+
+
+def _valid_stream(n_frames=50):
+    from sim.m20_gen import M20Signal, bit_stream, pack_bytes
+    return b"".join(pack_bytes(bit_stream(M20Signal(), n_frames=n_frames)))
+
+
+def _frame():
+    from sim.m20_gen import M20Signal
+    return M20Signal().frame(7)
+
+
+def _sim_tracker():
+    """Tracker на симуляторе, после нескольких принятых кадров."""
+    import sim
+    from sim.clock import clock
+    from sim.rf import RfEnvironment, Transmitter
+    from sim.m20_gen import M20Signal
+    env = RfEnvironment()
+    env.add(Transmitter(405_100_000, -95, M20Signal().burst, phase_ms=200))
+    sim.setup(env)
+    import main
+    t = main.Tracker()
+    t.start()
+    t.set_fixed_frequency(405_100_000)
+    while clock.now_us < 3_500_000:
+        t.step()
+    return t
+
+
+# ------------------------------------------------------------
+# Декодер
+# ------------------------------------------------------------
+@bench("decoder.feed_byte.noise")
+def _b_feed_noise():
+    from m20_decoder import M20Decoder
+    data = _noise_bytes(4096)
+    dec = M20Decoder(lambda f: None)
+    feed = dec.feed_byte
+
+    def run():
+        for b in data:
+            feed(b)
+    return run, len(data)
+
+
+@bench("decoder.feed_byte.valid")
+def _b_feed_valid():
+    from m20_decoder import M20Decoder
+    data = _valid_stream(20)
+    dec = M20Decoder(lambda f: None)
+    feed = dec.feed_byte
+
+    def run():
+        for b in data:
+            feed(b)
+    return run, len(data)
+
+
+@bench("decoder.feed_bytes.valid")
+def _b_feed_bytes_valid():
+    from m20_decoder import M20Decoder
+    data = _valid_stream(20)
+    dec = M20Decoder(lambda f: None)
+    mv = memoryview(data)
+
+    def run():
+        dec.feed_bytes(mv)
+    return run, len(data)
+
+
+@bench("decoder._sync_match")
+def _b_sync_match():
+    from m20_decoder import M20Decoder
+    data = _noise_bytes(4096)
+    dec = M20Decoder(lambda f: None)
+    match = dec._sync_match
+
+    def run():
+        for b in data:
+            match(b)
+    return run, len(data)
+
+
+@bench("decoder.checkM10")
+def _b_checkm10():
+    from m20_decoder import checkM10
+    fr = _frame()
+    return (lambda: checkM10(fr)), 1
+
+
+@bench("decoder.checkM10_all_shifts")
+def _b_checkm10_all():
+    from m20_decoder import checkM10_all_shifts
+    fr = _frame()
+    return (lambda: checkM10_all_shifts(fr)), 1
+
+
+@bench("decoder._shift_frame_bits")
+def _b_shift():
+    from m20_decoder import M20Decoder
+    fr = _frame()
+    return (lambda: M20Decoder._shift_frame_bits(fr, 3)), 1
+
+
+@bench("sonde_data.parse_m20")
+def _b_parse():
+    from sonde_data import parse_m20
+    fr = _frame()
+    return (lambda: parse_m20(fr)), 1
+
+
+# ------------------------------------------------------------
+# Трек / радио
+# ------------------------------------------------------------
+class _ConstRadio:
+    """Источник RSSI без SPI — меряется только математика TrackStore."""
+
+    def __init__(self):
+        self.v = -100.0
+
+    def read_rssi_dbm(self):
+        self.v = -100.0 if self.v > -90 else self.v + 0.5
+        return self.v
+
+
+@bench("track_store.update_rssi")
+def _b_update_rssi():
+    from track_store import TrackStore
+    ts = TrackStore()
+    radio = _ConstRadio()
+    return (lambda: ts.update_rssi(radio)), 1
+
+
+@bench("track_store.history.append")
+def _b_history():
+    from track_store import TrackHistory
+    h = TrackHistory(1024)
+    k = [0]
+
+    def run():
+        # подъём со сносом и покачиванием; прореживание — шагами главного
+        # цикла между кадрами, в среднем на точку
+        for _ in range(256):
+            i = k[0]
+            k[0] = i + 1
+            h.append(1_400_000_000 + i, 50 + 3e-5 * i + 2e-3 * math.sin(i / 200),
+                     30 + 5e-5 * i, 5 * (i % 6000), 5.0)
+            for _ in range(8):
+                h.step()
+    return run, 256
+
+
+@bench("sonde_registry.update")
+def _b_registry():
+    from sonde_data import parse_m20
+    from sonde_registry import SondeRegistry
+    reg = SondeRegistry(16)
+    frames = []
+    for k in range(32):
+        fr = parse_m20(_frame())
+        fr.serial = 0x1000 + k
+        frames.append(fr)
+
+    def run():
+        # 32 зонда на 16 записей — каждое обновление с вытеснением
+        for fr in frames:
+            reg.update(fr, 405_100_000, -95.0, 12.0, 0)
+    return run, len(frames)
+
+
+@bench("cc1101._calc_freq_regs")
+def _b_calc_freq():
+    from cc1101 import CC1101Radio
+    f = CC1101Radio._calc_freq_regs
+    return (lambda: f(None, 405_100_000)), 1
+
+
+@bench("cc1101._calc_drate_regs")
+def _b_calc_drate():
+    from cc1101 import CC1101Radio
+    f = CC1101Radio._calc_drate_regs
+    return (lambda: f(None, 9600)), 1
+
+
+@bench("cc1101._calc_rx_bw_regs")
+def _b_calc_bw():
+    from cc1101 import CC1101Radio
+    f = CC1101Radio._calc_rx_bw_regs
+    return (lambda: f(None, 100_000)), 1
+
+
+@bench("cc1101._calc_deviation_regs")
+def _b_calc_dev():
+    from cc1101 import CC1101Radio
+    f = CC1101Radio._calc_deviation_regs
+    return (lambda: f(None, 40_000)), 1
+
+
+def _sim_radio(cached):
+    """CC1101Radio на симуляторе; cached — с кэшем калибровки по плану скана."""
+    import sim
+    from cc1101 import CC1101Radio
+    from config import SCAN_START_HZ, SCAN_END_HZ, SCAN_STEP_HZ
+    sim_r = sim.setup()
+    r = CC1101Radio()
+    r.sim = sim_r
+    r.configure_m20()
+    if cached:
+        r.build_cal_cache(SCAN_START_HZ, SCAN_END_HZ, SCAN_STEP_HZ)
+    r.enter_rx()
+    freqs = [SCAN_START_HZ + i * SCAN_STEP_HZ
+             for i in range((SCAN_END_HZ - SCAN_START_HZ) // SCAN_STEP_HZ + 1)]
+    return r, freqs
+
+
+def _radio_us(r):
+    """Счётчик «времени устройства», мкс: виртуальные часы (ожидание SCAL)
+    + байты SPI на частоте шины."""
+    from sim.clock import clock
+    us_per_byte = 8e6 / r.spi.baudrate
+    return lambda: clock.now_us + r.sim.spi_bytes * us_per_byte
+
+
+@bench("cc1101.set_frequency.cached")
+def _b_hop_cached():
+    r, freqs = _sim_radio(True)
+
+    def run():
+        for f in freqs:
+            r.set_frequency(f)
+    return run, len(freqs), _radio_us(r)
+
+
+@bench("cc1101.set_frequency.scal")
+def _b_hop_scal():
+    r, freqs = _sim_radio(False)
+
+    def run():
+        for f in freqs:
+            r.set_frequency(f)
+    return run, len(freqs), _radio_us(r)
+
+
+@bench("cc1101.read_rssi_dbm")
+def _b_read_rssi():
+    r, _ = _sim_radio(False)
+    return r.read_rssi_dbm, 1
+
+
+@bench("cc1101.init")
+def _b_radio_init():
+    r, _ = _sim_radio(False)
+
+    def run():
+        r._basic_init()
+        r.configure_m20()
+    return run, 1
+
+
+# ------------------------------------------------------------
+# Web
+# ------------------------------------------------------------
+@bench("web_ui.status_json")
+def _b_status_json():
+    import status_snapshot
+    t = _sim_tracker()
+
+    def run():
+        status_snapshot.json.dumps(status_snapshot.build_status(t)).encode()
+    return run, 1
+
+
+@bench("status_bin.encode_into")
+def _b_status_bin():
+    import status_bin
+    t = _sim_tracker()
+    buf = bytearray(status_bin.SIZE)
+
+    def run():
+        status_bin.encode_into(buf, t, 1)
+    return run, 1
+
+
+@bench("status_snapshot.publish_unchanged")
+def _b_status_publish():
+    t = _sim_tracker()
+    pub = t.status
+    now = pub.publish().ms + pub.min_ms
+
+    def run():
+        pub.publish(now)
+    return run, 1
+
+
+# ------------------------------------------------------------
+# Измерение
+# ------------------------------------------------------------
+def measure(fn, ops_per_call, min_time):
+    fn()                       # прогрев
+    calls = 0
+    t0 = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        dt = time.perf_counter() - t0
+        if dt >= min_time:
+            break
+    ops_per_s = calls * ops_per_call / dt
+
+    # выделения памяти: пик на одиночном вызове, среднее по нескольким
+    tracemalloc.start()
+    total = 0
+    reps = 20
+    for _ in range(reps):
+        cur0 = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - cur0
+    tracemalloc.stop()
+    return ops_per_s, total / reps / ops_per_call
+
+
+def sim_cost(fn, ops_per_call, sim_us):
+    """Время устройства на операцию, мкс (один вызов fn)."""
+    t0 = sim_us()
+    fn()
+    return (sim_us() - t0) / ops_per_call
+
+
+def run_all(pattern, min_time):
+    results = {}
+    for name, setup in BENCHES:
+        if pattern and pattern not in name:
+            continue
+        fn, ops, *dev = setup()
+        ops_s, alloc = measure(fn, ops, min_time)
+        results[name] = {"ops_per_s": ops_s, "alloc_bytes_per_op": alloc}
+        line = "%-32s %14.0f ops/s %10.1f B/op" % (name, ops_s, alloc)
+        if dev:
+            us = sim_cost(fn, ops, dev[0])
+            results[name]["sim_us_per_op"] = us
+            line += " %10.1f sim us/op" % us
+        print(line)
+    return results
+
+
+def compare(base_path, new_path, threshold):
+    with open(base_path) as f:
+        base = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    bad = 0
+    for name in sorted(set(base) | set(new)):
+        if name not in base or name not in new:
+            print("%-32s %s" % (name, "only in " + ("new" if name in new else "base")))
+            continue
+        b = base[name]["ops_per_s"]
+        n = new[name]["ops_per_s"]
+        ratio = n / b if b else 0.0
+        flag = ""
+        if ratio < 1.0 - threshold:
+            flag = "  REGRESSION"
+            bad += 1
+        # время устройства: рост больше threshold — тоже регрессия
+        bs = base[name].get("sim_us_per_op")
+        ns = new[name].get("sim_us_per_op")
+        if bs and ns and ns > bs * (1.0 + threshold):
+            flag += "  SIM REGRESSION %.1f -> %.1f us" % (bs, ns)
+            bad += 1
+        print("%-32s %12.0f -> %12.0f  x%.2f%s" % (name, b, n, ratio, flag))
+    return 1 if bad else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="hot-path benchmarks")
+    ap.add_argument("-k", dest="pattern", default="", help="подстрока имени")
+    ap.add_argument("-o", dest="out", default="bench.json")
+    ap.add_argument("--min-time", type=float, default=0.3, help="секунд на бенчмарк")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    ap.add_argument("--threshold", type=float, default=0.10)
+    args = ap.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    results = run_all(args.pattern, args.min_time)
+    meta = {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1, sort_keys=True)
+    print("saved", args.out)
+
+
+if __name__ == "__main__":
+    main()
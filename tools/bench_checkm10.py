@@ -0,0 +1,121 @@
+# tools/bench_checkm10.py — сравнение скорости CHECKM10 (хост, CPython)
+#
+# Запуск:  python tools/bench_checkm10.py [--frames N] [--len L]
+#
+# Сравнивает бит-серийную реализацию (как было в m20_decoder до перехода
+# на таблицы) с табличной update_checkM10/checkM10 и с checkM10_all_shifts.
+# Результат — кадров в секунду для одиночной проверки и для полного
+# перебора 8 битовых сдвигов (случай CRC-ошибки, самый дорогой).
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from m20_decoder import M20Decoder, checkM10, checkM10_all_shifts  # noqa: E402
+
+
+# ------------------------------------------------------------
+# Эталон: бит-серийный CHECKM10 (прежняя реализация)
+# ------------------------------------------------------------
+def ref_update_checkM10(c, b):
+    b &= 0xFF
+    b = ((b >> 1) | ((b & 1) << 7)) & 0xFF
+    b ^= (b >> 2) & 0xFF
+    c ^= b
+    for _ in range(8):
+        fb = c & 1
+        c >>= 1
+        if fb:
+            c ^= 0x98
+    return c & 0xFF
+
+
+def ref_checkM10(frame):
+    if len(frame) < 2:
+        return False
+    cs = 0
+    for b in frame[:-1]:
+        cs = ref_update_checkM10(cs, b)
+    return cs == frame[-1]
+
+
+def ref_all_shifts(frame):
+    """Прежний _handle_frame: 8 сдвинутых копий + 8 полных проходов."""
+    mask = 0
+    for shift in range(8):
+        if ref_checkM10(M20Decoder._shift_frame_bits(frame, shift)):
+            mask |= 1 << shift
+    return mask
+
+
+def lut_all_shifts_loop(frame):
+    """Табличный CRC, но всё ещё 8 сдвинутых копий."""
+    mask = 0
+    for shift in range(8):
+        if checkM10(M20Decoder._shift_frame_bits(frame, shift)):
+            mask |= 1 << shift
+    return mask
+
+
+def make_frames(count, length, seed=1):
+    rnd = random.Random(seed)
+    frames = []
+    for i in range(count):
+        body = bytes(rnd.randrange(256) for _ in range(length - 1))
+        cs = 0
+        for b in body:
+            cs = ref_update_checkM10(cs, b)
+        # половина кадров с верным CRC, половина — битые
+        if i & 1:
+            cs ^= 0x5A
+        frames.append(body + bytes([cs]))
+    return frames
+
+
+def bench(fn, frames, min_time=0.5):
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for f in frames:
+            fn(f)
+        n += len(frames)
+        dt = time.perf_counter() - t0
+        if dt >= min_time:
+            return n / dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CHECKM10 benchmark")
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--len", type=int, default=101, help="длина кадра, байт")
+    args = ap.parse_args()
+
+    frames = make_frames(args.frames, args.len)
+
+    # сначала — совпадение результатов
+    for f in frames:
+        assert checkM10(f) == ref_checkM10(f)
+        assert checkM10_all_shifts(f) == ref_all_shifts(f)
+
+    rows = [
+        ("checkM10 bit-serial (ref)", ref_checkM10),
+        ("checkM10 LUT", checkM10),
+        ("8 shifts, bit-serial (ref)", ref_all_shifts),
+        ("8 shifts, LUT + copies", lut_all_shifts_loop),
+        ("checkM10_all_shifts", checkM10_all_shifts),
+    ]
+    base = {}
+    print("frame length %d bytes" % args.len)
+    for name, fn in rows:
+        fps = bench(fn, frames)
+        key = "single" if "8" not in name and "all" not in name else "shifts"
+        base.setdefault(key, fps)
+        print("%-28s %10.0f frames/s  x%.1f" % (name, fps, fps / base[key]))
+
+
+if __name__ == "__main__":
+    main()
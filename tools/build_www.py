@@ -0,0 +1,82 @@
+# tools/build_www.py — сборка статики Web UI в gzip-ассеты для флеша
+#
+# Запуск:  python tools/build_www.py [--src web] [--out www]
+#
+# Каждый файл из web/ сжимается gzip (mtime=0 — одинаковый результат на
+# каждой сборке) в www/<имя>.gz; в app.js подставляется раскладка
+# status_bin (FIELDS, PROTO). Манифест www/assets.json: URL → файл,
+# Content-Type, ETag (crc32 сжатых байт), Cache-Control, размер. Каталог
+# www/ копируется на устройство в /www рядом с .py (WEB_ASSET_DIR);
+# web_ui отдаёт файлы как есть с Content-Encoding: gzip.
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import zlib
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import status_bin  # noqa: E402
+
+TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".json": "application/json",
+}
+
+# браузер каждый раз переспрашивает по ETag — на повторной загрузке 304
+CACHE = "no-cache"
+
+
+def render(name, data):
+    """Подстановки времени сборки."""
+    if name.endswith(".js"):
+        data = data.replace(b"{{BIN_FIELDS}}", status_bin.JS_FIELDS.encode())
+        data = data.replace(b"{{BIN_PROTO}}", str(status_bin.PROTO).encode())
+    return data
+
+
+def build(src, out):
+    os.makedirs(out, exist_ok=True)
+    manifest = {}
+    total_raw = total_gz = 0
+    for name in sorted(os.listdir(src)):
+        ext = os.path.splitext(name)[1]
+        if ext not in TYPES:
+            continue
+        with open(os.path.join(src, name), "rb") as f:
+            raw = render(name, f.read())
+        gz = gzip.compress(raw, 9, mtime=0)
+        with open(os.path.join(out, name + ".gz"), "wb") as f:
+            f.write(gz)
+        manifest["/" + name] = {
+            "file": name + ".gz",
+            "type": TYPES[ext],
+            "etag": "%08x" % zlib.crc32(gz),
+            "cache": CACHE,
+            "size": len(gz),
+        }
+        total_raw += len(raw)
+        total_gz += len(gz)
+        print("%-16s %6d -> %5d B" % (name, len(raw), len(gz)))
+    with open(os.path.join(out, "assets.json"), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    print("%-16s %6d -> %5d B" % ("total", total_raw, total_gz))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="build gzip web assets")
+    ap.add_argument("--src", default=os.path.join(ROOT, "web"))
+    ap.add_argument("--out", default=os.path.join(ROOT, "www"))
+    args = ap.parse_args()
+    build(args.src, args.out)
+
+
+if __name__ == "__main__":
+    main()
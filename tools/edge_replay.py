@@ -0,0 +1,101 @@
+# tools/edge_replay.py — восстановление бит по фронтам GDO0 на хосте
+#
+# Запуск:
+#   python tools/edge_replay.py --edges edges.txt   # записанный список фронтов
+#   python tools/edge_replay.py                     # синтетика: BER и цена на фронт
+#
+# Формат записи: по строке на фронт "t_us level" (t_us — ticks_us(),
+# level — уровень GDO0 после фронта). Восстановленные байты прогоняются
+# через M20Decoder, печатаются валидные кадры.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bit_sync import EdgeBitSlicer, TICKS_MASK  # noqa: E402
+from bench_clock_recovery import ber  # noqa: E402
+from m20_decoder import M20Decoder  # noqa: E402
+
+BITRATE = 9600
+
+
+def load_edges(path):
+    times = []
+    levels = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            t, lv = line.split()[:2]
+            times.append(int(t) & TICKS_MASK)
+            levels.append(int(lv) & 1)
+    return times, levels
+
+
+def synth_edges(n_bits, ppm, jitter, seed=1):
+    """Фронты NRZ-потока со сдвигом скорости и джиттером, как от ticks_us()."""
+    rnd = random.Random(seed)
+    bits = [rnd.getrandbits(1) for _ in range(n_bits)]
+    bit_us = 1e6 / (BITRATE * (1 + ppm * 1e-6))
+    times = [0]
+    levels = [bits[0]]
+    for i in range(1, n_bits):
+        if bits[i] != bits[i - 1]:
+            t = i * bit_us + rnd.gauss(0, jitter * bit_us)
+            times.append(int(t + 1000) & TICKS_MASK)
+            levels.append(bits[i])
+    # замыкающий фронт, чтобы последний участок тоже был отдан
+    times.append(int(n_bits * bit_us + 1000) & TICKS_MASK)
+    levels.append(bits[-1] ^ 1)
+    times[0] = 1000
+    return bits, times, levels
+
+
+def slice_bits(times, levels):
+    out = []
+    sl = EdgeBitSlicer(out.append, BITRATE)
+    t0 = time.perf_counter()
+    sl.push_edges(times, levels)
+    dt = time.perf_counter() - t0
+    bits = []
+    for b in out:
+        for k in range(7, -1, -1):
+            bits.append((b >> k) & 1)
+    return bits, out, dt, sl
+
+
+def main():
+    ap = argparse.ArgumentParser(description="GDO0 edge list → bits → M20 frames")
+    ap.add_argument("--edges", help="файл фронтов 't_us level'")
+    ap.add_argument("--bits", type=int, default=20000)
+    ap.add_argument("--jitter", type=float, default=0.05)
+    args = ap.parse_args()
+
+    if args.edges:
+        times, levels = load_edges(args.edges)
+        _, data, dt, sl = slice_bits(times, levels)
+        frames = []
+        dec = M20Decoder(frames.append)
+        dec.feed_bytes(data)
+        print("edges=%d bytes=%d glitches=%d long_runs=%d  %.2f us/edge" % (
+            len(times), len(data), sl.glitches, sl.long_runs, dt * 1e6 / max(1, len(times))))
+        print("sync_hits=%d frames valid=%d crc_fail=%d" % (
+            dec.sync_hits, dec.frames_valid, dec.frames_crc_fail))
+        for fr in frames:
+            print(fr.hex())
+        return
+
+    print("%6s %7s %9s %9s" % ("ppm", "jitter", "BER", "us/edge"))
+    for ppm in (0, 300, -1000, 2000):
+        ref, times, levels = synth_edges(args.bits, ppm, args.jitter)
+        got, _, dt, _ = slice_bits(times, levels)
+        print("%6d %7.2f %9.4f %9.2f" % (ppm, args.jitter, ber(ref, got), dt * 1e6 / len(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# tools/m20_batch.py — пакетный разбор архивов записей на нескольких процессах
+#
+# Запуск:  python tools/m20_batch.py captures/ [more/*.bin] [-j 8] [-o tracks/]
+#                                    [--format csv|gpx|kml]
+#
+# Вход — каталоги и/или маски файлов: голые потоки байт (replay_log --dump)
+# и каталоги сегментов raw_log (rawNNNN.bin подряд = один непрерывный поток).
+# Каждый источник режется на куски (шарды): голый файл — по SHARD_BYTES,
+# поток сегментов — по сегменту. К шарду добавляется OVERLAP байт следующего,
+# чтобы кадр на стыке целиком попал в шард, где начинается его sync;
+# этому шарду кадр и принадлежит. Шарды разбираются m20_offline.decode в пуле
+# процессов, результаты сливаются с дедупликацией по (serial, week, tow)
+# и раскладываются в трек по каждому зонду, упорядоченный по времени GPS.
+
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import m20_offline  # noqa: E402
+import track_export  # noqa: E402
+from m20_decoder import MAX_FRAME_LEN, SYNC_LEN  # noqa: E402
+from raw_log import SEG_MAGIC, read_segment  # noqa: E402
+
+SHARD_BYTES = 8 << 20
+SYNC_BITS = SYNC_LEN * 8
+# sync + самый длинный кадр + байт на битовую фазу
+OVERLAP = SYNC_LEN + MAX_FRAME_LEN + 1
+
+TRACK_FIELDS = ("week", "tow", "lat", "lon", "alt", "velE", "velN", "velU",
+                "batt_v", "file", "bit")
+
+
+# ------------------------------------------------------------
+# Источники и шарды
+# ------------------------------------------------------------
+def _is_segment(path):
+    with open(path, "rb") as f:
+        return f.read(4) == SEG_MAGIC
+
+
+def collect(paths):
+    """Список источников: ("raw", файл) или ("seg", [сегменты по порядку])."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(os.path.join(p, nm) for nm in os.listdir(p)
+                                if nm.endswith(".bin")))
+        else:
+            files.extend(sorted(glob.glob(p)))
+
+    sources = []
+    segs = {}
+    for f in files:
+        if os.path.getsize(f) == 0:
+            continue
+        if _is_segment(f):
+            segs.setdefault(os.path.dirname(f), []).append(f)
+        else:
+            sources.append(("raw", f))
+    for d in sorted(segs):
+        sources.append(("seg", sorted(segs[d])))
+    return sources
+
+
+def shards(sources, shard_bytes=SHARD_BYTES):
+    """Задания для пула: (вид, файл, начало, конец, следующий сегмент, есть ли
+    у шарда предшественник в том же потоке)."""
+    out = []
+    for kind, src in sources:
+        if kind == "raw":
+            size = os.path.getsize(src)
+            for a in range(0, size, shard_bytes):
+                out.append(("raw", src, a, min(a + shard_bytes, size), None, a > 0))
+        else:
+            for i, f in enumerate(src):
+                nxt = src[i + 1] if i + 1 < len(src) else None
+                out.append(("seg", f, 0, None, nxt, i > 0))
+    return out
+
+
+def _segment_data(path):
+    return b"".join(bytes(d) for _, _, d in read_segment(path))
+
+
+def _load(task):
+    """Байты шарда и граница владения (в байтах от начала шарда)."""
+    kind, path, a, b, nxt, _ = task
+    if kind == "raw":
+        with open(path, "rb") as f:
+            f.seek(a)
+            return f.read(b - a + OVERLAP), b - a
+    data = _segment_data(path)
+    own = len(data)
+    if nxt is not None:
+        data += _segment_data(nxt)[:OVERLAP]
+    return data, own
+
+
+# ------------------------------------------------------------
+# Разбор шарда (в процессе пула)
+# ------------------------------------------------------------
+def decode_shard(task):
+    t0 = time.process_time()
+    data, own = _load(task)
+    recs, _, st = m20_offline.decode(data)
+    path, a, head = task[1], task[2], task[5]
+    limit = own * 8
+    keep = []
+    for r in recs:
+        sync_at = r["bit"] - SYNC_BITS
+        # sync в перекрытии — кадр следующего шарда; sync до начала шарда —
+        # предыдущего (он видит кадр целиком в своём перекрытии)
+        if sync_at >= limit or (head and sync_at < 0):
+            continue
+        r["file"] = path
+        r["bit"] += a * 8
+        keep.append(r)
+    return {"task": task, "bytes": own, "records": keep, "stats": st,
+            "cpu": time.process_time() - t0}
+
+
+# ------------------------------------------------------------
+# Слияние
+# ------------------------------------------------------------
+def merge(results):
+    """Треки {serial: [записи по (week, tow)]} и число отброшенных дублей."""
+    seen = {}
+    dups = 0
+    for res in results:
+        for r in res["records"]:
+            key = (r["serial"], r["week"], r["tow"])
+            if key in seen:
+                dups += 1
+                continue
+            seen[key] = r
+    tracks = {}
+    for r in seen.values():
+        tracks.setdefault(r["serial"], []).append(r)
+    for pts in tracks.values():
+        pts.sort(key=lambda r: (r["week"], r["tow"]))
+    return tracks, dups
+
+
+def write_tracks(tracks, out_dir, fmt="csv"):
+    os.makedirs(out_dir, exist_ok=True)
+    for serial, pts in sorted(tracks.items()):
+        if fmt != "csv":
+            # GPX/KML — те же генераторы, что отдают трек из Web UI
+            gen = track_export.FORMATS[fmt][0]
+            with open(os.path.join(out_dir, "%s.%s" % (serial, fmt)), "wb") as f:
+                for part in gen(track_export.records_points(pts), "M20 %s" % serial):
+                    f.write(part)
+            continue
+        with open(os.path.join(out_dir, "%s.csv" % serial), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(TRACK_FIELDS)
+            for r in pts:
+                w.writerow([r[k] for k in TRACK_FIELDS])
+
+
+def run(paths, jobs=None, shard_bytes=SHARD_BYTES, quiet=False):
+    tasks = shards(collect(paths), shard_bytes)
+    total = 0
+    for t in tasks:
+        total += (t[3] - t[2]) if t[0] == "raw" else os.path.getsize(t[1])
+    jobs = jobs or os.cpu_count() or 1
+
+    results = []
+    done = 0
+    frames = 0
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(jobs) as pool:
+        for res in pool.imap_unordered(decode_shard, tasks):
+            results.append(res)
+            done += res["bytes"]
+            frames += len(res["records"])
+            if not quiet:
+                dt = time.perf_counter() - t0
+                print("\r%d/%d shards  %.1f/%.1f MB  %.1f MB/s  %.0f frames/s " % (
+                    len(results), len(tasks), done / 1e6, total / 1e6,
+                    done / 1e6 / dt if dt else 0.0, frames / dt if dt else 0.0),
+                    end="", file=sys.stderr)
+    wall = time.perf_counter() - t0
+
+    tracks, dups = merge(results)
+    summary = {
+        "shards": len(tasks),
+        "jobs": jobs,
+        "bytes": done,
+        "wall_s": wall,
+        "cpu_s": sum(r["cpu"] for r in results),
+        "mb_s": done / 1e6 / wall if wall else 0.0,
+        "frames": frames,
+        "frames_s": frames / wall if wall else 0.0,
+        "duplicates": dups,
+        "sondes": {s: len(p) for s, p in tracks.items()},
+    }
+    if not quiet:
+        print(file=sys.stderr)
+        print("%d shards on %d processes: %.1f MB in %.2f s (%.1f MB/s, %.0f frames/s, "
+              "cpu %.2f s), duplicates %d" % (
+                  summary["shards"], jobs, done / 1e6, wall, summary["mb_s"],
+                  summary["frames_s"], summary["cpu_s"], dups), file=sys.stderr)
+        for s, pts in sorted(tracks.items()):
+            print("SN %s: %d points, tow %.0f .. %.0f" % (
+                s, len(pts), pts[0]["tow"], pts[-1]["tow"]), file=sys.stderr)
+    return tracks, summary
+
+
+def main():
+    ap = argparse.ArgumentParser(description="batch offline M20 decoding")
+    ap.add_argument("paths", nargs="+", help="каталоги и/или маски файлов")
+    ap.add_argument("-j", "--jobs", type=int, default=0, help="процессов (по умолчанию — все ядра)")
+    ap.add_argument("-o", "--out", help="каталог для треков <serial>.csv/.gpx/.kml")
+    ap.add_argument("--format", choices=("csv", "gpx", "kml"), default="csv")
+    ap.add_argument("--shard-mb", type=float, default=SHARD_BYTES / (1 << 20))
+    args = ap.parse_args()
+
+    tracks, _ = run(args.paths, args.jobs or None, int(args.shard_mb * (1 << 20)))
+    if args.out:
+        write_tracks(tracks, args.out, args.format)
+
+
+if __name__ == "__main__":
+    main()
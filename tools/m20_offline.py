@@ -0,0 +1,350 @@
+# tools/m20_offline.py — офлайн-разбор длинных записей GDO0 на NumPy
+#
+# Запуск:  python tools/m20_offline.py capture.bin [-o frames.csv] [--jsonl]
+#          python tools/m20_offline.py rawlog/raw0003.bin --verify
+#
+# Вход — голый поток байт (tools/replay_log.py --dump) или сегмент raw_log
+# (определяется по magic "M20L"). Голый файл отображается через mmap.
+#
+# Результат совпадает с потоковым M20Decoder бит в бит:
+#   1. sync-слово коррелируется на КАЖДОМ битовом смещении за один
+#      векторный проход (окно 32 бит из 5 байт, popcount(xor)) → кандидаты;
+#   2. короткий последовательный проход по кандидатам повторяет автомат
+#      декодера: после кадра (или плохой длины) коррелятор сброшен в ноль
+#      и поиск идёт с границы следующего сырого байта, поэтому первые 31
+#      бит после сброса проверяются отдельно, с нулями в регистре;
+#   3. CHECKM10 считается пачкой: кадры одной длины — строки матрицы,
+#      таблицы _CM10_PRE/_CM10_FB применяются к столбцу сразу для всех;
+#   4. parse_m20 — только для кадров с верным CRC.
+# --verify прогоняет тот же файл через M20Decoder и сравнивает.
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from m20_decoder import (  # noqa: E402
+    SYNC,
+    SYNC_HAMMING_THRESH,
+    MIN_FRAME_LEN,
+    MAX_FRAME_LEN,
+    _CM10_PRE,
+    _CM10_FB,
+    M20Decoder,
+)
+from raw_log import SEG_MAGIC, read_segment  # noqa: E402
+from sonde_data import parse_m20  # noqa: E402
+
+SYNC_WORD = int.from_bytes(SYNC, "big")
+CHUNK = 1 << 16         # байт на векторный проход (рабочие массивы в кэше)
+
+PRE = np.frombuffer(_CM10_PRE, dtype=np.uint8)
+FB = np.frombuffer(_CM10_FB, dtype=np.uint8)
+
+FIELDS = ("bit", "serial", "week", "tow", "lat", "lon", "alt",
+          "velE", "velN", "velU", "batt_v")
+
+
+# ------------------------------------------------------------
+# Вход
+# ------------------------------------------------------------
+def load_capture(path):
+    """Поток байт записи: mmap для голого файла, склейка блоков для сегмента."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+        if head == SEG_MAGIC:
+            return b"".join(bytes(d) for _, _, d in read_segment(path))
+        if not head:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# ------------------------------------------------------------
+# 1. Векторная корреляция sync
+# ------------------------------------------------------------
+def _sync_tables():
+    """Ошибки байта v на месте k (0..4) 40-битного окна для всех 8 битовых
+    фаз сразу: фаза t — в байте t uint64 (не больше 8 на байт).
+    Места 0+1 и 2+3 сведены в таблицы по паре байт (65536 записей)."""
+    tab = [[0] * 256 for _ in range(5)]
+    for t in range(8):
+        s = SYNC_WORD << (7 - t)
+        m = 0xFFFFFFFF << (7 - t)
+        for k in range(5):
+            sb = (s >> 8 * (4 - k)) & 0xFF
+            mb = (m >> 8 * (4 - k)) & 0xFF
+            row = tab[k]
+            for v in range(256):
+                row[v] += bin((v ^ sb) & mb).count("1") << 8 * t
+    t = np.array(tab, dtype=np.uint64)
+    t01 = (t[0][:, None] + t[1][None, :]).reshape(-1)
+    t23 = (t[2][:, None] + t[3][None, :]).reshape(-1)
+    return t01, t23, t[4].copy()
+
+
+_SYNC_T01, _SYNC_T23, _SYNC_T4 = _sync_tables()
+_LANE_HI = np.uint64(0x8080808080808080)
+
+
+def sync_candidates(data, thresh=SYNC_HAMMING_THRESH):
+    """Номера бит (последний бит sync), где окно 32 бит в пределах порога.
+
+    Окно на байте j — 40 бит из байт j-4..j, фаза t (0..7) — конец sync
+    на бите t байта j. Расстояние Хэмминга раскладывается по байтам окна,
+    поэтому для всех 8 фаз оно считается тремя выборками из таблиц и
+    сложениями в uint64 (по фазе на байт). Порог проверяется по старшему
+    биту байта после прибавления 0x80 - (thresh + 1).
+    Перед началом потока — 4 нулевых байта, как обнулённый регистр
+    коррелятора на старте.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    n = len(raw)
+    bias = np.uint64((0x80 - thresh - 1) * 0x0101010101010101)
+    idx_buf = np.zeros(CHUNK + 4, dtype=np.intp)
+    pair_buf = np.empty(CHUNK + 3, dtype=np.intp)
+    acc = np.empty(CHUNK, dtype=np.uint64)
+    tmp = np.empty(CHUNK, dtype=np.uint64)
+    hit = np.empty(CHUNK, dtype=bool)
+    out = []
+    for start in range(0, n, CHUNK):
+        cnt = min(CHUNK, n - start)
+        idx = idx_buf[:cnt + 4]
+        if start:
+            idx[:] = raw[start - 4:start + cnt]
+        else:
+            idx[4:] = raw[:cnt]
+        pair = pair_buf[:cnt + 3]
+        np.left_shift(idx[:-1], 8, out=pair)
+        np.bitwise_or(pair, idx[1:], out=pair)
+
+        d = acc[:cnt]
+        t = tmp[:cnt]
+        np.take(_SYNC_T01, pair[:cnt], out=d)
+        np.take(_SYNC_T23, pair[2:2 + cnt], out=t)
+        np.add(d, t, out=d)
+        np.take(_SYNC_T4, idx[4:], out=t)
+        np.add(d, t, out=d)
+        np.add(d, bias, out=d)
+        np.bitwise_and(d, _LANE_HI, out=d)
+        h = hit[:cnt]
+        np.not_equal(d, _LANE_HI, out=h)
+        j = np.flatnonzero(h)
+        if not len(j):
+            continue
+        v = d[j]
+        for ph in range(8):
+            sel = (v & np.uint64(0x80 << 8 * ph)) == 0
+            if sel.any():
+                out.append((start + j[sel]) * 8 + ph)
+    if not out:
+        return np.zeros(0, dtype=np.int64)
+    hits = np.concatenate(out)
+    hits.sort()
+    return hits
+
+
+# ------------------------------------------------------------
+# 2. Автомат декодера по кандидатам
+# ------------------------------------------------------------
+def _first_reachable(thresh):
+    """Наименьшее q, при котором окно из q+1 свежих бит и нулей вообще
+    может пройти порог: нули сверху уже дают popcount(SYNC >> (q+1)) ошибок."""
+    q = 0
+    while q < 31 and (SYNC_WORD >> (q + 1)).bit_count() > thresh:
+        q += 1
+    return q
+
+
+def _sync_after_reset(data, p, thresh, q0=0):
+    """Первые 31 бит поиска после сброса: регистр дополнен нулями."""
+    b0 = p >> 3
+    raw = data[b0:b0 + 4]
+    v = int.from_bytes(raw, "big") << 8 * (4 - len(raw))
+    sw = SYNC_WORD
+    for q in range(q0, min(31, len(raw) * 8)):
+        if ((v >> (31 - q)) ^ sw).bit_count() <= thresh:
+            return p + q
+    return -1
+
+
+def _aligned(data, bit, nbytes):
+    """nbytes байт потока, начиная с бита bit (MSB first)."""
+    b0 = bit >> 3
+    sh = bit & 7
+    raw = data[b0:b0 + nbytes + 1]
+    v = int.from_bytes(raw, "big") << 8 * (nbytes + 1 - len(raw))
+    v >>= 8 - sh
+    return (v & ((1 << 8 * nbytes) - 1)).to_bytes(nbytes, "big")
+
+
+def scan(data, cand=None, thresh=SYNC_HAMMING_THRESH):
+    """Кадры-кандидаты в порядке потока: [(бит начала кадра, bytes)], статистика."""
+    if cand is None:
+        cand = sync_candidates(data, thresh)
+    nbits = len(data) * 8
+    st = {"sync_hits": 0, "frames_total": 0, "frames_bad_len": 0}
+    frames = []
+    p = 0
+    nc = len(cand)
+    q0 = _first_reachable(thresh)
+    while p < nbits:
+        i = _sync_after_reset(data, p, thresh, q0)
+        if i < 0:
+            # дальше окно целиком из свежих бит — годятся кандидаты
+            ci = int(np.searchsorted(cand, p + 31))
+            if ci >= nc:
+                break
+            i = int(cand[ci])
+        st["sync_hits"] += 1
+        start = i + 1
+        if start + 8 > nbits:
+            break
+        b0 = start >> 3
+        sh = start & 7
+        if sh:
+            total = (((data[b0] << 8) | data[b0 + 1]) >> (8 - sh) & 0xFF) + 1
+        else:
+            total = data[b0] + 1
+        if not (MIN_FRAME_LEN <= total <= MAX_FRAME_LEN):
+            st["frames_bad_len"] += 1
+            end = i + 8
+        else:
+            end = i + 8 * total
+            if end >= nbits:
+                break
+            st["frames_total"] += 1
+            frames.append((start, _aligned(data, start, total)))
+        # поиск — с границы сырого байта после последнего байта кадра
+        p = ((end >> 3) + 1) << 3
+    return frames, st
+
+
+# ------------------------------------------------------------
+# 3. Пакетный CHECKM10
+# ------------------------------------------------------------
+def check_batch(frames):
+    """Маска CRC OK для списка кадров.
+
+    Кадры — строки одной матрицы (дополнены нулями до самого длинного);
+    на каждом столбце CHECKM10 обновляется сразу для всех строк, и у кадров,
+    чей предпоследний байт пришёлся на этот столбец, сумма снимается.
+    """
+    if not frames:
+        return np.zeros(0, dtype=bool)
+    lens = np.array([len(f) for f in frames])
+    width = int(lens.max())
+    m = np.zeros((len(frames), width), dtype=np.uint8)
+    for r, f in enumerate(frames):
+        m[r, :len(f)] = np.frombuffer(f, dtype=np.uint8)
+    rows = np.arange(len(frames))
+    last = lens - 1
+    res = np.zeros(len(frames), dtype=np.uint8)
+    cs = np.zeros(len(frames), dtype=np.uint8)
+    done = np.bincount(last, minlength=width + 1)
+    for col in range(width - 1):
+        cs = FB[cs ^ PRE[m[:, col]]]
+        if done[col + 1]:
+            sel = last == col + 1
+            res[sel] = cs[sel]
+    return (res == m[rows, last]) & (lens >= 2)
+
+
+# ------------------------------------------------------------
+# Весь файл
+# ------------------------------------------------------------
+def decode(data, thresh=SYNC_HAMMING_THRESH):
+    """Разбор потока целиком: (записи dict, сырые валидные кадры, статистика)."""
+    found, st = scan(data, thresh=thresh)
+    ok = check_batch([f for _, f in found])
+    st["frames_valid"] = int(ok.sum())
+    st["frames_crc_fail"] = st["frames_total"] - st["frames_valid"]
+    recs = []
+    raw = []
+    for (bit, frame), good in zip(found, ok):
+        if not good:
+            continue
+        raw.append(frame)
+        p = parse_m20(frame)
+        if p is None:
+            continue
+        recs.append({"bit": bit, "serial": p.serial, "week": p.week, "tow": p.tow,
+                     "lat": p.lat, "lon": p.lon, "alt": p.alt, "velE": p.velE,
+                     "velN": p.velN, "velU": p.velU, "batt_v": p.batt_v,
+                     "frame": frame.hex()})
+    return recs, raw, st
+
+
+def write_records(recs, out, jsonl=False):
+    if jsonl:
+        for r in recs:
+            out.write(json.dumps(r) + "\n")
+        return
+    w = csv.writer(out)
+    w.writerow(FIELDS)
+    for r in recs:
+        w.writerow([r[k] for k in FIELDS])
+
+
+def verify(data, raw, st):
+    """Тот же поток через потоковый M20Decoder (с parse_m20 в callback, как
+    в main.py); True, если кадры и счётчики совпали."""
+    got = []
+
+    def on_frame(frame):
+        got.append(frame)
+        parse_m20(frame)
+
+    dec = M20Decoder(on_frame)
+    t0 = time.perf_counter()
+    dec.feed_bytes(memoryview(data))
+    dt = time.perf_counter() - t0
+    ref = {"sync_hits": dec.sync_hits, "frames_total": dec.frames_total,
+           "frames_valid": dec.frames_valid, "frames_crc_fail": dec.frames_crc_fail,
+           "frames_bad_len": dec.frames_bad_len}
+    same = got == raw and all(st[k] == v for k, v in ref.items())
+    return same, ref, dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="offline M20 decoding (NumPy)")
+    ap.add_argument("path", help="голый поток байт или сегмент raw_log")
+    ap.add_argument("-o", "--out", help="файл результата (по умолчанию stdout)")
+    ap.add_argument("--jsonl", action="store_true", help="JSONL вместо CSV")
+    ap.add_argument("--verify", action="store_true",
+                    help="сравнить с потоковым M20Decoder (медленно)")
+    args = ap.parse_args()
+
+    data = load_capture(args.path)
+    t0 = time.perf_counter()
+    recs, raw, st = decode(data)
+    dt = time.perf_counter() - t0
+
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            write_records(recs, f, args.jsonl)
+    else:
+        write_records(recs, sys.stdout, args.jsonl)
+
+    mb = len(data) / 1e6
+    print("%.2f MB in %.3f s (%.1f MB/s): sync %d, frames ok %d, crc fail %d, bad len %d" % (
+        mb, dt, mb / dt if dt else 0.0, st["sync_hits"], st["frames_valid"],
+        st["frames_crc_fail"], st["frames_bad_len"]), file=sys.stderr)
+
+    if args.verify:
+        same, ref, dt_ref = verify(data, raw, st)
+        print("M20Decoder: %.3f s (x%.0f), %s" % (
+            dt_ref, dt_ref / dt if dt else 0.0, "MATCH" if same else "MISMATCH %r" % ref),
+            file=sys.stderr)
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
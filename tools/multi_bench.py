@@ -0,0 +1,61 @@
+# tools/multi_bench.py — сколько зондов одновременно держит один приёмник
+#
+# Запуск:  python tools/multi_bench.py [--max 5] [--trials 3] [--seconds 90]
+#
+# Для N = 1..max зондов (случайные частоты и фазы кадров, разные seed)
+# гоняется Tracker с расписанием (MULTI_SONDE) и считается, сколько зондов
+# попало в таблицу и какая доля их кадров разобрана с момента захвата.
+# Выход ниже 1.0 — перекрытие окон зондов с близкой фазой кадров.
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import sim_run  # noqa: E402
+
+
+def trial(n, seed, args):
+    ns = sim_run.make_parser().parse_args([])
+    ns.multi = True
+    ns.sondes = n
+    ns.seed = seed
+    ns.seconds = args.seconds
+    ns.power = args.power
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = sim_run.run(ns, quiet=True)
+    return res["sondes"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="multi-sonde scheduler yield benchmark")
+    ap.add_argument("--max", type=int, default=5, help="до скольких зондов")
+    ap.add_argument("--trials", type=int, default=3)
+    ap.add_argument("--seconds", type=float, default=90.0)
+    ap.add_argument("--power", type=float, default=-95.0)
+    args = ap.parse_args()
+
+    print("%-3s %10s %12s %12s %12s" % ("N", "tracked", "yield mean", "yield min", "acquire s"))
+    for n in range(1, args.max + 1):
+        tracked = []
+        ylds = []
+        acq = []
+        for k in range(args.trials):
+            sondes = trial(n, 100 * n + k + 1, args)
+            tracked.append(len(sondes))
+            ylds.extend(s["tx_yield"] for s in sondes if s["tx_yield"] is not None)
+            if sondes:
+                acq.append(max(s["first_s"] for s in sondes))
+        print("%-3d %6.1f/%-3d %12s %12s %12s" % (
+            n, statistics.mean(tracked), n,
+            "%.2f" % statistics.mean(ylds) if ylds else "—",
+            "%.2f" % min(ylds) if ylds else "—",
+            "%.1f" % statistics.mean(acq) if acq else "—"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# tools/replay_log.py — разбор записей raw_log на хосте
+#
+# Запуск:  python tools/replay_log.py rawlog/ [--dump stream.bin]
+#          python tools/replay_log.py rawlog/raw0003.bin rawlog/raw0004.bin
+#
+# Сегменты (rawNNNN.bin, по порядку номеров) прогоняются через тот же
+# M20Decoder, что и на плате. На каждый принятый кадр печатается частота
+# и время из заголовка блока, в котором кадр закончился. --dump пишет
+# голый поток байт (без заголовков) для офлайн-инструментов.
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from m20_decoder import M20Decoder  # noqa: E402
+from raw_log import read_segment  # noqa: E402
+from sonde_data import parse_m20  # noqa: E402
+
+
+def segment_files(paths):
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            names = sorted(nm for nm in os.listdir(p)
+                           if nm.startswith("raw") and nm.endswith(".bin"))
+            out.extend(os.path.join(p, nm) for nm in names)
+        else:
+            out.append(p)
+    return out
+
+
+def replay(files, dump=None, quiet=False):
+    cur = {}
+    frames = []
+
+    def on_frame(frame):
+        frames.append((dict(cur), frame))
+
+    dec = M20Decoder(on_frame)
+    n_bytes = 0
+    for path in files:
+        # между сегментами поток непрерывен, декодер не сбрасываем
+        for seg, blk, data in read_segment(path):
+            cur.update(blk, seg=seg["seg"])
+            n_bytes += len(data)
+            if dump is not None:
+                dump.write(data)
+            dec.feed_bytes(data)
+
+    if not quiet:
+        for meta, frame in frames:
+            p = parse_m20(frame)
+            rssi = "—" if meta["rssi"] is None else "%.1f" % meta["rssi"]
+            if p is None:
+                print("seg %4d  %.3f MHz  t=%d  rssi %s  (кадр не разобран)" % (
+                    meta["seg"], meta["freq"] / 1e6, meta["time"], rssi))
+                continue
+            print("seg %4d  %.3f MHz  t=%d  rssi %s  SN %s  week %d tow %.1f"
+                  "  %.5f %.5f %.0f m" % (
+                      meta["seg"], meta["freq"] / 1e6, meta["time"], rssi,
+                      p.serial, p.week, p.tow, p.lat, p.lon, p.alt))
+        print("segments %d, bytes %d, sync %d, frames ok %d, crc fail %d, bad len %d" % (
+            len(files), n_bytes, dec.sync_hits, dec.frames_valid,
+            dec.frames_crc_fail, dec.frames_bad_len))
+    return frames, dec
+
+
+def main():
+    ap = argparse.ArgumentParser(description="replay raw_log segments")
+    ap.add_argument("paths", nargs="+", help="каталог записи или файлы сегментов")
+    ap.add_argument("--dump", help="записать голый поток байт в файл")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args()
+
+    files = segment_files(args.paths)
+    if args.dump:
+        with open(args.dump, "wb") as f:
+            replay(files, f, args.quiet)
+    else:
+        replay(files, None, args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# tools/scan_bench.py — время до захвата: двухфазный скан против линейного
+#
+# Запуск:  python tools/scan_bench.py [--trials 10] [--power -95] [--interferer]
+#
+# В каждом прогоне зонд появляется на случайной частоте диапазона скана
+# (сетка 10 кГц) со случайной фазой кадров, через случайное время после
+# старта трекера. Меряется время от появления зонда до перехода в TRACK
+# для SCAN_MODE = "spectrum" и "linear" на одинаковых сценариях.
+# --interferer добавляет постоянную несущую без M20 внутри диапазона.
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import sim_run  # noqa: E402
+from config import SCAN_START_HZ, SCAN_END_HZ  # noqa: E402
+from sim.rf import Transmitter  # noqa: E402
+
+MODES = ("spectrum", "linear")
+
+
+def scenario(k, args):
+    rnd = random.Random(1000 + k)
+    lo = SCAN_START_HZ // 10000 + 5
+    hi = SCAN_END_HZ // 10000 - 5
+    return {
+        "sonde_freq": rnd.randint(lo, hi) * 10000,
+        "start_ms": rnd.randrange(0, 5000),
+        "seed": k + 1,
+        "interferer": rnd.randint(lo, hi) * 10000,
+    }
+
+
+def trial(mode, sc, args):
+    ns = sim_run.make_parser().parse_args([])
+    ns.scan = mode
+    ns.seconds = args.timeout + sc["start_ms"] / 1000.0
+    ns.sonde_freq = sc["sonde_freq"]
+    ns.start_ms = sc["start_ms"]
+    ns.power = args.power
+    ns.seed = sc["seed"]
+    ns.until_lock = True
+    env = sim_run.build_env(ns)
+    if args.interferer:
+        env.add(Transmitter(sc["interferer"], args.power + 10, b""))
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = sim_run.run(ns, env, quiet=True)
+    if res["first_track_ms"] is None:
+        return None
+    return (res["first_track_ms"] - sc["start_ms"]) / 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="scan time-to-lock benchmark")
+    ap.add_argument("--trials", type=int, default=10)
+    ap.add_argument("--power", type=float, default=-95.0)
+    ap.add_argument("--timeout", type=float, default=60.0, help="предел на прогон, с")
+    ap.add_argument("--interferer", action="store_true")
+    args = ap.parse_args()
+
+    times = {m: [] for m in MODES}
+    print("%-4s %-12s %10s %10s" % ("#", "freq", *MODES))
+    for k in range(args.trials):
+        sc = scenario(k, args)
+        row = []
+        for m in MODES:
+            t = trial(m, sc, args)
+            times[m].append(t)
+            row.append("—" if t is None else "%.2f s" % t)
+        print("%-4d %-12.3f %10s %10s" % (k, sc["sonde_freq"] / 1e6, *row))
+
+    for m in MODES:
+        ok = [t for t in times[m] if t is not None]
+        if ok:
+            print("%-9s locked %d/%d  median %.2f s  mean %.2f s  max %.2f s" % (
+                m, len(ok), args.trials, statistics.median(ok),
+                statistics.mean(ok), max(ok)))
+        else:
+            print("%-9s locked 0/%d" % (m, args.trials))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# tools/sim_run.py — полный Tracker на CPython с симулятором CC1101 и эфира
+#
+# Запуск:
+#   python tools/sim_run.py                          # один зонд, 60 с
+#   python tools/sim_run.py --seconds 120 --power -100 --capture edge
+#   python tools/sim_run.py --fixed 405100000
+#   python tools/sim_run.py --multi --sondes 3      # расписание на 3 зонда
+#
+# Виртуальное время идёт только пока трекер «спит», поэтому прогон быстрее
+# реального и воспроизводим. Печатается время до захвата (первый валидный
+# кадр и переход в TRACK), выход кадров и запас по CPU на хосте.
+
+import argparse
+import os
+import random
+import sys
+import time as host_time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import sim  # noqa: E402
+from sim.clock import clock  # noqa: E402
+from sim.rf import RfEnvironment, Transmitter  # noqa: E402
+from sim.m20_gen import M20Signal  # noqa: E402
+from config import SCAN_START_HZ, SCAN_END_HZ  # noqa: E402
+
+
+def sonde_freqs(args, rnd):
+    """Первый зонд на --sonde-freq, остальные — случайно в диапазоне скана,
+    не ближе 150 кГц друг к другу."""
+    freqs = [args.sonde_freq]
+    lo = SCAN_START_HZ // 10000 + 5
+    hi = SCAN_END_HZ // 10000 - 5
+    while len(freqs) < args.sondes:
+        f = rnd.randint(lo, hi) * 10000
+        if all(abs(f - g) >= 150000 for g in freqs):
+            freqs.append(f)
+    return freqs
+
+
+def build_env(args):
+    env = RfEnvironment(noise_floor_dbm=args.noise, seed=args.seed)
+    rnd = random.Random(args.seed)
+    for k, f in enumerate(sonde_freqs(args, rnd)):
+        sig = M20Signal(serial=0x1234 + k, seed=args.seed + k)
+        env.add(Transmitter(f, args.power, sig.burst,
+                            phase_ms=rnd.randrange(1000), drift_ppm=args.drift_ppm,
+                            start_ms=args.start_ms))
+    return env
+
+
+def per_sonde(tracker, env, end_us):
+    """Выход кадров по зондам расписания: разобрано / передано с первого кадра."""
+    sch = tracker.sched
+    if sch is None:
+        return None
+    out = []
+    for st, e in zip(sch.stats(end_us // 1000), sch.sondes):
+        tx = min(env.txs, key=lambda t: abs(t.freq - e.freq))
+        # пачка первого кадра началась раньше его разбора на длину кадра
+        sent = tx.bursts_in(e.first_ms * 1000 - 200_000, end_us)
+        st["sent"] = sent
+        st["tx_yield"] = round(st["frames"] / sent, 3) if sent else None
+        st["first_s"] = e.first_ms / 1000.0
+        out.append(st)
+    return out
+
+
+class Stats:
+    def __init__(self, tracker):
+        self.t = tracker
+        self.first_frame_ms = None
+        self.first_track_ms = None
+
+    def poll(self):
+        now_ms = clock.now_us // 1000
+        if self.first_frame_ms is None and self.t.decoder.frames_valid:
+            self.first_frame_ms = now_ms
+        if self.first_track_ms is None and self.t.state == "TRACK" and not self.t.fixed_mode:
+            self.first_track_ms = now_ms
+
+
+def run(args, env=None, quiet=False):
+    if env is None:
+        env = build_env(args)
+    radio_sim = sim.setup(env)
+
+    import main
+    main.GDO0_CAPTURE = args.capture
+    main.SCAN_MODE = args.scan
+    main.MULTI_SONDE = args.multi
+    tracker = main.Tracker()
+    if args.rawlog:
+        tracker.rawlog.path = args.rawlog
+        tracker.rawlog.enable(True)
+    tracker.start()
+    if args.fixed:
+        tracker.set_fixed_frequency(args.fixed)
+    if args.http:
+        import web_ui
+        web_ui.start_server(tracker, args.http,
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "www"))
+
+    st = Stats(tracker)
+    start_us = clock.now_us
+    end_us = clock.now_us + int(args.seconds * 1_000_000)
+    wall0 = host_time.perf_counter()
+    cpu0 = host_time.process_time()
+    while clock.now_us < end_us:
+        tracker.step()
+        st.poll()
+        if args.until_lock and st.first_track_ms is not None:
+            break
+    wall = host_time.perf_counter() - wall0
+    cpu = host_time.process_time() - cpu0
+    virt = (clock.now_us - start_us) / 1e6
+    end_us = clock.now_us
+
+    dec = tracker.decoder
+    sent = sum(tx.bursts_in(start_us, end_us) for tx in env.txs)
+    res = {
+        "virtual_s": virt,
+        "wall_s": wall,
+        "speedup": virt / wall if wall else 0.0,
+        "cpu_per_virtual_s": cpu / virt if virt else 0.0,
+        "first_frame_ms": st.first_frame_ms,
+        "first_track_ms": st.first_track_ms,
+        "scan_sweeps": tracker.scanner.sweeps if tracker.scanner else None,
+        "scan_dwells": tracker.scanner.dwells if tracker.scanner else None,
+        "bursts_sent": sent,
+        "sync_hits": dec.sync_hits,
+        "frames_valid": dec.frames_valid,
+        "frames_crc_fail": dec.frames_crc_fail,
+        "frames_bad_len": dec.frames_bad_len,
+        "rx_overruns": tracker.rx.overruns,
+        "rawlog_bytes": tracker.rawlog.bytes_logged,
+        "rawlog_dropped": tracker.rawlog.bytes_dropped,
+        "spi_bytes": radio_sim.spi_bytes,
+        "calibrations": radio_sim.calibrations,
+        "state": tracker.state,
+        "freq": tracker.track.freq,
+        "sondes": per_sonde(tracker, env, end_us),
+    }
+    if not quiet:
+        for k, v in res.items():
+            if k == "sondes":
+                continue
+            if isinstance(v, float):
+                v = "%.3f" % v
+            print("%-18s %s" % (k, v))
+        for st in res["sondes"] or ():
+            print("SN %04X %.3f MHz  frames %d/%d  yield %.2f  windows %d  "
+                  "misses %d  skips %d" % (
+                      st["serial"], st["freq"] / 1e6, st["frames"], st["sent"],
+                      st["tx_yield"] or 0.0, st["windows"], st["misses"], st["skips"]))
+    return res
+
+
+def make_parser():
+    ap = argparse.ArgumentParser(description="M20 tracker simulation")
+    ap.add_argument("--seconds", type=float, default=60)
+    ap.add_argument("--sonde-freq", type=int, default=405_100_000)
+    ap.add_argument("--power", type=float, default=-95.0, help="dBm на входе")
+    ap.add_argument("--noise", type=float, default=-118.0, help="шум, dBm/100 кГц")
+    ap.add_argument("--drift-ppm", type=float, default=0)
+    ap.add_argument("--start-ms", type=int, default=0)
+    ap.add_argument("--capture", choices=("timer", "edge"), default="timer")
+    ap.add_argument("--scan", choices=("spectrum", "linear"), default="spectrum")
+    ap.add_argument("--fixed", type=int, default=0, help="FIXED-частота, Гц")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--http", type=int, default=0, help="поднять Web UI на этом порту")
+    ap.add_argument("--until-lock", action="store_true", help="остановиться на первом TRACK")
+    ap.add_argument("--rawlog", default="", help="писать сырой поток в этот каталог")
+    ap.add_argument("--sondes", type=int, default=1, help="зондов в эфире")
+    ap.add_argument("--multi", action="store_true", help="расписание на несколько зондов")
+    return ap
+
+
+if __name__ == "__main__":
+    run(make_parser().parse_args())
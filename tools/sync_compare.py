@@ -0,0 +1,128 @@
+# tools/sync_compare.py — сравнение поиска sync: старый 8-сдвиговый vs побитовый
+#
+# Запуск:
+#   python tools/sync_compare.py                    # синтетический поток
+#   python tools/sync_compare.py --file raw.bin     # записанный поток байт GDO0
+#
+# Для синтетики sync-слова вставляются в шум с известным битовым смещением,
+# поэтому считаются настоящие попадания (hit), пропуски и ложные срабатывания.
+# Для записанного потока эталона нет — печатаются только числа срабатываний
+# обоих детекторов и время на байт.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from m20_decoder import (  # noqa: E402
+    SYNC, SYNC_LEN, SYNC_HAMMING_THRESH, M20Decoder, SyncCorrelator, hamming_bytes,
+)
+
+
+class LegacySync:
+    """Прежний M20Decoder._sync_match: кольцо байт + 8 сдвинутых копий."""
+
+    def __init__(self):
+        self.win = bytearray(SYNC_LEN)
+        self.wpos = 0
+
+    def push_byte(self, b):
+        self.win[self.wpos] = b
+        self.wpos = (self.wpos + 1) % SYNC_LEN
+        window = bytes(self.win)
+        best = 999
+        for shift in range(8):
+            d = hamming_bytes(M20Decoder._shift_frame_bits(window, shift), SYNC)
+            if d < best:
+                best = d
+        return 0 if best <= SYNC_HAMMING_THRESH else -1
+
+
+def synth_stream(n_bytes, n_sync, seed=1):
+    """Шум + n_sync sync-слов на случайных битовых позициях.
+
+    Возвращает (bytes, список позиций конца sync в битах).
+    """
+    rnd = random.Random(seed)
+    bits = [rnd.getrandbits(1) for _ in range(n_bytes * 8)]
+    sync_bits = [(SYNC[i // 8] >> (7 - i % 8)) & 1 for i in range(32)]
+    ends = []
+    gap = len(bits) // (n_sync + 1)
+    for i in range(n_sync):
+        start = gap * (i + 1) + rnd.randrange(-gap // 4, gap // 4)
+        bits[start:start + 32] = sync_bits
+        ends.append(start + 32)
+    out = bytearray(n_bytes)
+    for i in range(n_bytes):
+        v = 0
+        for j in range(8):
+            v = (v << 1) | bits[i * 8 + j]
+        out[i] = v
+    return bytes(out), ends
+
+
+def run(det, data):
+    """Прогнать детектор; вернуть список (байт, бит конца sync) и время."""
+    hits = []
+    t0 = time.perf_counter()
+    for i, b in enumerate(data):
+        k = det.push_byte(b)
+        if k >= 0:
+            hits.append((i, (i + 1) * 8 - k))
+    return hits, time.perf_counter() - t0
+
+
+def score(hits, ends, exact):
+    """Сколько sync найдено, ложных срабатываний и точных по биту."""
+    by_byte = {}
+    for e in ends:
+        by_byte[(e - 1) // 8] = e
+    found = set()
+    fp = 0
+    bit_exact = 0
+    for byte_i, bit_end in hits:
+        # старый детектор видит sync не позже следующего байта
+        e = by_byte.get(byte_i)
+        if e is None:
+            e = by_byte.get(byte_i - 1)
+        if e is None or e in found:
+            fp += 1
+            continue
+        found.add(e)
+        if exact and bit_end == e:
+            bit_exact += 1
+    return len(found), fp, bit_exact
+
+
+def main():
+    ap = argparse.ArgumentParser(description="sync detector comparison")
+    ap.add_argument("--file", help="сырые байты GDO0")
+    ap.add_argument("--bytes", type=int, default=200000)
+    ap.add_argument("--syncs", type=int, default=500)
+    args = ap.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as f:
+            data = f.read()
+        ends = None
+    else:
+        data, ends = synth_stream(args.bytes, args.syncs)
+
+    print("stream: %d bytes" % len(data))
+    for name, det, exact in (("legacy 8-shift", LegacySync(), False),
+                             ("bit correlator", SyncCorrelator(), True)):
+        hits, dt = run(det, data)
+        line = "%-15s hits=%6d  %6.2f us/byte" % (name, len(hits), dt * 1e6 / len(data))
+        if ends is not None:
+            found, fp, bit_exact = score(hits, ends, exact)
+            line += "  found=%d/%d  false=%d" % (found, len(ends), fp)
+            if exact:
+                line += "  bit-exact=%d" % bit_exact
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
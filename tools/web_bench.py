@@ -0,0 +1,213 @@
+# tools/web_bench.py — задержка Web UI при нескольких открытых страницах
+#
+# Запуск:  python tools/web_bench.py [--clients 1,2,4,8] [--seconds 10]
+#                                    [--interval 1000] [--slow 1] [--sse] [--bin]
+#                                    [--browser 3]
+#
+# Трекер с симулятором CC1101 крутится в главном потоке, Web UI обслуживается
+# в его паузах (как на устройстве). Каждый клиент — отдельный поток с одним
+# keep-alive соединением, опрашивающий /status раз в interval мс, как
+# страница в браузере. --slow добавляет «медленных» клиентов: соединение
+# с недописанным запросом, которое сервер должен снять по таймауту, не
+# задерживая остальных. Печатаются задержки ответов, отказы (503, когда
+# все WEB_MAX_CONN слотов заняты запросами), таймауты, байт на ответ и
+# выход кадров декодера; ниже — сколько простаивающих соединений сервер
+# закрыл, чтобы принять новые.
+# С --sse страницы вместо опроса слушают /events: в колонке req — число
+# событий, B/msg — байт на событие, задержки не считаются. --bin —
+# двоичный статус: /status.bin и /events?bin=1 вместо JSON.
+# --browser K — страница как в браузере: загрузка тянет статику ещё по K
+# параллельным соединениям, и браузер держит их открытыми без запросов;
+# /status опрашивается по первому. Так видно, вытесняет ли сервер простаивающие
+# соединения или отвечает новой странице 503.
+
+import argparse
+import contextlib
+import http.client
+import io
+import os
+import socket
+import statistics
+import sys
+import threading
+import time as host_time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import sim  # noqa: E402
+import sim_run  # noqa: E402
+from sim.clock import clock  # noqa: E402
+
+
+def dashboard(port, path, interval, stop, lat, errs, rx):
+    """Страница: GET /status раз в interval мс по keep-alive соединению."""
+    conn = None
+    while not stop.is_set():
+        t0 = host_time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", path)
+            r = conn.getresponse()
+            rx.append(len(r.read()))
+            if r.status == 200:
+                lat.append(host_time.perf_counter() - t0)
+            else:
+                errs["http_%d" % r.status] = errs.get("http_%d" % r.status, 0) + 1
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException):
+            errs["conn"] = errs.get("conn", 0) + 1
+            if conn is not None:
+                conn.close()
+            conn = None
+        left = interval / 1000.0 - (host_time.perf_counter() - t0)
+        if left > 0:
+            stop.wait(left)
+    if conn is not None:
+        conn.close()
+
+
+def browser(port, path, interval, stop, lat, errs, rx, extra):
+    """Страница в браузере: статика по extra соединениям, которые потом
+    простаивают открытыми, и опрос /status (dashboard) по своему."""
+    side = []
+    for i in range(extra):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            conn.request("GET", ("/", "/app.js", "/map.js")[i % 3])
+            r = conn.getresponse()
+            rx.append(len(r.read()))
+            if r.status != 200:
+                errs["http_%d" % r.status] = errs.get("http_%d" % r.status, 0) + 1
+        except (OSError, http.client.HTTPException):
+            errs["conn"] = errs.get("conn", 0) + 1
+        side.append(conn)
+    dashboard(port, path, interval, stop, lat, errs, rx)
+    for conn in side:
+        conn.close()
+
+
+def listener(port, path, stop, lat, errs, rx):
+    """Страница с EventSource: читает /events, считает события и байты."""
+    try:
+        s = socket.create_connection(("127.0.0.1", port), timeout=0.2)
+        s.sendall(("GET %s HTTP/1.1\r\nHost: x\r\n\r\n" % path).encode())
+    except OSError:
+        errs["conn"] = errs.get("conn", 0) + 1
+        return
+    while not stop.is_set():
+        try:
+            b = s.recv(4096)
+        except socket.timeout:
+            continue
+        except OSError:
+            b = b""
+        if not b:
+            errs["closed"] = errs.get("closed", 0) + 1
+            break
+        rx.append(len(b))
+        lat.extend(None for _ in range(b.count(b"data: ")))
+    s.close()
+
+
+def slowpoke(port, stop):
+    """Соединение с недописанным запросом — держит слот до таймаута сервера."""
+    while not stop.is_set():
+        try:
+            s = socket.create_connection(("127.0.0.1", port), timeout=30)
+            s.sendall(b"GET /status HTTP/1.1\r\nHost: x\r\n")
+            s.recv(64)
+            s.close()
+        except OSError:
+            stop.wait(0.2)
+
+
+def trial(n, args, port):
+    env = sim_run.build_env(sim_run.make_parser().parse_args([]))
+    sim.setup(env)
+    import main
+    import web_ui
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker = main.Tracker()
+        tracker.start()
+        srv = web_ui.start_server(tracker, port, asset_dir=os.path.join(ROOT, "www"))
+
+    stop = threading.Event()
+    lat = []
+    errs = {}
+    rx = []
+    if args.sse:
+        path = "/events?bin=1" if args.bin else "/events"
+        threads = [threading.Thread(target=listener, args=(port, path, stop, lat, errs, rx))
+                   for _ in range(n)]
+    elif args.browser:
+        path = "/status.bin" if args.bin else "/status"
+        threads = [threading.Thread(target=browser,
+                                    args=(port, path, args.interval, stop, lat, errs, rx,
+                                          args.browser))
+                   for _ in range(n)]
+    else:
+        path = "/status.bin" if args.bin else "/status"
+        threads = [threading.Thread(target=dashboard,
+                                    args=(port, path, args.interval, stop, lat, errs, rx))
+                   for _ in range(n)]
+    threads += [threading.Thread(target=slowpoke, args=(port, stop)) for _ in range(args.slow)]
+    for th in threads:
+        th.start()
+
+    v0 = clock.now_us
+    t_end = host_time.perf_counter() + args.seconds
+    while host_time.perf_counter() < t_end:
+        tracker.step()
+    virt = (clock.now_us - v0) / 1e6
+    stop.set()
+    # клиенты дочитывают последние ответы, пока трекер ещё шагает
+    while any(th.is_alive() for th in threads):
+        tracker.step()
+        for th in threads:
+            th.join(0.001)
+    # сервер закрывает свои концы соединений
+    t_end = host_time.perf_counter() + 2
+    while srv.active and host_time.perf_counter() < t_end:
+        tracker.step()
+    srv.srv.close()
+    return lat, errs, sum(rx), srv, tracker.decoder.frames_valid, virt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Web UI latency under several dashboards")
+    ap.add_argument("--clients", default="1,2,4,8", help="числа клиентов через запятую")
+    ap.add_argument("--seconds", type=float, default=10.0, help="реальных секунд на прогон")
+    ap.add_argument("--interval", type=float, default=1000.0, help="опрос /status, мс")
+    ap.add_argument("--slow", type=int, default=0, help="медленных клиентов")
+    ap.add_argument("--sse", action="store_true", help="слушать /events вместо опроса")
+    ap.add_argument("--bin", action="store_true", help="двоичный статус (status_bin)")
+    ap.add_argument("--browser", type=int, default=0,
+                    help="соединений за статикой на страницу, простаивающих открытыми")
+    ap.add_argument("--port", type=int, default=18080)
+    args = ap.parse_args()
+
+    print("%-4s %6s %8s %8s %8s %8s %8s %9s %9s" % (
+        "N", "req", "p50 ms", "p95 ms", "max ms", "errors", "timeouts", "B/msg", "frames/s"))
+    for k, n in enumerate(int(x) for x in args.clients.split(",")):
+        lat, errs, rx, srv, frames, virt = trial(n, args, args.port + k)
+        ms = sorted(x * 1000 for x in lat if x is not None)
+        if ms:
+            p50 = statistics.median(ms)
+            p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+            row = "%8.1f %8.1f %8.1f" % (p50, p95, ms[-1])
+        else:
+            row = "%8s %8s %8s" % ("—", "—", "—")
+        print("%-4d %6d %s %8d %8d %9.0f %9.2f" % (
+            n, len(lat), row, sum(errs.values()), srv.timeouts,
+            rx / len(lat) if lat else 0.0, frames / virt if virt else 0.0))
+        if errs:
+            print("     errors:", ", ".join("%s=%d" % kv for kv in sorted(errs.items())))
+        if srv.evicted:
+            print("     evicted idle: %d" % srv.evicted)
+
+
+if __name__ == "__main__":
+    main()
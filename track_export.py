@@ -0,0 +1,155 @@
+# track_export.py — выгрузка трека в GPX / KML / CSV по кускам
+#
+# Документ не собирается целиком: генераторы форматируют точку за точкой
+# и отдают куски по CHUNK байт из одного переиспользуемого буфера. Кусок
+# (memoryview) действителен до следующего next() — потребитель успевает
+# записать его в сокет или файл. Пик памяти не зависит от длины трека.
+#
+# Точки — кортежи (seq, t, lat, lon, alt, vu) в масштабе TrackHistory:
+# время GPS в секундах, lat/lon в 1e-6 градуса, высота в метрах,
+# вертикальная скорость в см/с. Источник — history_points() на устройстве
+# или records_points() для записей tools/m20_offline / m20_batch на хосте.
+
+CHUNK = 512
+
+# секунд в неделе GPS
+GPS_WEEK_S = 604800
+# 1980-01-06 (эпоха GPS) в днях от 1970-01-01 и разница GPS−UTC
+GPS_EPOCH_DAYS = 3657
+GPS_UTC_LEAP_S = 18
+
+
+# ------------------------------------------------------------
+# Источники точек
+# ------------------------------------------------------------
+def history_points(h):
+    """Точки TrackHistory по возрастанию seq.
+
+    Пока выгрузка ждёт сокет (await w.drain()), трекер продолжает писать
+    историю. Следующая точка ищется по seq, а не по индексу: прореживание
+    сдвигает индексы, но не ломает выгрузку. После clear() (сменился gen —
+    это уже трек другого зонда) выгрузка обрывается.
+    """
+    gen = h.gen
+    seq = 0
+    while True:
+        i = h.index_after(seq)
+        if i >= h.n or h.gen != gen:
+            return
+        p = h.point(i)
+        seq = p[0]
+        yield p
+
+
+def records_points(recs):
+    """Точки из записей разбора (словари week/tow/lat/lon/alt/velU)."""
+    for k, r in enumerate(recs):
+        yield (k + 1, r["week"] * GPS_WEEK_S + int(r["tow"]),
+               int(round(r["lat"] * 1e6)), int(round(r["lon"] * 1e6)),
+               int(r["alt"]), int(round(r["velU"] * 100)))
+
+
+# ------------------------------------------------------------
+# Время и числа
+# ------------------------------------------------------------
+def gps_iso(t):
+    """Время GPS (с) → 'YYYY-MM-DDTHH:MM:SSZ' в UTC (без datetime)."""
+    s = t - GPS_UTC_LEAP_S
+    days, sec = divmod(s, 86400)
+    days += GPS_EPOCH_DAYS
+    # дни от 1970-01-01 → гражданская дата (алгоритм Хиннанта)
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    y = yoe + era * 400
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+    m = mp + 3 if mp < 10 else mp - 9
+    if m <= 2:
+        y += 1
+    return "%04d-%02d-%02dT%02d:%02d:%02dZ" % (
+        y, m, d, sec // 3600, sec // 60 % 60, sec % 60)
+
+
+def _deg(u):
+    """1e-6 градуса → '12.345678'."""
+    sign = "-" if u < 0 else ""
+    u = abs(u)
+    return "%s%d.%06d" % (sign, u // 1000000, u % 1000000)
+
+
+# ------------------------------------------------------------
+# Сборка кусков
+# ------------------------------------------------------------
+def chunks(lines, size=CHUNK):
+    """Строки → куски до size байт из одного буфера."""
+    buf = bytearray(size)
+    mv = memoryview(buf)
+    n = 0
+    for s in lines:
+        b = s.encode()
+        k = len(b)
+        if n + k > size:
+            if n:
+                yield mv[:n]
+                n = 0
+            if k > size:
+                yield b
+                continue
+        buf[n:n + k] = b
+        n += k
+    if n:
+        yield mv[:n]
+
+
+# ------------------------------------------------------------
+# Форматы
+# ------------------------------------------------------------
+def _gpx_lines(points, name):
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<gpx version="1.1" creator="M20 Tracker" '
+           'xmlns="http://www.topografix.com/GPX/1/1">\n'
+           '<trk><name>%s</name><trkseg>\n' % name)
+    for p in points:
+        yield '<trkpt lat="%s" lon="%s"><ele>%d</ele><time>%s</time></trkpt>\n' % (
+            _deg(p[2]), _deg(p[3]), p[4], gps_iso(p[1]))
+    yield '</trkseg></trk>\n</gpx>\n'
+
+
+def _kml_lines(points, name):
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n'
+           '<Placemark><name>%s</name><LineString>'
+           '<altitudeMode>absolute</altitudeMode><coordinates>\n' % name)
+    for p in points:
+        yield "%s,%s,%d\n" % (_deg(p[3]), _deg(p[2]), p[4])
+    yield '</coordinates></LineString></Placemark>\n</Document></kml>\n'
+
+
+def _csv_lines(points):
+    yield "seq,time,lat,lon,alt,vel_u\n"
+    for p in points:
+        yield "%d,%s,%s,%s,%d,%.2f\n" % (
+            p[0], gps_iso(p[1]), _deg(p[2]), _deg(p[3]), p[4], p[5] / 100)
+
+
+def gpx(points, name="M20"):
+    return chunks(_gpx_lines(points, name))
+
+
+def kml(points, name="M20"):
+    return chunks(_kml_lines(points, name))
+
+
+def csv(points, name=None):
+    return chunks(_csv_lines(points))
+
+
+# расширение → (генератор, Content-Type)
+FORMATS = {
+    "gpx": (gpx, "application/gpx+xml"),
+    "kml": (kml, "application/vnd.google-earth.kml+xml"),
+    "csv": (csv, "text/csv"),
+}
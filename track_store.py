@@ -1,16 +1,254 @@
 # track_store.py — хранение состояния трека и параметров сигнала
 
-import time
+from array import array
+import math
+
+from hal import time
+from config import TRACK_HISTORY_SIZE
 
 # Порог, на сколько dB сигнал должен быть выше шума, чтобы считать "есть сигнал"
 RSSI_SIGNAL_DELTA_DB = 6.0
 
+# секунд в неделе GPS
+GPS_WEEK_S = 604800
+# метров в 1e-6 градуса широты
+M_PER_UDEG = 0.1113
+# не больше стольких выброшенных точек подряд (ограничивает проверку отрезка)
+RUN_MAX = 32
+# отклонений (_dev), считаемых за один шаг отложенного прореживания (step());
+# не меньше RUN_MAX, иначе длинная серия не проверится ни за какой шаг
+COMPACT_BUDGET = 64
+
+
+class TrackHistory:
+    """История фиксов одного зонда в предвыделенных массивах.
+
+    Точка — масштабированные целые: время GPS (с), lat/lon (1e-6 °),
+    высота (м), вертикальная скорость (см/с) и номер seq (растёт с каждой
+    точкой, не переиспользуется). Когда буфер полон, старые 3/4 точек
+    прореживаются от начала: выбрасываются точки, без которых трек
+    отклоняется от оставшихся отрезков меньше чем на tol метров, пока не
+    освободится четверть буфера. Не хватило — tol удваивается и остаётся
+    таким для следующих раз. Свежая четверть всегда в полном разрешении.
+
+    Прореживание отложенное: append() в колбэке кадра только отмечает его,
+    когда буфер заполнен на 7/8, а главный цикл зовёт step() между опросами
+    кольца — за раз не больше COMPACT_BUDGET отклонений точки от отрезка.
+    Точки, пришедшие тем временем, пишутся в запас; если запас кончился
+    раньше, append() дорабатывает прореживание сам.
+
+    Пишется трек одного зонда: кадры других серийников пропускаются, пока
+    трекер не отпустит текущий (release() при потере). Тогда первый кадр
+    другого зонда начинает новый трек (clear(), gen растёт); до него
+    трек потерянного зонда остаётся доступен для карты и экспорта.
+    """
+
+    def __init__(self, size=TRACK_HISTORY_SIZE):
+        self.size = size
+        self.seq = array("I", [0] * size)
+        self.t = array("i", [0] * size)
+        self.lat = array("i", [0] * size)
+        self.lon = array("i", [0] * size)
+        self.alt = array("i", [0] * size)
+        self.vu = array("h", [0] * size)
+        self.n = 0
+        self.last_seq = 0
+        self.serial = None      # зонд, чей трек пишется
+        self.tol = 2.0          # допуск прореживания, м
+        self.compactions = 0
+        self.skipped = 0        # кадры других зондов
+        self.gen = 0            # растёт при очистке: клиенту — начать заново
+        self.released = False   # зонд потерян: следующий чужой кадр начнёт новый трек
+        self._drop = None       # идёт прореживание: метки выброшенных точек
+
+    def clear(self):
+        self.n = 0
+        self._drop = None
+        self.gen += 1
+        self.serial = None
+        self.tol = 2.0
+        self.released = False
+
+    def release(self, serial=None):
+        """Зонд serial (None — текущий) потерян: трек можно отдать другому."""
+        if serial is None or serial == self.serial:
+            self.released = True
+
+    def add_frame(self, frame):
+        """Добавить фикс из M20Frame (кадры чужих серийников — мимо)."""
+        if self.serial is None or self.n == 0:
+            self.serial = frame.serial
+        elif frame.serial != self.serial:
+            if not self.released:
+                self.skipped += 1
+                return
+            self.clear()
+            self.serial = frame.serial
+        self.released = False
+        self.append(frame.week * GPS_WEEK_S + int(frame.tow),
+                    frame.lat, frame.lon, frame.alt, frame.velU)
+
+    def append(self, t, lat, lon, alt, vu):
+        if self.n >= self.size:
+            # главный цикл не успел: дорабатываем прореживание здесь
+            self._compact()
+        i = self.n
+        self.last_seq += 1
+        self.seq[i] = self.last_seq
+        self.t[i] = t
+        self.lat[i] = int(round(lat * 1e6))
+        self.lon[i] = int(round(lon * 1e6))
+        self.alt[i] = int(alt)
+        self.vu[i] = int(round(vu * 100))
+        self.n = i + 1
+        if self._drop is None and self.n >= self.size - (self.size >> 3):
+            self._start()
+
+    def point(self, i):
+        """(seq, t, lat, lon, alt, vu) i-й точки в масштабированных целых."""
+        return (self.seq[i], self.t[i], self.lat[i], self.lon[i],
+                self.alt[i], self.vu[i])
+
+    def index_after(self, seq):
+        """Индекс первой точки с номером больше seq."""
+        a = self.seq
+        lo = 0
+        hi = self.n
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if a[mid] <= seq:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # ------------------------------------------------------
+    # Прореживание
+    # ------------------------------------------------------
+    def _dev(self, a, p, b, kx):
+        """Отклонение точки p от отрезка a-b, м."""
+        ax = (self.lon[p] - self.lon[a]) * kx
+        ay = (self.lat[p] - self.lat[a]) * M_PER_UDEG
+        az = self.alt[p] - self.alt[a]
+        bx = (self.lon[b] - self.lon[a]) * kx
+        by = (self.lat[b] - self.lat[a]) * M_PER_UDEG
+        bz = self.alt[b] - self.alt[a]
+        bb = bx * bx + by * by + bz * bz
+        if bb == 0:
+            return math.sqrt(ax * ax + ay * ay + az * az)
+        # |AP × AB| / |AB|
+        cx = ay * bz - az * by
+        cy = az * bx - ax * bz
+        cz = ax * by - ay * bx
+        return math.sqrt((cx * cx + cy * cy + cz * cz) / bb)
+
+    def _fits(self, a, p, kx):
+        """Точки a+1..p (p и уже выброшенные после a) ближе tol к отрезку a-(p+1)."""
+        b = p + 1
+        tol = self.tol
+        for q in range(a + 1, b):
+            if self._dev(a, q, b, kx) >= tol:
+                return False
+        return True
+
+    @property
+    def compacting(self):
+        return self._drop is not None
+
+    def step(self, budget=COMPACT_BUDGET):
+        """Шаг отложенного прореживания: не больше budget вызовов _dev.
+
+        True — работа ещё осталась.
+        """
+        drop = self._drop
+        if drop is None:
+            return False
+        old = self._old
+        need = self._need
+        kx = self._kx
+        a = self._a
+        p = self._p
+        dropped = self._dropped
+        end = old - 1
+        while p < end:
+            if dropped >= need:
+                # набрали: дальше все точки остаются
+                p = end
+                break
+            if p - a <= RUN_MAX:
+                # проверка точки p — p - a отклонений
+                budget -= p - a
+                if budget < 0:
+                    break
+                if self._fits(a, p, kx):
+                    drop[p] = 1
+                    dropped += 1
+                    p += 1
+                    continue
+            a = p
+            p += 1
+        self._a = a
+        self._p = p
+        self._dropped = dropped
+        if p < old - 1:
+            return True
+        if dropped < need and self.tol <= 1e6:
+            self.tol *= 2
+            self._pass()
+            return True
+        self._shift()
+        return False
+
+    def _start(self):
+        n = self.n
+        self._old = n - n // 4
+        self._need = n // 4
+        self._kx = M_PER_UDEG * math.cos(math.radians(self.lat[0] * 1e-6))
+        self._pass()
+
+    def _pass(self):
+        self._drop = bytearray(self._old)
+        self._dropped = 0
+        self._a = 0
+        self._p = 1
+
+    def _shift(self):
+        """Сдвигаем оставшиеся точки к началу."""
+        drop = self._drop
+        old = self._old
+        n = self.n
+        w = 0
+        for i in range(n):
+            if i < old and drop[i]:
+                continue
+            if w != i:
+                self.seq[w] = self.seq[i]
+                self.t[w] = self.t[i]
+                self.lat[w] = self.lat[i]
+                self.lon[w] = self.lon[i]
+                self.alt[w] = self.alt[i]
+                self.vu[w] = self.vu[i]
+            w += 1
+        self.n = w
+        self._drop = None
+        self.compactions += 1
+
+    def _compact(self):
+        """Прореживание целиком, за один вызов."""
+        if self._drop is None:
+            self._start()
+        while self.step(self.size * RUN_MAX):
+            pass
+
 
 class TrackStore:
-    def __init__(self):
+    def __init__(self, history_size=TRACK_HISTORY_SIZE):
         # частота, на которой сейчас "сидит" приёмник
         self.freq = 0
 
+        # история фиксов для карты полёта и экспорта
+        self.history = TrackHistory(history_size)
+
         # параметры сигнала
         self.rssi = None       # сглаженный RSSI
         self.raw_rssi = None   # сырое мгновенное значение RSSI
@@ -76,7 +314,9 @@ class TrackStore:
         self.last_batt_v = frame.batt_v
 
         self.last_frame_time = time.ticks_ms()
+        self.history.add_frame(frame)
 
     def lost(self):
         """Вызывается, когда трекер считает зонд потерянным."""
         self.signal = 0
+        self.history.release()
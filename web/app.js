@@ -0,0 +1,74 @@
+// app.js — живой статус: двоичный поток /events?bin=1, без EventSource
+// или при ошибке — long-poll /status?since=<версия>.
+// {{BIN_FIELDS}} и {{BIN_PROTO}} подставляет tools/build_www.py из status_bin.py.
+
+let S = {}, T0 = Date.now(), poll = null, V = -1;
+// декодер /status.bin по таблице status_bin.FIELDS
+const BF = {{BIN_FIELDS}};
+const BG = {B: ['getUint8', 1], b: ['getInt8', 1], H: ['getUint16', 2], h: ['getInt16', 2], I: ['getUint32', 4], i: ['getInt32', 4]};
+function bdec(buf){
+  let v = new DataView(buf), o = 0, j = {};
+  if (v.getUint8(0) !== {{BIN_PROTO}}) return null;
+  for (const [n, f, k, z] of BF){ let [g, s] = BG[f]; let x = v[g](o, true); o += s; j[n] = x === z ? null : x / k; }
+  j.fixed = !!(j.flags & 1); j.signal = j.flags & 2 ? 1 : 0; j.rawlog_on = !!(j.flags & 4);
+  j.state = ['SCAN', 'TRACK'][j.state] || '?';
+  return j;
+}
+function b64(s){ return Uint8Array.from(atob(s), c => c.charCodeAt(0)).buffer; }
+function render(j){
+  try{
+    document.getElementById('state').innerText = 'State: ' + j.state;
+    document.getElementById('mode_fixed').innerText = 'FIXED: ' + (j.fixed ? 'YES' : 'NO');
+    document.getElementById('freq').innerText = 'Freq: ' + j.freq + ' Hz';
+    document.getElementById('afc_conf').innerText = 'AFC confirmed: ' + (j.afc_conf || '—');
+    document.getElementById('afc_streak').innerText = 'AFC streak: ' + j.afc_streak;
+
+    document.getElementById('rssi').innerText = 'RSSI: ' + (j.rssi === null ? '—' : j.rssi.toFixed(1) + ' dBm');
+    document.getElementById('raw_rssi').innerText = 'Raw RSSI: ' + (j.raw_rssi === null ? '—' : j.raw_rssi.toFixed(1) + ' dBm');
+    document.getElementById('noise').innerText = 'Noise: ' + (j.noise === null ? '—' : j.noise.toFixed(1) + ' dBm');
+    document.getElementById('snr').innerText = 'SNR: ' + (j.snr === null ? '—' : j.snr.toFixed(1) + ' dB');
+    document.getElementById('signal').innerText = 'Signal: ' + (j.signal ? 'есть' : 'нет');
+
+    document.getElementById('freqest').innerText = 'FREQEST: ' + j.afc_freqest + '  Δf: ' + j.afc_df + ' Hz';
+
+    document.getElementById('frames').innerText = 'Frames: total=' + j.frames_total + ', valid=' + j.frames_valid + ', crc_fail=' + j.frames_crc_fail;
+    document.getElementById('sync_hits').innerText = 'Sync hits: ' + j.sync_hits;
+    document.getElementById('last_shift').innerText = 'Last valid shift: ' + (j.last_shift === null ? '—' : j.last_shift);
+    document.getElementById('rx_ovr').innerText = 'RX overruns: ' + j.rx_overruns + ' (max fill ' + j.rx_max_fill + ')';
+    document.getElementById('rawlog').innerText = 'Raw log: ' + (j.rawlog_on ? 'ON seg ' + j.rawlog_seg : 'OFF') + ', ' + j.rawlog_bytes + ' B, dropped ' + j.rawlog_dropped;
+    document.getElementById('sched').innerText = j.sched ? j.sched.map(s => 'SN ' + s.serial + ' ' + (s.freq / 1e6).toFixed(3) + ' MHz yield ' + s.yield + ' (' + s.frames + ' fr, ' + s.misses + ' miss, ' + s.skips + ' skip)').join('\n') : '';
+    document.getElementById('sondes').innerHTML = 'Sondes: ' + j.sondes + (j.sondes_evicted ? ' (evicted ' + j.sondes_evicted + ')' : '') + ' — <a href=\'/sondes\'>/sondes</a>';
+    document.getElementById('last_age').innerText = 'Last frame age: ' + (j.last_frame_age == null ? '—' : (j.last_frame_age + (Date.now() - T0) / 1000).toFixed(1) + ' s');
+
+    if (j.scan_range) document.getElementById('scan_cfg').innerText = 'Range: ' + (j.scan_range[0] / 1e6).toFixed(3) + '–' + (j.scan_range[1] / 1e6).toFixed(3) + ' MHz, step ' + j.scan_range[2] / 1e3 + ' kHz; dwell ' + j.dwell[0] + ' / ' + j.dwell[1] + ' ms' + (j.cmd_queue ? '; queued ' + j.cmd_queue : '');
+
+    document.getElementById('lat').innerText = 'lat: ' + (j.lat === null ? '—' : j.lat);
+    document.getElementById('lon').innerText = 'lon: ' + (j.lon === null ? '—' : j.lon);
+    document.getElementById('alt').innerText = 'alt: ' + (j.alt === null ? '—' : j.alt + ' m');
+    document.getElementById('batt').innerText = 'Vbat: ' + (j.batt_v === null ? '—' : j.batt_v.toFixed(2) + ' V');
+  }catch(e){}
+}
+function show(j){
+  if (!j) return;
+  if ('last_frame_age' in j) T0 = Date.now();
+  let nf = 'frames_valid' in j && j.frames_valid !== S.frames_valid;
+  Object.assign(S, j); render(S);
+  if (nf && !poll) trk();
+}
+async function upd(){ try{ let j = await (await fetch('/status')).json(); V = j.version; show(j); }catch(e){} }
+async function lp(){
+  while (true){
+    try{ let j = await (await fetch('/status?since=' + V)).json(); V = j.version; show(j); }
+    catch(e){ await new Promise(r => setTimeout(r, 1000)); }
+  }
+}
+function polling(){ if (!poll) { poll = setInterval(trk, 2000); lp(); } }
+upd(); trk();
+if (window.EventSource){
+  let es = new EventSource('/events?bin=1');
+  es.onmessage = e => show(bdec(b64(e.data)));
+  es.onerror = () => { es.close(); polling(); };
+  // редкие поля (AFC, расписание, rawlog) — полным /status раз в 10 с
+  setInterval(() => { if (!poll) upd(); }, 10000);
+  setInterval(() => render(S), 1000);
+} else polling();
@@ -0,0 +1,24 @@
+// map.js — трек полёта на canvas: дельты /track?since=<seq>
+// (сброс истории на устройстве виден по смене gen)
+
+let P = [], since = 0, gen = -1;
+async function trk(){
+  try{
+    let j;
+    do{
+      j = await (await fetch('/track?since=' + since)).json();
+      if (j.gen !== gen) { gen = j.gen; P = []; if (since) { since = 0; j.more = true; continue; } }
+      for (const p of j.pts) P.push(p);
+      if (j.pts.length) since = j.pts[j.pts.length - 1][0];
+    } while (j.more);
+    let c = document.getElementById('map').getContext('2d');
+    c.clearRect(0, 0, 320, 240);
+    if (P.length < 2) return;
+    let x0 = Math.min(...P.map(p => p[3])), x1 = Math.max(...P.map(p => p[3]));
+    let y0 = Math.min(...P.map(p => p[2])), y1 = Math.max(...P.map(p => p[2]));
+    let k = Math.min(300 / (x1 - x0 || 1), 220 / (y1 - y0 || 1));
+    c.beginPath();
+    P.forEach((p, i) => { let x = 10 + (p[3] - x0) * k, y = 230 - (p[2] - y0) * k; i ? c.lineTo(x, y) : c.moveTo(x, y); });
+    c.stroke();
+  }catch(e){}
+}
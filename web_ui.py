@@ -1,96 +1,61 @@
 # web_ui.py — расширенный Web UI для M20 трекера (MicroPython ESP32-C3)
-import socket
-import ujson as json
-import time
-
-
-PAGE = (
-    "HTTP/1.1 200 OK\r\n"
-    "Content-Type: text/html\r\n\r\n"
-    "<html><head><meta charset='utf-8'><title>M20 Tracker</title></head>"
-    "<body style='font-family:sans-serif;background:#f4f4f4'>"
-    "<h2>M20 Tracker</h2>"
-
-    "<div style='background:white;padding:10px;border-radius:8px;margin-bottom:10px;'>"
-    "<h3>Состояние</h3>"
-    "<div id='state'>State: —</div>"
-    "<div id='mode_fixed'>FIXED: —</div>"
-    "<div id='freq'>Freq: —</div>"
-    "<div id='afc_conf'>AFC confirmed: —</div>"
-    "<div id='afc_streak'>AFC streak: —</div>"
-    "</div>"
-
-    "<div style='background:white;padding:10px;border-radius:8px;margin-bottom:10px;'>"
-    "<h3>Радио</h3>"
-    "<div id='rssi'>RSSI: —</div>"
-    "<div id='raw_rssi'>Raw RSSI: —</div>"
-    "<div id='noise'>Noise: —</div>"
-    "<div id='snr'>SNR: —</div>"
-    "<div id='signal'>Signal: —</div>"
-    "<div id='freqest'>FREQEST/Δf: —</div>"
-    "</div>"
-
-    "<div style='background:white;padding:10px;border-radius:8px;margin-bottom:10px;'>"
-    "<h3>Кадры M20</h3>"
-    "<div id='frames'>Frames: —</div>"
-    "<div id='sync_hits'>Sync hits: —</div>"
-    "<div id='last_shift'>Last valid shift: —</div>"
-    "<div id='last_age'>Last frame age: —</div>"
-    "</div>"
-
-    "<div style='background:white;padding:10px;border-radius:8px;margin-bottom:10px;'>"
-    "<h3>Телеметрия</h3>"
-    "<div id='lat'>lat: —</div>"
-    "<div id='lon'>lon: —</div>"
-    "<div id='alt'>alt: —</div>"
-    "<div id='batt'>Vbat: —</div>"
-    "</div>"
-
-    "<div style='background:white;padding:10px;border-radius:8px;margin-bottom:10px;'>"
-    "<h3>Управление частотой (FIXED)</h3>"
-    "<form action='/set?' method='GET'>"
-    "<input name='f' placeholder='405400000 или 405.4M или 405400k' size='32'>"
-    "<input type='submit' value='SET FIXED'>"
-    "</form>"
-    "<br>"
-    "<a href='/clear'>Сброс FIXED (SCAN)</a>"
-    "</div>"
-
-    "<script>"
-    "async function upd(){"
-    " try{"
-    "  let r = await fetch('/status');"
-    "  let j = await r.json();"
-    "  document.getElementById('state').innerText = 'State: ' + j.state;"
-    "  document.getElementById('mode_fixed').innerText = 'FIXED: ' + (j.fixed ? 'YES' : 'NO');"
-    "  document.getElementById('freq').innerText = 'Freq: ' + j.freq + ' Hz';"
-    "  document.getElementById('afc_conf').innerText = 'AFC confirmed: ' + (j.afc_conf || '—');"
-    "  document.getElementById('afc_streak').innerText = 'AFC streak: ' + j.afc_streak;"
-
-    "  document.getElementById('rssi').innerText = 'RSSI: ' + (j.rssi === null ? '—' : j.rssi.toFixed(1) + ' dBm');"
-    "  document.getElementById('raw_rssi').innerText = 'Raw RSSI: ' + (j.raw_rssi === null ? '—' : j.raw_rssi.toFixed(1) + ' dBm');"
-    "  document.getElementById('noise').innerText = 'Noise: ' + (j.noise === null ? '—' : j.noise.toFixed(1) + ' dBm');"
-    "  document.getElementById('snr').innerText = 'SNR: ' + (j.snr === null ? '—' : j.snr.toFixed(1) + ' dB');"
-    "  document.getElementById('signal').innerText = 'Signal: ' + (j.signal ? 'есть' : 'нет');"
-
-    "  document.getElementById('freqest').innerText = 'FREQEST: ' + j.afc_freqest + '  Δf: ' + j.afc_df + ' Hz';"
-
-    "  document.getElementById('frames').innerText = 'Frames: total=' + j.frames_total + ', valid=' + j.frames_valid + ', crc_fail=' + j.frames_crc_fail;"
-    "  document.getElementById('sync_hits').innerText = 'Sync hits: ' + j.sync_hits;"
-    "  document.getElementById('last_shift').innerText = 'Last valid shift: ' + (j.last_shift === null ? '—' : j.last_shift);"
-    "  document.getElementById('last_age').innerText = 'Last frame age: ' + (j.last_frame_age === null ? '—' : j.last_frame_age.toFixed(1) + ' s');"
-
-    "  document.getElementById('lat').innerText = 'lat: ' + (j.lat === null ? '—' : j.lat);"
-    "  document.getElementById('lon').innerText = 'lon: ' + (j.lon === null ? '—' : j.lon);"
-    "  document.getElementById('alt').innerText = 'alt: ' + (j.alt === null ? '—' : j.alt + ' m');"
-    "  document.getElementById('batt').innerText = 'Vbat: ' + (j.batt_v === null ? '—' : j.batt_v.toFixed(2) + ' V');"
-    " }catch(e){}"
-    "}"
-    "setInterval(upd, 1000);"
-    "</script>"
-
-    "</body></html>"
+#
+# HTTP-сервер на asyncio/uasyncio без отдельного потока: задачи соединений
+# выполняются в паузах главного цикла трекера (Tracker.idle = aio_pump).
+# Соединения держатся keep-alive, у чтения запроса и простоя есть таймауты.
+# Сверх WEB_MAX_CONN одновременных соединений закрываем то, что дольше всех
+# простаивает между запросами (браузер держит открытыми соединения, по
+# которым грузил статику, — иначе вторая страница получала бы 503); 503 —
+# только если простаивающих нет.
+#
+# /events — поток Server-Sent Events: вместо опроса /status раз в секунду
+# страница получает короткое обновление, только когда что-то изменилось
+# (новый кадр, state/fixed_mode, RSSI больше чем на SSE_RSSI_DB), и не
+# чаще SSE_MIN_INTERVAL_MS на клиента. Поток держит соединение всё время,
+# пока открыта страница, поэтому у потоков свой лимит SSE_MAX_CONN, а
+# слот запросов WEB_MAX_CONN он освобождает. Без EventSource — long-poll
+# /status?since=<версия> по снимку, который публикует трекер
+# (status_snapshot.py): готовые байты, ETag и 304 без пересборки.
+# Для слабого канала тот же статус есть в двоичном виде (status_bin.py):
+# /status.bin и /events?bin=1; страница слушает двоичный поток.
+#
+# Страница и скрипты не живут в ОЗУ: исходники в web/, tools/build_www.py
+# сжимает их в gzip-файлы на флеше (WEB_ASSET_DIR) с манифестом
+# assets.json. Отдаём как есть — Content-Encoding: gzip, ETag/304,
+# Cache-Control — кусками через один буфер WEB_CHUNK.
+#
+# Управление (/set, /clear, /rawlog, /scan, /dwell) не трогает трекер
+# напрямую: команда уходит в очередь (commands.py), трекер выполняет её
+# в начале шага, ответ ждёт результата — 302 на / при успехе, иначе
+# 400 (отказ), 503 (очередь полна) или 504 (не дождались).
+
+import binascii
+
+from hal import json, time, asyncio, aio_run, aio_pump, aio_write
+from config import (
+    HTTP_PORT, TRACK_DELTA_MAX, WEB_MAX_CONN, WEB_TIMEOUT_S, WEB_KEEPALIVE_S,
+    SSE_POLL_MS, SSE_MIN_INTERVAL_MS, SSE_RSSI_DB, SSE_KEEPALIVE_S, SSE_MAX_CONN,
+    STATUS_LONGPOLL_S,
+    WEB_ASSET_DIR, WEB_CHUNK, CMD_TIMEOUT_S,
 )
+from status_snapshot import status_state, status_radio, status_frame
+import status_bin
+import track_export
+
+# заголовков запроса читаем не больше
+MAX_HEADERS = 32
+
+
+def load_assets(d):
+    """Манифест d/assets.json → {URL: (файл, тип, ETag, Cache-Control, размер)}."""
+    try:
+        with open(d + "/assets.json") as f:
+            m = json.load(f)
+    except (OSError, ValueError):
+        print("[WEB] no assets in", d, "- run tools/build_www.py and upload www/")
+        return {}
+    return {url: (d + "/" + a["file"], a["type"], '"%s"' % a["etag"], a["cache"], a["size"])
+            for url, a in m.items()}
 
 
 def parse_freq(x):
@@ -107,103 +72,407 @@ def parse_freq(x):
         return None
 
 
-def start_server(tracker):
-    print("[WEB] start on :80")
+def query_arg(q, name, default=None):
+    """Параметр name из строки запроса "a=1&b=2"."""
+    for kv in q.split("&"):
+        k, _, v = kv.partition("=")
+        if k == name:
+            return v
+    return default
 
-    addr = socket.getaddrinfo("0.0.0.0", 80)[0][-1]
-    s = socket.socket()
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind(addr)
-    s.listen(2)
 
-    while True:
-        cl, addr = s.accept()
+def query_int(q, name, default=0):
+    try:
+        return int(query_arg(q, name, default))
+    except (ValueError, TypeError):
+        return default
+
+
+def build_track(tracker, since):
+    """Точки истории после seq=since (не больше TRACK_DELTA_MAX).
+
+    pts — [seq, t GPS с, lat 1e-6 °, lon 1e-6 °, alt м, vu см/с];
+    more — есть ещё точки, запросить снова с since = seq последней.
+    """
+    h = tracker.track.history
+    i = h.index_after(since)
+    j = min(h.n, i + TRACK_DELTA_MAX)
+    return {
+        "serial": h.serial,
+        "gen": h.gen,
+        "last_seq": h.last_seq,
+        "tol": h.tol,
+        "pts": [h.point(k) for k in range(i, j)],
+        "more": j < h.n,
+    }
+
+
+# ------------------------------------------------------------
+# HTTP-сервер
+# ------------------------------------------------------------
+class WebServer:
+    def __init__(self, tracker, port=HTTP_PORT, max_conn=WEB_MAX_CONN, asset_dir=WEB_ASSET_DIR):
+        self.t = tracker
+        self.port = port
+        self.max_conn = max_conn
+        self.srv = None
+        self.active = 0
+        self.sse = 0          # открытых потоков /events
+        self._idle = []       # задачи соединений в простое keep-alive, старые первыми
+
+        # статистика
+        self.conns = 0
+        self.requests = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.timeouts = 0
+        self.pushes = 0
+        self.not_modified = 0
+        self._bin = bytearray(status_bin.SIZE)
+
+        # статика: манифест в ОЗУ, сами файлы — на флеше
+        self.assets = load_assets(asset_dir)
+        self._chunk = memoryview(bytearray(WEB_CHUNK))
+
+    def start(self):
+        """Открыть порт и обслуживать клиентов в паузах трекера."""
+        print("[WEB] start on :%d" % self.port)
+        aio_run(self._start())
+        self.t.idle = aio_pump
+
+    async def _start(self):
+        self.srv = await asyncio.start_server(self._client, "0.0.0.0", self.port)
+
+    # ---------------- соединение ----------------
+    async def _client(self, r, w):
+        self.conns += 1
+        if self.active >= self.max_conn and not self._evict():
+            self.rejected += 1
+            try:
+                await self._reply(w, "503 Service Unavailable", "text/plain", b"busy\n", False)
+            except OSError:
+                pass
+            await self._close(w)
+            return
+        self.active += 1
         try:
-            req = cl.recv(512).decode()
-        except:
-            cl.close()
-            continue
-
-        if not req:
-            cl.close()
-            continue
-
-        first = req.split("\n")[0]
+            timeout = WEB_TIMEOUT_S
+            while True:
+                req = await self._read_request(r, timeout)
+                if req is None:
+                    break
+                self.requests += 1
+                if not await self._handle(r, w, *req):
+                    break
+                # дальше — простой keep-alive до следующего запроса
+                timeout = WEB_KEEPALIVE_S
+                self._idle.append(asyncio.current_task())
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except asyncio.CancelledError:
+            pass                # вытеснено новым соединением (_evict)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._busy()
+            self.active -= 1
+            await self._close(w)
+
+    def _busy(self):
+        """Соединение текущей задачи больше не простаивает."""
+        task = asyncio.current_task()
+        if task in self._idle:
+            self._idle.remove(task)
+
+    def _evict(self):
+        """Закрыть самое давно простаивающее keep-alive соединение.
+
+        Задача отменяется в ожидании запроса и закрывает сокет сама; слот
+        освобождается, когда она дойдёт до finally, — новое соединение
+        не ждёт этого.
+        """
+        if not self._idle:
+            return False
+        self._idle.pop(0).cancel()
+        self.evicted += 1
+        return True
+
+    async def _read_request(self, r, timeout):
+        """(метод, путь, запрос, keep-alive, заголовки) или None (клиент ушёл)."""
+        line = await asyncio.wait_for(r.readline(), timeout)
+        self._busy()
+        if not line:
+            return None
+        method, target, ver = line.decode().split()
+        hdr = {}
+        for _ in range(MAX_HEADERS):
+            h = await asyncio.wait_for(r.readline(), WEB_TIMEOUT_S)
+            if not h or h in (b"\r\n", b"\n"):
+                break
+            k, _, v = h.decode().partition(":")
+            hdr[k.strip().lower()] = v.strip()
+        else:
+            raise ValueError("too many headers")
+        path, _, q = target.partition("?")
+        keep = ver == "HTTP/1.1" and hdr.get("connection", "").lower() != "close"
+        return method, path, q, keep, hdr
+
+    @staticmethod
+    async def _close(w):
+        try:
+            w.close()
+            await w.wait_closed()
+        except OSError:
+            pass
+
+    # ---------------- ответы ----------------
+    @staticmethod
+    async def _reply(w, status, ctype, body, keep, extra=""):
+        w.write(("HTTP/1.1 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n%s%s\r\n" % (
+            status, ctype, len(body), extra, "" if keep else "Connection: close\r\n")).encode())
+        w.write(body)
+        await w.drain()
+
+    @staticmethod
+    async def _redirect(w, keep):
+        await WebServer._reply(w, "302 Found", "text/plain", b"", keep, "Location: /\r\n")
+
+    @staticmethod
+    async def _stream(w, ctype, gen, keep):
+        """Transfer-Encoding: chunked — кусок в сокет, как только готов."""
+        w.write(("HTTP/1.1 200 OK\r\nContent-Type: %s\r\nTransfer-Encoding: chunked\r\n%s\r\n" % (
+            ctype, "" if keep else "Connection: close\r\n")).encode())
+        for part in gen:
+            w.write(("%x\r\n" % len(part)).encode())
+            # part — кусок переиспользуемого буфера track_export.chunks
+            aio_write(w, part)
+            w.write(b"\r\n")
+            await w.drain()
+        w.write(b"0\r\n\r\n")
+        await w.drain()
+
+    async def _asset(self, w, a, keep, hdr):
+        """Файл статики: 304 по ETag или gzip-байты с флеша кусками."""
+        path, ctype, etag, cache, size = a
+        extra = "ETag: %s\r\nCache-Control: %s\r\n" % (etag, cache)
+        if hdr.get("if-none-match") == etag:
+            self.not_modified += 1
+            await self._reply(w, "304 Not Modified", ctype, b"", keep, extra)
+            return
+        w.write(("HTTP/1.1 200 OK\r\nContent-Type: %s\r\nContent-Encoding: gzip\r\n"
+                 "Content-Length: %d\r\n%s%s\r\n" % (
+                     ctype, size, extra, "" if keep else "Connection: close\r\n")).encode())
+        mv = self._chunk
+        with open(path, "rb") as f:
+            while True:
+                n = f.readinto(mv)
+                if not n:
+                    break
+                aio_write(w, mv[:n])
+                await w.drain()
+
+    async def _command(self, w, keep, name, *args):
+        """Команда трекеру через очередь; ответ — по её результату."""
+        c = self.t.cmds.post(name, *args)
+        if c is None:
+            await self._reply(w, "503 Service Unavailable", "text/plain", b"command queue full\n", keep)
+            return
+        t0 = time.ticks_ms()
+        while not c.done and time.ticks_diff(time.ticks_ms(), t0) < CMD_TIMEOUT_S * 1000:
+            await asyncio.sleep(SSE_POLL_MS / 1000)
+        if not c.done:
+            # команда останется в очереди и выполнится позже
+            await self._reply(w, "504 Gateway Timeout", "text/plain", b"command pending\n", keep)
+        elif not c.ok:
+            await self._reply(w, "400 Bad Request", "text/plain", ("%s\n" % c.result).encode(), keep)
+        else:
+            await self._redirect(w, keep)
+
+    async def _json(self, w, obj, keep):
+        await self._reply(w, "200 OK", "application/json", json.dumps(obj).encode(), keep)
+
+    async def _status(self, w, q, keep, hdr, binary):
+        """Готовый снимок (JSON или status_bin); since=<версия> — дождаться следующей."""
+        pub = self.t.status
+        s = pub.get()
+        since = query_int(q, "since", -1)
+        if since == s.version:
+            t0 = time.ticks_ms()
+            while pub.snap.version == since and \
+                    time.ticks_diff(time.ticks_ms(), t0) < STATUS_LONGPOLL_S * 1000:
+                await asyncio.sleep(SSE_POLL_MS / 1000)
+            s = pub.snap
+        etag = '"%s%s"' % (s.tag, "b" if binary else "")
+        ctype = "application/octet-stream" if binary else "application/json"
+        extra = "ETag: %s\r\nCache-Control: no-cache\r\n" % etag
+        if hdr.get("if-none-match") == etag:
+            self.not_modified += 1
+            await self._reply(w, "304 Not Modified", ctype, b"", keep, extra)
+        else:
+            await self._reply(w, "200 OK", ctype, s.bin if binary else s.body, keep, extra)
+
+    # ---------------- Server-Sent Events ----------------
+    async def _events(self, r, w, binary):
+        """Поток /events до отключения клиента.
+
+        Раз в SSE_POLL_MS сравниваем то, что клиент уже видел, с трекером
+        и отправляем только изменившиеся группы полей (binary — весь
+        status_bin в base64). Пауза — ожидание
+        чтения из сокета: так сразу видно, что клиент закрыл соединение. После отправки —
+        не раньше SSE_MIN_INTERVAL_MS (изменения за это время сливаются
+        в одно событие). В тишине — комментарий раз в SSE_KEEPALIVE_S,
+        чтобы заметить ушедшего клиента.
+        """
+        t = self.t
+        w.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n\r\nretry: 3000\n\n")
+        await w.drain()
+        frames = state = rssi = None
+        d = None
+        sent = time.ticks_ms()
+        self.sse += 1
+        try:
+            while True:
+                try:
+                    if not await asyncio.wait_for(r.read(1), SSE_POLL_MS / 1000):
+                        break
+                except asyncio.TimeoutError:
+                    pass
+                now = time.ticks_ms()
+                if time.ticks_diff(now, sent) < SSE_MIN_INTERVAL_MS:
+                    continue
+                push = False
+                if not binary:
+                    d = {}
+                if t.decoder.frames_valid != frames:
+                    frames = t.decoder.frames_valid
+                    push = True
+                    if d is not None:
+                        status_frame(t, d)
+                st = (t.state, t.fixed_mode, t.track.freq)
+                if st != state:
+                    state = st
+                    push = True
+                    if d is not None:
+                        status_state(t, d)
+                x = t.track.rssi
+                if x != rssi and (x is None or rssi is None or abs(x - rssi) >= SSE_RSSI_DB):
+                    rssi = x
+                    push = True
+                    if d is not None:
+                        status_radio(t, d)
+                if push:
+                    if binary:
+                        status_bin.encode_into(self._bin, t, t.status.version, now)
+                        w.write(b"data: ")
+                        w.write(binascii.b2a_base64(self._bin))
+                        w.write(b"\n")
+                    else:
+                        w.write(("data: %s\n\n" % json.dumps(d)).encode())
+                    self.pushes += 1
+                elif time.ticks_diff(now, sent) >= SSE_KEEPALIVE_S * 1000:
+                    w.write(b": ka\n\n")
+                else:
+                    continue
+                await w.drain()
+                sent = now
+        finally:
+            self.sse -= 1
+
+    # ---------------- маршруты ----------------
+    async def _handle(self, r, w, method, path, q, keep, hdr):
+        """Ответить на запрос. Возвращает, держать ли соединение дальше."""
+        t = self.t
 
         # ---------- STATUS ----------
-        if "GET /status" in first:
-            t = tracker
-            d = {}
-
-            # базовое состояние
-            d["state"] = t.state
-            d["fixed"] = t.fixed_mode
-            d["freq"] = t.track.freq
-
-            # радио
-            d["rssi"] = t.track.rssi
-            d["raw_rssi"] = getattr(t.track, "raw_rssi", None)
-            d["noise"] = getattr(t.track, "noise", None)
-            d["snr"] = getattr(t.track, "snr", None)
-            d["signal"] = getattr(t.track, "signal", 0)
-
-            # AFC
-            d["afc_conf"] = t.afc.confirmed_freq
-            d["afc_streak"] = t.afc.streak
-            d["afc_freqest"] = t.afc.last_freqest
-            d["afc_df"] = t.afc.last_df
-
-            # статистика декодера
-            dec = t.decoder
-            d["frames_total"] = dec.frames_total
-            d["frames_valid"] = dec.frames_valid
-            d["frames_crc_fail"] = dec.frames_crc_fail
-            d["sync_hits"] = dec.sync_hits
-            d["last_shift"] = dec.last_valid_shift
-
-            # возраст последнего успешного кадра
-            if t.track.last_frame_time is not None:
-                age_ms = time.ticks_diff(time.ticks_ms(), t.track.last_frame_time)
-                d["last_frame_age"] = age_ms / 1000.0
+        if path == "/status":
+            await self._status(w, q, keep, hdr, False)
+        elif path == "/status.bin":
+            await self._status(w, q, keep, hdr, True)
+
+        # ---------- EVENTS (SSE) ----------
+        elif path == "/events":
+            if self.sse >= SSE_MAX_CONN:
+                self.rejected += 1
+                await self._reply(w, "503 Service Unavailable", "text/plain", b"busy\n", False)
+                return False
+            # поток считается в своём лимите: слот запросов свободен, пока он открыт
+            self.active -= 1
+            try:
+                await self._events(r, w, query_int(q, "bin") == 1)
+            finally:
+                self.active += 1
+            return False
+
+        # ---------- TRACK HISTORY ----------
+        elif path == "/track":
+            if query_int(q, "clear"):
+                t.track.history.clear()
+            await self._json(w, build_track(t, query_int(q, "since")), keep)
+
+        # ---------- EXPORT GPX / KML / CSV ----------
+        elif path.startswith("/export."):
+            fmt = track_export.FORMATS.get(path.rsplit(".", 1)[-1])
+            if fmt is None:
+                await self._reply(w, "404 Not Found", "text/plain", b"", keep)
             else:
-                d["last_frame_age"] = None
-
-            # телеметрия
-            d["lat"] = t.track.last_lat
-            d["lon"] = t.track.last_lon
-            d["alt"] = t.track.last_alt
-            d["batt_v"] = t.track.last_batt_v
+                h = t.track.history
+                await self._stream(w, fmt[1], fmt[0](track_export.history_points(h),
+                                                     "M20 %s" % h.serial), keep)
 
-            js = json.dumps(d)
-            cl.send("HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            cl.send(js)
-            cl.close()
-            continue
+        # ---------- SONDES ----------
+        elif path == "/sondes":
+            await self._json(w, t.sondes.to_list(), keep)
 
         # ---------- SET FIXED ----------
-        if "GET /set?" in first:
-            try:
-                q = first.split("?", 1)[1]
-                q = q.split(" ", 1)[0]
-                kv = q.split("=")
-                if len(kv) == 2:
-                    f = parse_freq(kv[1])
-                    if f:
-                        print("[WEB] set FIXED freq:", f)
-                        tracker.set_fixed_frequency(f)
-            except:
-                pass
-            cl.send("HTTP/1.1 302 Found\r\nLocation: /\r\n\r\n")
-            cl.close()
-            continue
+        elif path == "/set":
+            f = parse_freq(query_arg(q, "f", ""))
+            if f:
+                print("[WEB] set FIXED freq:", f)
+                await self._command(w, keep, "fixed", f)
+            else:
+                await self._reply(w, "400 Bad Request", "text/plain", b"bad frequency\n", keep)
+
+        # ---------- RAW LOG ON/OFF ----------
+        elif path == "/rawlog":
+            on = query_int(q, "on") == 1
+            print("[WEB] raw log:", on)
+            await self._command(w, keep, "rawlog", on)
 
         # ---------- CLEAR FIXED ----------
-        if "GET /clear" in first:
-            tracker.clear_fixed_mode()
-            cl.send("HTTP/1.1 302 Found\r\nLocation: /\r\n\r\n")
-            cl.close()
-            continue
-
-        # ---------- MAIN PAGE ----------
-        cl.sendall(PAGE)
-        cl.close()
+        elif path == "/clear":
+            await self._command(w, keep, "clear")
+
+        # ---------- SCAN RANGE ----------
+        elif path == "/scan":
+            start = parse_freq(query_arg(q, "start", ""))
+            end = parse_freq(query_arg(q, "end", ""))
+            step = parse_freq(query_arg(q, "step", ""))
+            if start and end and step:
+                print("[WEB] scan range:", start, end, step)
+                await self._command(w, keep, "scan", start, end, step)
+            else:
+                await self._reply(w, "400 Bad Request", "text/plain", b"need start, end, step\n", keep)
+
+        # ---------- DWELL ----------
+        elif path == "/dwell":
+            step = query_int(q, "step", None)
+            cand = query_int(q, "cand", None)
+            print("[WEB] dwell:", step, cand)
+            await self._command(w, keep, "dwell", step, cand)
+
+        # ---------- STATIC (страница, скрипты) ----------
+        else:
+            a = self.assets.get("/index.html" if path == "/" else path)
+            if a is not None:
+                await self._asset(w, a, keep, hdr)
+            else:
+                await self._reply(w, "404 Not Found", "text/plain", b"", keep)
+        return keep
+
+
+def start_server(tracker, port=HTTP_PORT, asset_dir=WEB_ASSET_DIR):
+    """Поднять Web UI; запросы обслуживаются, пока трекер ждёт."""
+    srv = WebServer(tracker, port, asset_dir=asset_dir)
+    srv.start()
+    return srv